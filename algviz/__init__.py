@@ -13,15 +13,37 @@ License: GPLv3
 
 """
 
-from .visual import Visualizer
-from .graph import GraphNode, parseGraph, updateGraphEdge, generateRandomGraph
-from .tree import BinaryTreeNode, TreeNode, RecursiveTree, parseBinaryTree, parseTree
-from .linked_list import ForwardLinkedListNode, DoublyLinkedListNode
-from .linked_list import parseForwardLinkedList, parseDoublyLinkedList
+from importlib import import_module
+
 from .utility import _version, setUpRandomSeed
 from .utility import AlgvizParamError, AlgvizRuntimeError, AlgvizFatalError, AlgvizTypeError
 
 
+# The interfaces imported on first use (PEP 562), so `import algviz` doesn't load IPython, graphviz and
+# the data structure modules until they are used. Key:interface name; Value:the module defines it.
+_LAZY_INTERFACES = {
+    'Visualizer': 'visual',
+    'GraphNode': 'graph', 'parseGraph': 'graph', 'updateGraphEdge': 'graph', 'generateRandomGraph': 'graph',
+    'BinaryTreeNode': 'tree', 'TreeNode': 'tree', 'RecursiveTree': 'tree', 'parseBinaryTree': 'tree',
+    'parseTree': 'tree',
+    'ForwardLinkedListNode': 'linked_list', 'DoublyLinkedListNode': 'linked_list',
+    'parseForwardLinkedList': 'linked_list', 'parseDoublyLinkedList': 'linked_list',
+    'setUpLayoutCache': 'layout_cache',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_INTERFACES:
+        value = getattr(import_module('.' + _LAZY_INTERFACES[name], __name__), name)
+        globals()[name] = value     # Cache it, __getattr__ is only called for the missing attributes.
+        return value
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_INTERFACES.keys()))
+
+
 # Common colors name to RGB map (see: https://www.w3schools.com/tags/ref_colornames.asp)
 cAqua = (0, 255, 255)
 cBlack = (0, 0, 0)
@@ -87,7 +109,7 @@ __all__ = [
     'ForwardLinkedListNode', 'DoublyLinkedListNode',
     'parseForwardLinkedList', 'parseDoublyLinkedList',
     'AlgvizParamError', 'AlgvizRuntimeError', 'AlgvizFatalError', 'AlgvizTypeError',
-    'setUpRandomSeed'
+    'setUpRandomSeed', 'setUpLayoutCache'
 ]
 
 
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""Store the animation frames compactly until they are exported.
+
+A long animation records thousands of frames for each display object, keeping the parsed
+xml tree of every frame takes a lot of memory. FrameStore keeps each frame as a zlib
+compressed blob addressed by the blake2b hash of its content, so the same frames (eg: a
+vector which is not changed) share one blob. The blobs exceeding the memory limit are
+appended into a temporary file, and read back when the frames are exported.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+import zlib
+from hashlib import blake2b
+
+
+FRAME_STORE_MEMORY_LIMIT = 128 * 1024 * 1024    # The default maximum bytes of the blobs kept in memory.
+FRAME_COMPRESS_LEVEL = 1                        # Frames are compressed once and seldom read, favor the speed.
+
+
+class FrameStore:
+    """A content addressed store of the compressed frames, spill the blobs into a temporary file when memory is full.
+    """
+
+    def __init__(self, memory_limit=FRAME_STORE_MEMORY_LIMIT):
+        """
+        Args:
+            memory_limit (int): The maximum bytes of the compressed blobs kept in memory.
+        """
+        self._memory_limit = memory_limit
+        self._memory_size = 0           # The bytes of the blobs in memory.
+        self._blobs = dict()            # Key:blob key; Value:compressed blob in memory.
+        self._spilled = dict()          # Key:blob key; Value:(offset, length) of the blob in the spill file.
+        self._spill_file = None         # The temporary file to save the blobs exceeding the memory limit.
+        self._spill_size = 0            # The bytes written into the spill file.
+
+    def put(self, content):
+        """Save the content into the store if it's not saved before.
+
+        Args:
+            content (str): The frame content.
+
+        Returns:
+            bytes: The key to get the content back.
+        """
+        data = content.encode('utf-8')
+        key = blake2b(data, digest_size=16).digest()
+        if key in self._blobs or key in self._spilled:
+            return key
+        blob = zlib.compress(data, FRAME_COMPRESS_LEVEL)
+        if self._memory_size + len(blob) <= self._memory_limit:
+            self._blobs[key] = blob
+            self._memory_size += len(blob)
+        else:
+            if self._spill_file is None:
+                from tempfile import TemporaryFile     # Imported on first use, most frames are kept in memory.
+                self._spill_file = TemporaryFile()
+            self._spill_file.seek(self._spill_size)
+            self._spill_file.write(blob)
+            self._spilled[key] = (self._spill_size, len(blob))
+            self._spill_size += len(blob)
+        return key
+
+    def get(self, key):
+        """
+        Args:
+            key (bytes): The key returned by put.
+
+        Returns:
+            str: The frame content.
+        """
+        blob = self._blobs.get(key)
+        if blob is None:
+            (offset, length) = self._spilled[key]
+            self._spill_file.seek(offset)
+            blob = self._spill_file.read(length)
+        return zlib.decompress(blob).decode('utf-8')
+
+    def memory_size(self):
+        """
+        Returns:
+            (int, int): The bytes of the blobs in memory and in the spill file.
+        """
+        return (self._memory_size, self._spill_size)
+
+    def __len__(self):
+        return len(self._blobs) + len(self._spilled)
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+
+"""Built-in layout engines for graphs which don't need to call graphviz.
+
+The layout engines output the SVG string in the same format as graphviz
+(graph0 group, nodeN/edgeN groups with titles, ellipses, paths and arrow
+polygons), so it can be used by SvgGraph in place of the graphviz output.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+from math import ceil, sqrt
+from random import random
+
+from algviz.svg_element import escape_xml
+from algviz.utility import FONT_FAMILY
+
+
+NODE_RADIUS = 27            # Graphviz default node width is 0.75 inch(54pt).
+NODE_SEP = 18               # Graphviz default nodesep is 0.25 inch(18pt).
+RANK_SEP = 36               # Graphviz default ranksep is 0.5 inch(36pt).
+GRAPH_MARGIN = 4            # Graphviz default graph pad is 4pt.
+ARROW_LENGTH = 10
+ARROW_WIDTH = 3.5
+EDGE_LABEL_FONT_SIZE = 12
+
+FORCE_EDGE_LENGTH = 90      # The ideal distance(pt) between the adjacent nodes in force layout.
+FORCE_COLD_ITERATIONS = 60  # The iterations to layout a graph without any known node positions.
+FORCE_WARM_ITERATIONS = 15  # The iterations to refine the layout of last frame.
+FORCE_GRAVITY = 0.02        # Pull the disconnected components towards the center.
+
+
+def layout_tree(node_labels, edges):
+    """Layout a directed tree(or forest) with Reingold-Tilford algorithm (Buchheim's linear time version).
+
+    Args:
+        node_labels (list((str, str))): The (label, font_size) of each node, the SVG node id is index + 1.
+        edges (list((int, int, str))): The (SVG start node id, SVG end node id, label) of each edge.
+
+    Returns:
+        str/None: The SVG string of the layout graph, None if the graph is not a forest.
+    """
+    nodes_num = len(node_labels)
+    # Build the tree with a virtual root(index 0) whose children are the roots of the forest.
+    parent = [-1] * (nodes_num + 1)
+    children = [list() for _ in range(nodes_num + 1)]
+    for (node1, node2, _) in edges:
+        if node1 == node2 or parent[node2] != -1:
+            return None
+        parent[node2] = node1
+        children[node1].append(node2)
+    for i in range(1, nodes_num + 1):
+        if parent[i] == -1:
+            parent[i] = 0
+            children[0].append(i)
+    (xs, depths) = _tidy_tree_(parent, children)
+    if xs is None:
+        return None     # There is a cycle in the graph.
+    positions = [None] * (nodes_num + 1)
+    max_x, max_depth = 0, 0
+    for i in range(1, nodes_num + 1):
+        max_x = max(max_x, xs[i])
+        max_depth = max(max_depth, depths[i] - 1)
+    width = ceil(max_x * (NODE_RADIUS * 2 + NODE_SEP) + NODE_RADIUS * 2 + GRAPH_MARGIN * 2)
+    height = ceil(max_depth * (NODE_RADIUS * 2 + RANK_SEP) + NODE_RADIUS * 2 + GRAPH_MARGIN * 2)
+    top = GRAPH_MARGIN * 2 - height + NODE_RADIUS
+    for i in range(1, nodes_num + 1):
+        positions[i] = (NODE_RADIUS + xs[i] * (NODE_RADIUS * 2 + NODE_SEP),
+                        top + (depths[i] - 1) * (NODE_RADIUS * 2 + RANK_SEP))
+    return _graph_svg_(width, height, node_labels, edges, positions, True)
+
+
+def force_layout_supported():
+    """
+    Returns:
+        bool: Whether the force layout can be used (numpy is installed).
+    """
+    return _import_numpy_() is not None
+
+
+def layout_force(node_labels, edges, init_positions=None):
+    """Layout an undirected graph with the (numpy vectorized) Fruchterman-Reingold force-directed algorithm.
+
+    The layout warm starts from the node positions of the last frame, the new nodes are placed around
+    their placed neighbors. Then only a few iterations with a low temperature are needed to converge,
+    and the unchanged part of the graph stays stable.
+
+    Args:
+        node_labels (list((str, str))): The (label, font_size) of each node, the SVG node id is index + 1.
+        edges (list((int, int, str))): The (SVG start node id, SVG end node id, label) of each edge.
+        init_positions (list((float, float))): The last position of each node, None for the new nodes.
+
+    Returns:
+        (str, list((float, float)))/None: The SVG string and the position of each node,
+            None if numpy is not installed.
+    """
+    np = _import_numpy_()
+    if np is None:
+        return None
+    nodes_num = len(node_labels)
+    if init_positions is None:
+        init_positions = [None] * nodes_num
+    neighbors = [list() for _ in range(nodes_num)]
+    for (node1, node2, _) in edges:
+        if node1 != node2:
+            neighbors[node1 - 1].append(node2 - 1)
+            neighbors[node2 - 1].append(node1 - 1)
+    (pos, known) = _init_force_positions_(init_positions, neighbors)
+    pos = np.array(pos, dtype=np.float64).reshape((nodes_num, 2))
+    if nodes_num > 1:
+        # The nodes placed in the last frame only move a little, the new nodes move freely.
+        if known > 0:
+            iterations, new_temperature = FORCE_WARM_ITERATIONS, FORCE_EDGE_LENGTH * 0.5
+        else:
+            iterations, new_temperature = FORCE_COLD_ITERATIONS, FORCE_EDGE_LENGTH * sqrt(nodes_num) * 0.2
+        temperature = np.array([FORCE_EDGE_LENGTH * 0.02 if p is not None else new_temperature
+                                for p in init_positions], dtype=np.float32)
+        edge_array = np.array([(e[0] - 1, e[1] - 1) for e in edges if e[0] != e[1]], dtype=np.intp).reshape((-1, 2))
+        pos = _force_iterations_(np, pos, edge_array, iterations, temperature)
+    positions = [(float(x), float(y)) for (x, y) in pos]
+    if nodes_num == 0:
+        min_x = max_x = min_y = max_y = 0
+    else:
+        (min_x, min_y) = pos.min(axis=0)
+        (max_x, max_y) = pos.max(axis=0)
+    width = ceil(max_x - min_x + NODE_RADIUS * 2 + GRAPH_MARGIN * 2)
+    height = ceil(max_y - min_y + NODE_RADIUS * 2 + GRAPH_MARGIN * 2)
+    top = GRAPH_MARGIN * 2 - height + NODE_RADIUS
+    svg_positions = [None] + [(x - min_x + NODE_RADIUS, y - min_y + top) for (x, y) in positions]
+    return (_graph_svg_(width, height, node_labels, edges, svg_positions, False), positions)
+
+
+def _import_numpy_():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _init_force_positions_(init_positions, neighbors):
+    """Place the new nodes around their placed neighbors(or randomly), keep the known positions.
+
+    Returns:
+        (list((float, float)), int): The initial position of each node, and the number of known positions.
+    """
+    nodes_num = len(init_positions)
+    positions = list(init_positions)
+    known = sum([1 for p in positions if p is not None])
+    spread = FORCE_EDGE_LENGTH * max(sqrt(nodes_num), 1)
+    # Place the nodes breadth first from the known nodes, so that the new subgraphs grow out of the old layout.
+    queue = [i for i in range(nodes_num) if positions[i] is not None]
+    head = 0
+    while head < nodes_num:
+        if head >= len(queue):
+            i = next(i for i in range(nodes_num) if positions[i] is None)
+            positions[i] = (random() * spread, random() * spread)
+            queue.append(i)
+        i = queue[head]
+        head += 1
+        for j in neighbors[i]:
+            if positions[j] is None:
+                positions[j] = (positions[i][0] + (random() - 0.5) * FORCE_EDGE_LENGTH,
+                                positions[i][1] + (random() - 0.5) * FORCE_EDGE_LENGTH)
+                queue.append(j)
+    return (positions, known)
+
+
+def _force_iterations_(np, pos, edge_array, iterations, temperature):
+    """Move the nodes by the repulsive forces between all nodes and the attractive forces along the edges.
+
+    Args:
+        np (module): The numpy module.
+        pos (numpy.ndarray): The (n, 2) node positions.
+        edge_array (numpy.ndarray): The (m, 2) node indexes of the edges.
+        iterations (int): The maximum iterations, stop early if the layout is converged.
+        temperature (numpy.ndarray): The maximum displacement of each node in the first iteration,
+            it cools down linearly to zero in the following iterations.
+
+    Returns:
+        numpy.ndarray: The new node positions.
+    """
+    k = FORCE_EDGE_LENGTH
+    pos = pos.astype(np.float32)
+    for i in range(iterations):
+        (x, y) = (pos[:, 0], pos[:, 1])
+        dx = x[:, np.newaxis] - x[np.newaxis, :]
+        dy = y[:, np.newaxis] - y[np.newaxis, :]
+        # Repulsive force: k^2 / d along the direction, which is delta * k^2 / d^2.
+        weight = dx * dx
+        weight += dy * dy
+        np.maximum(weight, 1.0, out=weight)
+        np.divide(k * k, weight, out=weight)
+        disp = np.stack(((dx * weight).sum(axis=1), (dy * weight).sum(axis=1)), axis=1)
+        if len(edge_array) > 0:
+            edge_delta = pos[edge_array[:, 0]] - pos[edge_array[:, 1]]
+            edge_dist = np.sqrt(np.einsum('ij,ij->i', edge_delta, edge_delta))
+            # Attractive force: d^2 / k along the direction, which is delta * d / k.
+            force = edge_delta * (edge_dist / k)[:, np.newaxis]
+            np.subtract.at(disp, edge_array[:, 0], force)
+            np.add.at(disp, edge_array[:, 1], force)
+        disp -= (pos - pos.mean(axis=0)) * (FORCE_GRAVITY * k)
+        length = np.sqrt(np.einsum('ij,ij->i', disp, disp))
+        np.maximum(length, 1e-6, out=length)
+        step = np.minimum(length, temperature * (1 - i / iterations))
+        pos = pos + disp * (step / length)[:, np.newaxis]
+        if step.max() < 0.5:
+            break
+    return pos.astype(np.float64)
+
+
+def _tidy_tree_(parent, children):
+    """Compute the x position(in node units) and depth of each node in the tree rooted at node 0.
+
+    This is the algorithm in "Improving Walker's Algorithm to Run in Linear Time" by Buchheim et al,
+    the recursive walks are replaced by explicit stacks to support very deep trees.
+
+    Returns:
+        (list(float), list(int)): The x position and the depth of each node, (None, None) if not a tree.
+    """
+    size = len(parent)
+    x = [0.0] * size
+    mod = [0.0] * size
+    change = [0.0] * size
+    shift = [0.0] * size
+    thread = [-1] * size
+    ancestor = list(range(size))
+    number = [0] * size         # The index of node in it's siblings.
+    for v in range(size):
+        for i, w in enumerate(children[v]):
+            number[w] = i
+
+    def left(v):
+        if thread[v] != -1:
+            return thread[v]
+        if len(children[v]) > 0:
+            return children[v][0]
+        return -1
+
+    def right(v):
+        if thread[v] != -1:
+            return thread[v]
+        if len(children[v]) > 0:
+            return children[v][-1]
+        return -1
+
+    def move_subtree(wl, wr, distance):
+        subtrees = number[wr] - number[wl]
+        change[wr] -= distance / subtrees
+        shift[wr] += distance
+        change[wl] += distance / subtrees
+        x[wr] += distance
+        mod[wr] += distance
+
+    def apportion(v, default_ancestor):
+        if number[v] == 0:
+            return default_ancestor
+        siblings = children[parent[v]]
+        vir = vor = v
+        vil = siblings[number[v] - 1]
+        vol = siblings[0]
+        sir = sor = mod[v]
+        sil = mod[vil]
+        sol = mod[vol]
+        while right(vil) != -1 and left(vir) != -1:
+            vil = right(vil)
+            vir = left(vir)
+            vol = left(vol)
+            vor = right(vor)
+            ancestor[vor] = v
+            distance = (x[vil] + sil) - (x[vir] + sir) + 1
+            if distance > 0:
+                wl = ancestor[vil] if parent[ancestor[vil]] == parent[v] else default_ancestor
+                move_subtree(wl, v, distance)
+                sir += distance
+                sor += distance
+            sil += mod[vil]
+            sir += mod[vir]
+            sol += mod[vol]
+            sor += mod[vor]
+        if right(vil) != -1 and right(vor) == -1:
+            thread[vor] = right(vil)
+            mod[vor] += sil - sor
+        else:
+            if left(vir) != -1 and left(vol) == -1:
+                thread[vol] = left(vir)
+                mod[vol] += sir - sol
+            default_ancestor = v
+        return default_ancestor
+
+    # First walk: post-order, each frame is [node, next child index, default ancestor].
+    visited = 0
+    stack = [[0, 0, -1]]
+    while len(stack) > 0:
+        frame = stack[-1]
+        v = frame[0]
+        if frame[1] < len(children[v]):
+            w = children[v][frame[1]]
+            frame[1] += 1
+            if frame[2] == -1:
+                frame[2] = w
+            stack.append([w, 0, -1])
+            visited += 1
+            if visited >= size:
+                return (None, None)     # There is a cycle in the graph.
+            continue
+        stack.pop()
+        if len(children[v]) == 0:
+            x[v] = x[children[parent[v]][number[v] - 1]] + 1 if number[v] > 0 else 0.0
+        else:
+            # Execute the shifts of the children.
+            total_shift, total_change = 0.0, 0.0
+            for w in reversed(children[v]):
+                x[w] += total_shift
+                mod[w] += total_shift
+                total_change += change[w]
+                total_shift += shift[w] + total_change
+            midpoint = (x[children[v][0]] + x[children[v][-1]]) / 2
+            if v != 0 and number[v] > 0:
+                x[v] = x[children[parent[v]][number[v] - 1]] + 1
+                mod[v] = x[v] - midpoint
+            else:
+                x[v] = midpoint
+        if len(stack) > 0:
+            stack[-1][2] = apportion(v, stack[-1][2])
+    if visited != size - 1:
+        return (None, None)     # Some nodes are not reachable from the roots.
+    # Second walk: pre-order, sum up the modifiers.
+    depth = [0] * size
+    stack = [(0, 0.0)]
+    while len(stack) > 0:
+        (v, m) = stack.pop()
+        x[v] += m
+        for w in children[v]:
+            depth[w] = depth[v] + 1
+            stack.append((w, m + mod[v]))
+    min_x = min(x[1:]) if size > 1 else 0
+    for v in range(size):
+        x[v] -= min_x
+    return (x, depth)
+
+
+def _graph_svg_(width, height, node_labels, edges, positions, directed):
+    """Output the layout graph as graphviz SVG format.
+
+    Args:
+        width, height (int): The size of the SVG.
+        positions (list((float, float))): The (cx, cy) of each node in graph0 coordinates, index is the SVG node id.
+        directed (bool): Whether to draw arrows for edges.
+
+    Returns:
+        str: The SVG string.
+    """
+    out = list()
+    out.append('<?xml version="1.0" encoding="UTF-8" standalone="no"?>')
+    out.append('<svg width="{}pt" height="{}pt" viewBox="0.00 0.00 {:.2f} {:.2f}" '
+               'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'.format(
+                   width, height, width, height))
+    out.append('<g id="graph0" class="graph" transform="scale(1 1) rotate(0) translate({} {})">'.format(
+        GRAPH_MARGIN, height - GRAPH_MARGIN))
+    out.append('<polygon fill="#00000000" stroke="transparent" points="-{m},{m} -{m},{t} {r},{t} {r},{m} -{m},{m}"/>'.format(
+        m=GRAPH_MARGIN, t=GRAPH_MARGIN - height, r=width - GRAPH_MARGIN))
+    for i in range(len(node_labels)):
+        (label, font_size) = node_labels[i]
+        (cx, cy) = positions[i + 1]
+        out.append('<g id="node{0}" class="node"><title>{0}</title>'.format(i + 1))
+        out.append('<ellipse fill="none" stroke="#7b7b7b" cx="{:.2f}" cy="{:.2f}" rx="{}" ry="{}"/>'.format(
+            cx, cy, NODE_RADIUS, NODE_RADIUS))
+        if label is None:
+            label, font_size = str(i + 1), '14.00'
+        lines = [line for line in label.split('\n')] if label != '' else []
+        line_height = float(font_size) * 1.2
+        for j in range(len(lines)):
+            y = cy + (j - (len(lines) - 1) / 2) * line_height + float(font_size) * 0.3
+            out.append('<text text-anchor="middle" x="{:.2f}" y="{:.2f}" font-family="{}" font-size="{}">{}</text>'.format(
+                cx, y, FONT_FAMILY, font_size, escape_xml(lines[j])))
+        out.append('</g>')
+    edge_op = '&#45;&gt;' if directed else '&#45;&#45;'
+    for i in range(len(edges)):
+        (node1, node2, label) = edges[i]
+        (x1, y1) = positions[node1]
+        (x2, y2) = positions[node2]
+        out.append('<g id="edge{0}" class="edge"><title>{1}{2}{3}</title>'.format(i + 1, node1, edge_op, node2))
+        length = sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+        if length < NODE_RADIUS * 2:
+            length = NODE_RADIUS * 2
+        (ux, uy) = ((x2 - x1) / length, (y2 - y1) / length)
+        (sx, sy) = (x1 + ux * NODE_RADIUS, y1 + uy * NODE_RADIUS)
+        (tx, ty) = (x2 - ux * NODE_RADIUS, y2 - uy * NODE_RADIUS)
+        (ex, ey) = (tx - ux * ARROW_LENGTH, ty - uy * ARROW_LENGTH) if directed else (tx, ty)
+        out.append('<path fill="none" stroke="#7b7b7b" d="M{:.2f},{:.2f}C{:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f}"/>'.format(
+            sx, sy, sx + (ex - sx) / 3, sy + (ey - sy) / 3, sx + (ex - sx) * 2 / 3, sy + (ey - sy) * 2 / 3, ex, ey))
+        if directed:
+            (nx, ny) = (-uy * ARROW_WIDTH, ux * ARROW_WIDTH)
+            (mx, my) = (tx - ux * ARROW_LENGTH * 0.6, ty - uy * ARROW_LENGTH * 0.6)
+            out.append('<polygon fill="#7b7b7b" stroke="#7b7b7b" points="{:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f} '
+                       '{:.2f},{:.2f} {:.2f},{:.2f}"/>'.format(
+                           tx, ty, ex + nx, ey + ny, mx, my, ex - nx, ey - ny, tx, ty))
+        if label is not None:
+            out.append('<text text-anchor="middle" x="{:.2f}" y="{:.2f}" font-family="{}" font-size="{:.2f}" '
+                       'fill="#c0c0c0">{}</text>'.format(
+                           (sx + ex) / 2 + EDGE_LABEL_FONT_SIZE * 0.6, (sy + ey) / 2 + EDGE_LABEL_FONT_SIZE * 0.3,
+                           FONT_FAMILY, EDGE_LABEL_FONT_SIZE, escape_xml(label)))
+        out.append('</g>')
+    out.append('</g></svg>')
+    return '\n'.join(out)
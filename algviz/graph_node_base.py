@@ -73,13 +73,14 @@ class GraphNodeBase:
         Args:
             new_neighbor: The new neighbor node to replace the old neighbor nodes.
         """
-        # Mark edge between this node and it's old_neighbor.
         bind_graphs = object.__getattribute__(self, '_bind_graphs')
         if len(bind_graphs) == 0:
             return
-        # Mark edge between this node and it's new_neighbor.
-        if new_neighbor:
-            for graph in bind_graphs:
+        for graph in bind_graphs:
+            # Update the edges between this node and it's neighbors in the next frame.
+            graph._updateNodeNeighbors(self)
+            # Add the new neighbor node into graph.
+            if new_neighbor:
                 graph.addNode(new_neighbor)
 
     def bind_graphs(self):
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+"""Manage long-lived graphviz layout processes.
+
+Calling the graphviz lib to render a graph starts a new `dot` process for
+each graph in each frame. This module keeps a pool of `dot -K<engine> -Tsvg`
+worker processes alive, writes the DOT sources into their stdin and reads
+the SVG outputs back from their stdout (one output ends with </svg>).
+
+The pool reuses the idle workers first, batches the graphs sent to one
+worker, restarts the workers which crashed, timed out or reported errors,
+and can layout several graphs concurrently. If the graphviz executable is
+not found or the workers keep crashing or timing out, the callers get None
+and should fall back to the graphviz lib. The errors reported for a bad DOT
+source only fail the batch containing it.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+import atexit
+import threading
+from os import cpu_count
+from queue import Queue, Empty
+from time import monotonic
+
+
+GRAPHVIZ_WORKER_TIMEOUT = 10    # The maximum seconds to layout one graph.
+GRAPHVIZ_MAX_FAILURES = 3       # Stop using the workers of one engine after so many crashes or timeouts.
+
+
+class GraphvizSourceError(RuntimeError):
+    """dot reported an error (eg: syntax error) of the DOT source, the worker itself is not broken.
+    """
+    pass
+
+
+class GraphvizWorker:
+    """A `dot` process which keeps reading DOT sources from stdin and writing SVG into stdout.
+    """
+
+    def __init__(self, executable, engine):
+        """
+        Args:
+            executable (str): The path of graphviz `dot` executable.
+            engine (str): The graphviz layout engine name, eg: 'dot', 'neato'.
+        """
+        import subprocess   # Imported on first use, most of the programs never start a dot process.
+        self._proc = subprocess.Popen([executable, '-K{}'.format(engine), '-Tsvg'],
+                                      stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE)
+        # The SVG strings output by dot, None means the process exited, GraphvizSourceError means dot reported an error.
+        self._outputs = Queue()
+        self._lock = threading.Lock()   # One worker can only handle one batch at the same time.
+        self._reader = threading.Thread(target=self._read_outputs_, daemon=True)
+        self._reader.start()
+        self._error_reader = threading.Thread(target=self._read_errors_, daemon=True)
+        self._error_reader.start()
+
+    def alive(self):
+        return self._proc.poll() is None
+
+    def render(self, sources, timeout=GRAPHVIZ_WORKER_TIMEOUT):
+        """Layout a batch of graphs.
+
+        Args:
+            sources (list(str)): The DOT source of each graph.
+            timeout (float): The maximum seconds to layout one graph.
+
+        Returns:
+            list(str): The SVG string of each graph.
+
+        Raises:
+            GraphvizSourceError: dot reported an error of the sources.
+            RuntimeError: The dot process crashed or timed out.
+        """
+        with self._lock:
+            self._discard_errors_()
+            data = ''.join([source.rstrip('\n') + '\n' for source in sources])
+            try:
+                self._proc.stdin.write(data.encode('utf-8'))
+                self._proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                raise RuntimeError('Graphviz worker stdin closed:{}'.format(e))
+            results = list()
+            deadline = monotonic() + timeout * len(sources)
+            for _ in sources:
+                try:
+                    svg_str = self._outputs.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    raise RuntimeError('Graphviz worker timeout.')
+                if svg_str is None:
+                    raise RuntimeError('Graphviz worker exited with code {}.'.format(self._proc.poll()))
+                if isinstance(svg_str, GraphvizSourceError):
+                    raise svg_str
+                results.append(svg_str)
+            return results
+
+    def _discard_errors_(self):
+        """Discard the errors reported after the outputs of the last batch, they don't belong to the next batch.
+        """
+        while True:
+            try:
+                output = self._outputs.get_nowait()
+            except Empty:
+                return
+            if output is None:
+                self._outputs.put(None)     # Keep the exit mark, the next batch fails on it.
+                return
+
+    def close(self):
+        if self.alive():
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=1)
+            except Exception:
+                self.kill()
+
+    def kill(self):
+        """Kill the dot process, the worker can not be used any more.
+        """
+        self._proc.kill()
+        self._proc.wait()   # Reap the process, so the worker is not alive any more.
+
+    def _read_outputs_(self):
+        lines = list()
+        for line in iter(self._proc.stdout.readline, b''):
+            lines.append(line)
+            if line.rstrip().endswith(b'</svg>'):
+                self._outputs.put(b''.join(lines).decode('utf-8'))
+                lines = list()
+        self._outputs.put(None)
+
+    def _read_errors_(self):
+        # dot reports the errors (eg: syntax error) into stderr and may output nothing for the graph,
+        # so fail the waiting batch as soon as an error appears instead of waiting for the timeout.
+        # The warnings are ignored, dot still outputs the SVG.
+        for line in iter(self._proc.stderr.readline, b''):
+            if line.lstrip().lower().startswith(b'error'):
+                message = line.decode('utf-8', 'replace').strip()
+                self._outputs.put(GraphvizSourceError('Graphviz worker error:{}'.format(message)))
+
+
+class GraphvizPool:
+    """A pool of GraphvizWorker for each layout engine.
+    """
+
+    def __init__(self, size=None, timeout=GRAPHVIZ_WORKER_TIMEOUT, executable=None):
+        """
+        Args:
+            size (int): The maximum number of workers for each engine, default is min(cpu_count, 4).
+            timeout (float): The maximum seconds to layout one graph.
+            executable (str): The path of graphviz `dot` executable, default is the `dot` found in PATH.
+        """
+        if size is None:
+            size = min(cpu_count() or 1, 4)
+        self._size = max(size, 1)
+        self._timeout = timeout
+        if executable is None:
+            from shutil import which
+            executable = which('dot')
+        self._executable = executable
+        self._workers = dict()          # Key:engine; Value:list(GraphvizWorker).
+        self._failures = dict()         # Key:engine; Value:The number of worker failures.
+        self._busy = dict()             # Key:GraphvizWorker; Value:The number of batches sent to the worker.
+        self._lock = threading.Lock()
+
+    def available(self, engine):
+        """
+        Returns:
+            bool: Whether the workers of this engine can be used.
+        """
+        return self._executable is not None and self._failures.get(engine, 0) < GRAPHVIZ_MAX_FAILURES
+
+    def render(self, source, engine='dot'):
+        """Layout one graph by the worker processes.
+
+        Args:
+            source (str): The DOT source of the graph.
+            engine (str): The graphviz layout engine name.
+
+        Returns:
+            str/None: The SVG string, or None if the workers are not available.
+        """
+        return self.render_many([(source, engine)])[0]
+
+    def render_many(self, jobs):
+        """Layout several graphs concurrently, the graphs sent to the same worker are batched.
+
+        Only one batch is rendered in the calling thread.
+
+        Args:
+            jobs (list((str, str))): The (DOT source, engine) of each graph.
+
+        Returns:
+            list(str/None): The SVG string of each graph, None for the graphs failed to layout.
+        """
+        results = [None] * len(jobs)
+        engine_jobs = dict()    # Key:engine; Value:list(job index).
+        for i in range(len(jobs)):
+            engine_jobs.setdefault(jobs[i][1], list()).append(i)
+        batches = list()        # list((GraphvizWorker, list(job index))).
+        for engine, indexes in engine_jobs.items():
+            workers = self._get_workers_(engine, len(indexes))
+            for k in range(len(workers)):
+                batches.append((workers[k], indexes[k::len(workers)]))
+        if len(batches) == 1:
+            self._render_batch_(batches[0][0], jobs, batches[0][1], results)
+            return results
+        threads = list()
+        for worker, indexes in batches:
+            thread = threading.Thread(target=self._render_batch_, args=(worker, jobs, indexes, results))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def close(self):
+        """Stop all the worker processes.
+        """
+        with self._lock:
+            for workers in self._workers.values():
+                for worker in workers:
+                    worker.close()
+            self._workers.clear()
+            self._busy.clear()
+
+    def _get_workers_(self, engine, count):
+        """Get the workers to layout count graphs of the engine.
+
+        The idle workers are used first, then new workers are started until the pool is full,
+        then the least busy workers are shared. The crashed workers are removed from the pool.
+
+        Returns:
+            list(GraphvizWorker): At most count workers, the caller should release them by _release_worker_.
+        """
+        if not self.available(engine):
+            return list()
+        with self._lock:
+            workers = [worker for worker in self._workers.get(engine, ()) if worker.alive()]
+            self._workers[engine] = workers
+            chosen = [worker for worker in workers if self._busy.get(worker, 0) == 0][:count]
+            while len(chosen) < count and len(workers) < self._size:
+                try:
+                    worker = GraphvizWorker(self._executable, engine)
+                except OSError:
+                    self._failures[engine] = GRAPHVIZ_MAX_FAILURES
+                    break
+                workers.append(worker)
+                chosen.append(worker)
+            busy_workers = sorted([worker for worker in workers if worker not in chosen],
+                                  key=lambda worker: self._busy.get(worker, 0))
+            chosen.extend(busy_workers[:count - len(chosen)])
+            for worker in chosen:
+                self._busy[worker] = self._busy.get(worker, 0) + 1
+            return chosen
+
+    def _release_worker_(self, worker):
+        with self._lock:
+            count = self._busy.get(worker, 0) - 1
+            if count > 0:
+                self._busy[worker] = count
+            else:
+                self._busy.pop(worker, None)
+
+    def _render_batch_(self, worker, jobs, indexes, results):
+        try:
+            svgs = worker.render([jobs[i][0] for i in indexes], self._timeout)
+        except RuntimeError as e:
+            # Kill this worker, its outputs may be out of order, a new worker will be started by the next request.
+            worker.kill()
+            if not isinstance(e, GraphvizSourceError):
+                engine = jobs[indexes[0]][1]
+                with self._lock:
+                    self._failures[engine] = self._failures.get(engine, 0) + 1
+            return
+        finally:
+            self._release_worker_(worker)
+        for i, svg_str in zip(indexes, svgs):
+            results[i] = svg_str
+
+
+_graphviz_pool = None
+
+
+def get_graphviz_pool():
+    """
+    Returns:
+        GraphvizPool: The global graphviz worker pool shared by all the graphs.
+    """
+    global _graphviz_pool
+    if _graphviz_pool is None:
+        _graphviz_pool = GraphvizPool()
+        atexit.register(_graphviz_pool.close)
+    return _graphviz_pool
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+"""Cache the graphviz layout results on the disk.
+
+Re-running the same notebook (or the same script in CI) layouts the same graphs again.
+This module stores the SVG output by graphviz in a local directory, the file name is
+the hash of the DOT source, the layout engine and the graphviz version. So the graphs
+with the same DOT source can skip the graphviz layout in the next runs.
+
+The cache is disabled by default, call setUpLayoutCache or set the ALGVIZ_LAYOUT_CACHE
+environment variable to the cache directory to enable it. The least recently used files
+are removed when the total size of the cache exceeds the limit.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+import os
+import threading
+from hashlib import blake2b
+
+
+LAYOUT_CACHE_ENV = 'ALGVIZ_LAYOUT_CACHE'    # The environment variable to enable the cache directory.
+LAYOUT_CACHE_MAX_SIZE = 64 * 1024 * 1024    # The default maximum bytes of the cache files.
+LAYOUT_CACHE_SUFFIX = '.svg'
+
+
+class LayoutCache:
+    """Store the graphviz output SVG of each DOT source in a directory, and evict the least recently used ones.
+    """
+
+    def __init__(self, directory, max_size=LAYOUT_CACHE_MAX_SIZE, graphviz_version=None):
+        """
+        Args:
+            directory (str): The directory to save the cache files, will be created if not exist.
+            max_size (int): The maximum bytes of all the cache files.
+            graphviz_version (str): The version of graphviz executable, get it from graphviz if None.
+        """
+        self._directory = directory
+        self._max_size = max_size
+        self._graphviz_version = graphviz_version
+        self._size = None               # The total bytes of the cache files, scanned at the first put.
+        self._lock = threading.Lock()   # The graphs may be rendered in several threads.
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, source, engine):
+        """
+        Args:
+            source (str): The DOT source of the graph.
+            engine (str): The graphviz layout engine name.
+
+        Returns:
+            str/None: The cached SVG string, None if it's not cached.
+        """
+        path = self._path_(source, engine)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                svg_str = f.read()
+            os.utime(path)  # The modify time is used to find the least recently used files.
+        except OSError:
+            return None
+        return svg_str
+
+    def put(self, source, engine, svg_str):
+        """Save the SVG output by graphviz into the cache.
+
+        Args:
+            source (str): The DOT source of the graph.
+            engine (str): The graphviz layout engine name.
+            svg_str (str): The SVG string output by graphviz.
+        """
+        path = self._path_(source, engine)
+        if path is None:
+            return
+        data = svg_str.encode('utf-8')
+        temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)     # Other processes never read a half written file.
+        except OSError:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_()[1]
+            else:
+                self._size += len(data)
+            if self._size > self._max_size:
+                self._evict_()
+
+    def clear(self):
+        """Remove all the cache files.
+        """
+        with self._lock:
+            for (path, _, _) in self._scan_()[0]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    def _path_(self, source, engine):
+        version = self._get_graphviz_version_()
+        if version is None:
+            return None
+        h = blake2b(digest_size=20)
+        for part in (version, engine, source):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return os.path.join(self._directory, h.hexdigest() + LAYOUT_CACHE_SUFFIX)
+
+    def _get_graphviz_version_(self):
+        """
+        Returns:
+            str/None: The graphviz executable version, None if graphviz is not installed.
+        """
+        if self._graphviz_version is None:
+            try:
+                from graphviz import version
+                self._graphviz_version = '.'.join([str(v) for v in version()])
+            except Exception:
+                return None
+        return self._graphviz_version
+
+    def _scan_(self):
+        """
+        Returns:
+            (list((str, float, int)), int): The (path, modify time, size) of each cache file, and the total size.
+        """
+        files, total_size = list(), 0
+        try:
+            entries = list(os.scandir(self._directory))
+        except OSError:
+            return files, total_size
+        for entry in entries:
+            if not entry.name.endswith(LAYOUT_CACHE_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.path, stat.st_mtime, stat.st_size))
+            total_size += stat.st_size
+        return files, total_size
+
+    def _evict_(self):
+        """Remove the least recently used files until the cache only takes 3/4 of the maximum size.
+        """
+        (files, total_size) = self._scan_()
+        files.sort(key=lambda f: f[1])
+        target_size = self._max_size * 3 // 4
+        for (path, _, size) in files:
+            if total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+        self._size = total_size
+
+
+_layout_cache = None
+_layout_cache_env_checked = False
+
+
+def setUpLayoutCache(path=None, max_size=LAYOUT_CACHE_MAX_SIZE):
+    """Set up the directory to cache the graphviz layout results across runs.
+
+    Args:
+        path (str): The cache directory, None to disable the layout cache.
+        max_size (int): The maximum bytes of the cache files, the least recently used files are removed first.
+    """
+    global _layout_cache, _layout_cache_env_checked
+    _layout_cache_env_checked = True
+    if path is None:
+        _layout_cache = None
+    else:
+        _layout_cache = LayoutCache(path, max_size)
+
+
+def get_layout_cache():
+    """
+    Returns:
+        LayoutCache/None: The layout cache set up by setUpLayoutCache or the ALGVIZ_LAYOUT_CACHE
+            environment variable, None if the cache is disabled.
+    """
+    global _layout_cache, _layout_cache_env_checked
+    if not _layout_cache_env_checked:
+        _layout_cache_env_checked = True
+        path = os.environ.get(LAYOUT_CACHE_ENV)
+        if path:
+            try:
+                _layout_cache = LayoutCache(path)
+            except OSError:
+                _layout_cache = None
+    return _layout_cache
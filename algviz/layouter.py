@@ -4,6 +4,19 @@
 
 The Layouter class amied to implement some interfaces in IPython.display for algviz server environment.
 
+In pipeline mode, the caller only takes the snapshots of the display objects (see sequencer.snapshot_frame),
+the graphs are layout and rendered from their snapshots and the frames are assembled into sequencers by a
+background thread, so the user algorithm can keep running while the previous frames are rendered.
+
+The exported svg animation is written frame by frame (see Layouter.write_svg), only one frame is parsed
+into the dom tree at a time, so exporting a long animation into a file doesn't hold all the frames in memory.
+A very long animation can also be split into several standalone svg files with a json manifest (see
+Layouter.write_chunks), so the players can load the chunks lazily.
+In delta mode, the unchanged elements of each display object are written only once (see Sequencer.export_delta),
+the merged elements of the exported frames are built in memory before they are written, split the animation into
+chunks to bound the memory.
+In minify mode, each frame group is minified before it's written (see svg_minify.SvgMinifier).
+
 Author: zjl9959@gmail.com
 
 License: GPLv3
@@ -12,27 +25,42 @@ License: GPLv3
 
 
 from xml.dom.minidom import Document
+import os
+import warnings
 from os import path as os_path
-from platform import uname
-from ctypes import c_int
-from ctypes import Structure as ctypes_Structure
 from math import ceil
+from io import StringIO
+from queue import Queue, Full, Empty
+from threading import Thread
 
 from algviz.utility import add_default_text_style, text_char_num, AlgvizRuntimeError, FONT_FAMILY
-from algviz.sequencer import Sequencer
+from algviz.sequencer import Sequencer, snapshot_frame
+from algviz.frame_store import FrameStore, FRAME_STORE_MEMORY_LIMIT
 from algviz.logo import get_logo, get_logo_size
+from algviz.packing_solver import solve_strip_packing as solve_builtin_strip_packing
+from algviz.svg_minify import SvgMinifier
 
 
 LOGO_SHOW_TIME = 3
 WEB_URL = 'https://zjl9959.github.io/algviz/'
 SVG_MARGIN = 5
 NAME_MARGIN = 5
+PIPELINE_MAX_TASKS = 256    # The maximum frame assembly tasks waiting in the pipeline.
+FRAMES_MARKER = 'algviz_frames'     # The placeholder comment in the dom tree where the frames are written.
+CHUNK_FRAMES = 500                  # The default number of frames in each chunk file.
+CHUNK_FILE_NAME = 'chunk_{:04d}.svg'
+MANIFEST_FILE_NAME = 'manifest.json'
 
 
 class Layouter:
-    def __init__(self, vid):
+    def __init__(self, vid, pipeline=False, frame_memory=FRAME_STORE_MEMORY_LIMIT):
         self._vid = vid                     # Identify different layouter.
+        self._frame_store = FrameStore(frame_memory)    # The compressed frames of all the sequencers.
         self._display_id2seq = dict()       # Key:display_id; Value:Sequencer
+        self._display_id2obj = dict()       # Key:display_id; Value:display object, known before its Sequencer is created.
+        self._pipeline = None               # The _FramePipeline to assemble frames in background.
+        if pipeline:
+            self._pipeline = _FramePipeline()
         self._display_id2name = dict()      # Key:display_id; Value:(ObjNameString, title_font)
         self._delays = list()               # Record the delay time for each frame.
         self._next_seq_id = 0               # The unique id for next sequencer.
@@ -52,8 +80,11 @@ class Layouter:
         self._svg_height = logo_size[1]
         self._max_width = 800
         self._bg_color = None
+        self._delta = False                 # Export the delta encoded frames instead of the full copy of each frame.
+        self._minify = None                 # The precision to round the numbers in the minified svg, None to not minify.
         self._svg_str = None
         self._next_export_start = 0
+        self._packing = None                # (strip width, rects, placements) of the last packing solution.
         self._update_svg_size_()
 
     def solve_layout(self, strip_width, start_frame, end_frame):
@@ -62,14 +93,11 @@ class Layouter:
             dict(str, (float, float)): Key:display_id; Value:(x_offset, y_offset).
         """
         width, height = 0, 0
-        rects_num = len(self._display_id2seq)
-        RectArrayType = RectType * rects_num
-        rects_data = RectArrayType()
+        rects = list()      # The (width, height) of each display object.
         id_map = dict()
         next_id = 0
         max_rect_width = 0
         for did, seq in self._display_id2seq.items():
-            rects_data[next_id].id = next_id
             id_map[next_id] = did
             seq_size = seq.size(start_frame, end_frame)
             title_font = 0
@@ -81,31 +109,29 @@ class Layouter:
                     temp_title_font = seq_size[0] * 1.2 / title_char_num
                     title_font = ceil(min(12, temp_title_font, seq_size[0] * 0.8))
                 self._display_id2name[did][1] = title_font
-            rects_data[next_id].w = seq_size[0] + SVG_MARGIN
-            rects_data[next_id].h = ceil(seq_size[1] + title_font * 1.5 + SVG_MARGIN)
-            max_rect_width = max(max_rect_width, rects_data[next_id].w)
+            rects.append((seq_size[0] + SVG_MARGIN, ceil(seq_size[1] + title_font * 1.5 + SVG_MARGIN)))
+            max_rect_width = max(max_rect_width, rects[-1][0])
             next_id = next_id + 1
-        strip_w = c_int(max(strip_width, max_rect_width + 50))
-        rect_num_c = c_int(rects_num)
-        try:
-            packing_solver = load_dll()
-            packing_solver.solve_strip_packing(strip_w, rect_num_c, rects_data)
-        except Exception as e:
-            print('Error when call packing solver:', e)
-            return None
+        strip_w = max(strip_width, max_rect_width + 50)
+        if self._packing is not None and self._packing[0] == strip_w and self._packing[1] == rects:
+            # The size of the display objects are not changed, reuse the last packing solution.
+            placements = self._packing[2]
+        else:
+            placements = solve_strip_packing(strip_w, rects)
+            self._packing = (strip_w, rects, placements)
         display_offsets = dict()
-        for i in range(len(rects_data)):
-            did = id_map[rects_data[i].id]
+        for (rect_id, x, y, w, h) in placements:
+            did = id_map[rect_id]
             title_font = 0
             if did in self._display_id2name:
                 title_font = self._display_id2name[did][1]
             display_offsets[did] = (
-                rects_data[i].x + SVG_MARGIN,
-                rects_data[i].y + title_font * 1.5 + SVG_MARGIN,
-                rects_data[i].w, rects_data[i].h
+                x + SVG_MARGIN,
+                y + title_font * 1.5 + SVG_MARGIN,
+                w, h
             )
-            width = max(width, rects_data[i].x + rects_data[i].w)
-            height = max(height, rects_data[i].y + rects_data[i].h + title_font * 1.5)
+            width = max(width, x + w)
+            height = max(height, y + h + title_font * 1.5)
         if width > 0 and height > 0:
             self._svg_width = width + SVG_MARGIN
             self._svg_height = height + SVG_MARGIN
@@ -117,62 +143,104 @@ class Layouter:
         self._svg.setAttribute('height', '{:.0f}pt'.format(self._svg_height))
         self._svg.setAttribute('viewBox', '0.00 0.00 {:.2f} {:.2f}'.format(self._svg_width, self._svg_height))
 
-    def display(self, display_obj, display_id):
+    def display(self, display_obj, display_id, rendered=None):
         from algviz.visual import _NameDisplay
         if isinstance(display_obj, _NameDisplay):
             title = display_obj.__repr__()
             if len(title) > 1:
                 display_id = display_id.replace('algviz_', '')
                 self._display_id2name[display_id] = [title, 0]     # Record title string and font size.
-        elif display_id not in self._display_id2seq:
-            seq = Sequencer(self._vid, display_obj, self._dom, self._next_seq_id)
-            for i in range(len(self._delays)):
-                seq.update(i, skip=True)    # Skip none displayed frames.
-            seq.update(len(self._delays))
+        elif display_id not in self._display_id2obj:
+            self._display_id2obj[display_id] = display_obj
             display_id = display_id.replace('algviz', '')
-            self._display_id2seq[display_id] = seq
+            self._run_(self._add_sequencer_, display_obj, rendered, display_id, len(self._delays), self._next_seq_id)
             self._next_seq_id += 1
 
-    def update_display(self, display_obj, display_id):
-        display_id = display_id.replace('algviz', '')
-        if display_id in self._display_id2seq:
-            seq = self._display_id2seq[display_id]
-            if seq.same_as(display_obj):
-                seq.update(len(self._delays))
+    def update_display(self, display_obj, display_id, rendered=None):
+        if self._display_id2obj.get(display_id) is display_obj:
+            display_id = display_id.replace('algviz', '')
+            self._run_(self._update_sequencer_, display_obj, rendered, display_id, len(self._delays))
 
     def next_frame(self, delay):
         self._delays.append(delay)
 
+    def wait_frames(self):
+        """Wait until all the displayed frames are assembled.
+
+        Raises:
+            AlgvizRuntimeError: Failed to assemble the frames in pipeline mode.
+        """
+        if self._pipeline is not None:
+            self._pipeline.join()
+
+    def close(self, wait=True):
+        """Stop the pipeline thread and release the frames saved in the temporary file.
+
+        The layouter can't record or export the frames after it's closed.
+
+        Args:
+            wait (bool): Wait until the frames submitted to the pipeline are assembled, otherwise the pipeline
+                thread may still write the frames, so the temporary file is left to the garbage collector.
+        """
+        if self._pipeline is not None:
+            self._pipeline.close(wait)
+            self._pipeline = None
+        if wait:
+            self._frame_store.close()
+
+    def _run_(self, task, display_obj, rendered, *args):
+        """Run the frame assembly task now, or submit it to the pipeline.
+
+        Args:
+            rendered ((int, int, str)): The frame already rendered from display_obj by render_frame,
+                None if it's not rendered yet.
+        """
+        if self._pipeline is None:
+            task(display_obj, rendered, *args)
+        elif rendered is not None:
+            self._pipeline.submit(task, display_obj, rendered, *args)
+        else:
+            # Only take the snapshot now, the display object will be changed by the user algorithm later.
+            snapshot = snapshot_frame(display_obj)
+            self._pipeline.submit(_render_snapshot_task_, task, display_obj, snapshot, *args)
+
+    def _add_sequencer_(self, display_obj, rendered, display_id, frame, seq_id):
+        seq = Sequencer(self._vid, display_obj, self._dom, seq_id, self._frame_store, frame)
+        seq.update(frame, rendered=rendered)
+        self._display_id2seq[display_id] = seq
+
+    def _update_sequencer_(self, display_obj, rendered, display_id, frame):
+        self._display_id2seq[display_id].update(frame, rendered=rendered)
+
     def _add_logo_(self, start_frame, end_frame):
         logo = get_logo(self._svg_width, self._svg_height)
-        seq = Sequencer(self._vid, logo, self._dom, self._next_seq_id)
-        for i in range(end_frame):
-            seq.update(i, skip=True)
+        seq = Sequencer(self._vid, logo, self._dom, self._next_seq_id, self._frame_store, end_frame)
         seq.update(end_frame)
         offset = (logo.offset_x, logo.offset_y)
         obj_node = seq.export_logo(offset, self._delays, start_frame, end_frame)
         self._link.appendChild(obj_node)
 
-    def _add_backgrounds_(self, display_offsets, start_frame, end_frame):
+    def _add_backgrounds_(self, display_offsets, start_frame, end_frame, logo=True):
         bg_group = self._dom.createElement('g')
-        # Add disappear animate.
-        bg_disappear = self._dom.createElement('animate')
-        bg_disappear.setAttribute('attributeName', 'opacity')
-        bg_disappear.setAttribute('begin', 'V{}_{}S{}.begin'.format(self._vid, self._next_seq_id, end_frame))
-        bg_disappear.setAttribute('from', '1')
-        bg_disappear.setAttribute('to', '0')
-        bg_disappear.setAttribute('dur', '0.01s')
-        bg_disappear.setAttribute('fill', 'freeze')
-        bg_group.appendChild(bg_disappear)
-        # Add appear animate.
-        bg_appear = self._dom.createElement('animate')
-        bg_appear.setAttribute('attributeName', 'opacity')
-        bg_appear.setAttribute('from', '0')
-        bg_appear.setAttribute('to', '1')
-        bg_appear.setAttribute('begin', 'V{}_{}E{}.end'.format(self._vid, self._next_seq_id, end_frame))
-        bg_appear.setAttribute('dur', '0.01s')
-        bg_appear.setAttribute('fill', 'freeze')
-        bg_group.appendChild(bg_appear)
+        if logo:   # The backgrounds are hidden when the logo is displayed.
+            # Add disappear animate.
+            bg_disappear = self._dom.createElement('animate')
+            bg_disappear.setAttribute('attributeName', 'opacity')
+            bg_disappear.setAttribute('begin', 'V{}_{}S{}.begin'.format(self._vid, self._next_seq_id, end_frame))
+            bg_disappear.setAttribute('from', '1')
+            bg_disappear.setAttribute('to', '0')
+            bg_disappear.setAttribute('dur', '0.01s')
+            bg_disappear.setAttribute('fill', 'freeze')
+            bg_group.appendChild(bg_disappear)
+            # Add appear animate.
+            bg_appear = self._dom.createElement('animate')
+            bg_appear.setAttribute('attributeName', 'opacity')
+            bg_appear.setAttribute('from', '0')
+            bg_appear.setAttribute('to', '1')
+            bg_appear.setAttribute('begin', 'V{}_{}E{}.end'.format(self._vid, self._next_seq_id, end_frame))
+            bg_appear.setAttribute('dur', '0.01s')
+            bg_appear.setAttribute('fill', 'freeze')
+            bg_group.appendChild(bg_appear)
         # Add display object title name.
         for display_id, title_info in self._display_id2name.items():
             offset = display_offsets[display_id]
@@ -210,12 +278,88 @@ class Layouter:
         self._link.appendChild(bg_group)
 
     def _repr_svg_(self):
-        self._svg_str = self.export(self._max_width,
-                                    self._next_export_start, None)
-        self._next_export_start = len(self._delays)
+        out = StringIO()
+        self._svg_str = None
+        if self.write_next_svg(out):
+            self._svg_str = out.getvalue()
         return self._svg_str
 
+    def write_next_svg(self, out):
+        """Write the svg animation of the frames recorded since the last export into out.
+
+        Args:
+            out (file): The text file object (or any object with write method) to write the svg into.
+
+        Returns:
+            dict/None: The info of the svg animation, None if failed to layout the frames.
+        """
+        self.wait_frames()
+        info = self.write_svg(out, self._max_width, self._next_export_start, None)
+        self._next_export_start = len(self._delays)
+        return info
+
+    def write_chunks(self, directory, chunk_frames=CHUNK_FRAMES):
+        """Split the frames recorded since the last export into several svg files, and write a json manifest.
+
+        Each chunk file is a standalone svg animation with its own timeline and layout, the logo is only
+        displayed at the end of the last chunk. The manifest lists the info of each chunk, which is the
+        same as the info written in the comment of the chunk file, along with its file name, first frame
+        and file size.
+
+        Args:
+            directory (str): The directory to write the chunk files and the manifest, will be created if not exist.
+            chunk_frames (int): The maximum number of frames in each chunk file.
+
+        Returns:
+            dict/None: The manifest, None if failed to layout the frames.
+        """
+        self.wait_frames()
+        start_frame, end_frame = self._next_export_start, len(self._delays)
+        os.makedirs(directory, exist_ok=True)
+        chunks = list()
+        for chunk_start in range(start_frame, end_frame, chunk_frames):
+            chunk_end = min(chunk_start + chunk_frames, end_frame)
+            file_name = CHUNK_FILE_NAME.format(len(chunks))
+            file_path = os_path.join(directory, file_name)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                info = self.write_svg(f, self._max_width, chunk_start, chunk_end, logo=(chunk_end == end_frame))
+            if info is None:
+                return None
+            chunk = {'file': file_name, 'start_frame': chunk_start, 'bytes': os_path.getsize(file_path)}
+            chunk.update(info)
+            chunks.append(chunk)
+        self._next_export_start = end_frame
+        manifest = {
+            'frames': end_frame - start_frame,
+            'duration': sum([chunk['duration'] for chunk in chunks]),
+            'chunks': chunks
+        }
+        import json
+        with open(os_path.join(directory, MANIFEST_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
     def export(self, max_width, start_frame, end_frame):
+        out = StringIO()
+        if not self.write_svg(out, max_width, start_frame, end_frame):
+            return
+        return out.getvalue()
+
+    def write_svg(self, out, max_width, start_frame, end_frame, logo=True):
+        """Write the svg animation into out incrementally.
+
+        The svg header, each frame group and the trailing logo, backgrounds and description are written
+        one after another, every frame group is released after it's written. In delta mode, the merged
+        elements of each display object are built in memory before they are written, see Sequencer.export_delta.
+
+        Args:
+            out (file): The text file object (or any object with write method) to write the svg into.
+            logo (bool): Whether to display the logo after the last frame.
+
+        Returns:
+            dict/None: The info of the svg animation (also written into the description comment),
+                None if failed to layout the frames.
+        """
         # Clear child elements in link.
         children = [child for child in self._link.childNodes]
         for child in children:
@@ -228,40 +372,134 @@ class Layouter:
                                    'background-color: {};'.format(self._bg_color))
         display_offsets = self.solve_layout(max_width, start_frame, end_frame)
         if display_offsets is None:
-            return
-        self._delays.insert(end_frame, LOGO_SHOW_TIME)
-        for display_id, seq in self._display_id2seq.items():
-            offset = display_offsets[display_id]
-            obj_nodes = seq.export(offset, self._delays, start_frame, end_frame, True)
+            return None
+        # The frames are written at the position of the marker, split the dom tree into head and tail by it.
+        marker = self._dom.createComment(FRAMES_MARKER)
+        self._link.appendChild(marker)
+        out.write(self._dom.toxml().split(marker.toxml())[0])
+        if logo:
+            self._delays.insert(end_frame, LOGO_SHOW_TIME)
+        minifier = None
+        if self._minify is not None:
+            minifier = SvgMinifier(self._minify)
+        comment, style = None, None
+        try:
+            for display_id, seq in self._display_id2seq.items():
+                offset = display_offsets[display_id]
+                if self._delta:
+                    frame_nodes = seq.export_delta(offset, self._delays, start_frame, end_frame, logo)
+                else:
+                    frame_nodes = (g_frame for (_, g_frame) in
+                                   seq.export_frames(offset, self._delays, start_frame, end_frame, logo))
+                for node in frame_nodes:
+                    if minifier is not None:
+                        minifier.minify(node)
+                    out.write(node.toxml())
+                    node.unlink()
+            if logo:
+                self._add_logo_(start_frame, end_frame)
+            self._add_backgrounds_(display_offsets, start_frame, end_frame, logo)
+            if minifier is not None:
+                tail_nodes = self._link.childNodes[self._link.childNodes.index(marker) + 1:]
+                for node in tail_nodes:
+                    minifier.minify(node)
+                # The CSS rules are known after all the frames are minified, so they are written at the end.
+                style = minifier.style_element(self._dom)
+                if style is not None:
+                    self._svg.appendChild(style)
+            duration = 0
             for i in range(start_frame, end_frame):
-                self._link.appendChild(obj_nodes[i])
-        self._add_logo_(start_frame, end_frame)
-        self._add_backgrounds_(display_offsets, start_frame, end_frame)
-        duration = 0
-        for i in range(start_frame, end_frame):
-            duration += self._delays[i]
-        duration += LOGO_SHOW_TIME
-        info = {
-            "size": (self._svg_width, self._svg_height),
-            "duration": duration,
-            "frames": end_frame - start_frame,
-            "layout": self.layout_info
-        }
-        # Add description into svg.
-        comment = self._dom.createComment(str(info))
-        self._svg.appendChild(comment)
-        self._delays.pop()  # Pop logo show time.
-        return self._dom.toxml()
-
-
-class RectType(ctypes_Structure):
-    _fields_ = [
-        ('id', c_int),
-        ('w', c_int),
-        ('h', c_int),
-        ('x', c_int),
-        ('y', c_int)
-    ]
+                duration += self._delays[i]
+            if logo:
+                duration += LOGO_SHOW_TIME
+            info = {
+                "size": (self._svg_width, self._svg_height),
+                "duration": duration,
+                "frames": end_frame - start_frame,
+                "delays": self._delays[start_frame:end_frame + 1] if logo else self._delays[start_frame:end_frame],
+                "layout": self.layout_info
+            }
+            # Add description into svg.
+            comment = self._dom.createComment(str(info))
+            self._svg.appendChild(comment)
+            out.write(self._dom.toxml().split(marker.toxml())[1])
+        finally:
+            if logo:
+                self._delays.pop(end_frame)     # Pop logo show time.
+            self._link.removeChild(marker)
+            if comment is not None:
+                self._svg.removeChild(comment)  # The next export writes its own description.
+            if style is not None:
+                self._svg.removeChild(style)
+        return info
+
+
+def _render_snapshot_task_(task, display_obj, snapshot, *args):
+    """Render the frame from the snapshot taken by snapshot_frame, then run the frame assembly task with it.
+    """
+    task(display_obj, snapshot(), *args)
+
+
+class _FramePipeline:
+    """Run the frame assembly tasks of one layouter in order in a background thread.
+    """
+
+    def __init__(self, max_tasks=PIPELINE_MAX_TASKS):
+        self._tasks = Queue(max_tasks)  # The (task, args) to run, the producer blocks when the queue is full.
+        self._error = None              # The first exception raised by the tasks.
+        self._closed = False            # No more tasks are accepted, the worker exits when the queue is drained.
+        self._worker = Thread(target=self._run_tasks_, daemon=True)
+        self._worker.start()
+
+    def submit(self, task, *args):
+        if self._closed:
+            raise AlgvizRuntimeError('Failed to assemble the animation frames:the pipeline is closed.')
+        self._raise_error_()
+        self._tasks.put((task, args))
+
+    def join(self):
+        self._tasks.join()
+        self._raise_error_()
+
+    def close(self, wait=True):
+        """Stop the worker thread after the submitted tasks are run.
+
+        Args:
+            wait (bool): Block until the worker thread exits, otherwise it exits in background.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if wait:
+            self._tasks.put(None)
+            self._worker.join()
+            return
+        try:
+            self._tasks.put_nowait(None)
+        except Full:
+            pass    # The worker sees the closed flag once the queue is drained.
+
+    def _raise_error_(self):
+        if self._error is not None:
+            raise AlgvizRuntimeError('Failed to assemble the animation frames:{}'.format(self._error))
+
+    def _run_tasks_(self):
+        while True:
+            try:
+                item = self._tasks.get(block=not self._closed)
+            except Empty:
+                return
+            if item is None:
+                self._tasks.task_done()
+                return
+            (task, args) = item
+            try:
+                if self._error is None:     # The frames after a failed one are dropped.
+                    task(*args)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._tasks.task_done()
 
 
 # Dll releated.
@@ -277,7 +515,79 @@ LIB_PATH = {
 }
 
 
+def solve_strip_packing(strip_width, rects):
+    """Place the rectangles into a strip with the native packing solver,
+    fall back to the built-in packing solver if the native one is not available.
+
+    Args:
+        strip_width (int): The width of the strip.
+        rects (list((int, int))): The (width, height) of each rectangle.
+
+    Returns:
+        list((int, int, int, int, int)): The (index, x, y, width, height) of each placed rectangle.
+    """
+    try:
+        native_solver = load_dll()
+    except AlgvizRuntimeError:
+        return solve_builtin_strip_packing(strip_width, rects)
+    from ctypes import c_int
+    RectArrayType = _rect_type_() * len(rects)
+    rects_data = RectArrayType()
+    for i in range(len(rects)):
+        rects_data[i].id = i
+        rects_data[i].w = rects[i][0]
+        rects_data[i].h = rects[i][1]
+    try:
+        native_solver.solve_strip_packing(c_int(strip_width), c_int(len(rects)), rects_data)
+    except Exception as e:
+        warnings.warn('Failed to call the packing solver, use the built-in one instead:{}'.format(e), RuntimeWarning)
+        return solve_builtin_strip_packing(strip_width, rects)
+    return [(rect.id, rect.x, rect.y, rect.w, rect.h) for rect in rects_data]
+
+
+_packing_solver = None          # The packing solver library loaded by load_dll.
+_packing_solver_error = None    # The error when loading the packing solver library, it's not loaded again.
+_rect_type = None               # The ctypes structure of the rectangles passed to the packing solver library.
+
+
+def _rect_type_():
+    """ctypes is imported on first use, so the structure is defined when the packing solver is called.
+    """
+    global _rect_type
+    if _rect_type is None:
+        from ctypes import c_int, Structure
+
+        class RectType(Structure):
+            _fields_ = [
+                ('id', c_int),
+                ('w', c_int),
+                ('h', c_int),
+                ('x', c_int),
+                ('y', c_int)
+            ]
+        _rect_type = RectType
+    return _rect_type
+
+
 def load_dll():
+    """Load the native packing solver library once, the loaded library is reused by the next calls.
+
+    Raises:
+        AlgvizRuntimeError: The library is not available on this platform or failed to load.
+    """
+    global _packing_solver, _packing_solver_error
+    if _packing_solver is None and _packing_solver_error is None:
+        try:
+            _packing_solver = _load_dll_()
+        except Exception as e:
+            _packing_solver_error = e
+    if _packing_solver is None:
+        raise AlgvizRuntimeError('Failed to load the packing solver:{}'.format(_packing_solver_error))
+    return _packing_solver
+
+
+def _load_dll_():
+    from platform import uname
     platform_info = uname()
     sys = platform_info.system
     machine = platform_info.machine.lower()
@@ -303,11 +613,3 @@ def load_dll_win(dll_path):
 def load_dll_linux(dll_path):
     from ctypes import cdll
     return cdll.LoadLibrary(dll_path)
-
-
-def is_layout_supported():
-    try:
-        load_dll()
-        return True
-    except Exception:
-        return False
@@ -9,8 +9,7 @@ License: GPLv3
 """
 
 from algviz.utility import get_text_width, FONT_FAMILY
-
-from xml.dom.minidom import Document
+from algviz.svg_element import SvgDocument
 
 
 LOG_OFFSET_X = 5
@@ -34,7 +33,7 @@ class Logger():
         if font_size > 1 and font_size <= 16:
             self._font_size = font_size
         self._logs = list()
-        self._dom = Document()
+        self._dom = SvgDocument()
         self._svg = self._dom.createElement('svg')
         self._svg.setAttribute('xmlns', 'http://www.w3.org/2000/svg')
         self._dom.appendChild(self._svg)
@@ -70,6 +69,18 @@ class Logger():
         self._logs.clear()
 
     def _repr_svg_(self):
+        self._update_logs_()
+        return self._dom.toxml()
+
+    def _render_frame_(self):
+        """
+        Returns:
+            (int, int, str): The width, height and content of current logger frame, used by the layouter.
+        """
+        self._update_logs_()
+        return self._dom.frameContent()
+
+    def _update_logs_(self):
         svg_width = 0
         for child in self._svg.childNodes:
             self._svg.removeChild(child)
@@ -80,8 +91,8 @@ class Logger():
             log = self._logs[i]
             txt = self._dom.createElement('text')
             txt.setAttribute('x', '{}'.format(LOG_OFFSET_X))
-            txt.setAttribute('y', '{:.2f}'.format(self._font_size * (i * 1.2 + 1)))
-            txt.setAttribute('font-size', '{:.2f}'.format(self._font_size))
+            txt.setAttribute('y', self._font_size * (i * 1.2 + 1))
+            txt.setAttribute('font-size', self._font_size)
             if self._text_color is not None:
                 txt.setAttribute('fill', self._text_color)
             txt.setAttribute('font-family', FONT_FAMILY)
@@ -95,4 +106,3 @@ class Logger():
         self._svg.setAttribute('width', '{:.0f}pt'.format(svg_width))
         self._svg.setAttribute('height', '{:.0f}pt'.format(svg_height))
         self._svg.setAttribute('viewBox', '0.00 0.00 {:.2f} {:.2f}'.format(svg_width, svg_height))
-        return self._dom.toxml()
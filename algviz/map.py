@@ -173,3 +173,11 @@ class Map():
     def _repr_svg_(self):
         self._graph._delay = self._delay
         return self._graph._repr_svg_()
+
+    def _render_frame_(self):
+        self._graph._delay = self._delay
+        return self._graph._render_frame_()
+
+    def _snapshot_frame_(self):
+        self._graph._delay = self._delay
+        return self._graph._snapshot_frame_()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""The built-in strip packing solver used when the native packing solver library can't be loaded.
+
+It places the rectangles with the skyline bottom-left heuristic: the rectangles are placed one by
+one, and each one is put at the position where its top is the lowest on the skyline (the top outline
+of the placed rectangles). The rectangles are placed in several orders (by height, width and area),
+and the lowest packing is chosen. The result is not as tight as the native solver, but it's fast and
+works on all the platforms.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+
+# The orders to place the rectangles, the higher (wider, larger) rectangles are placed first.
+PACKING_ORDERS = (
+    lambda rect: (-rect[1], -rect[0]),
+    lambda rect: (-rect[0], -rect[1]),
+    lambda rect: (-rect[0] * rect[1], -rect[1]),
+)
+
+
+def solve_strip_packing(strip_width, rects):
+    """Place the rectangles into a strip with the skyline bottom-left heuristic.
+
+    Args:
+        strip_width (int): The width of the strip, the rectangles wider than it are placed at x=0.
+        rects (list((int, int))): The (width, height) of each rectangle.
+
+    Returns:
+        list((int, int, int, int, int)): The (index, x, y, width, height) of each placed rectangle.
+    """
+    best_placements, best_height = None, None
+    for key in PACKING_ORDERS:
+        order = sorted(range(len(rects)), key=lambda i: key(rects[i]))
+        (placements, height) = _pack_in_order_(strip_width, rects, order)
+        if best_height is None or height < best_height:
+            best_placements, best_height = placements, height
+    best_placements.sort()
+    return best_placements
+
+
+def _pack_in_order_(strip_width, rects, order):
+    """
+    Returns:
+        (list((int, int, int, int, int)), int): The placed rectangles and the height of the packing.
+    """
+    skyline = [[0, 0, strip_width]]     # list([x, y, width]) of the skyline segments from left to right.
+    placements = list()
+    height = 0
+    for i in order:
+        (w, h) = rects[i]
+        (index, x, y) = _find_position_(skyline, strip_width, w)
+        _add_rect_into_skyline_(skyline, index, x, y + h, w)
+        placements.append((i, x, y, w, h))
+        height = max(height, y + h)
+    return (placements, height)
+
+
+def _find_position_(skyline, strip_width, w):
+    """Find the lowest (then leftmost) position to place a rectangle with width w on the skyline.
+
+    Returns:
+        (int, int, int): The index of the first skyline segment under the rectangle, and the x, y of the rectangle.
+    """
+    best = None
+    for i in range(len(skyline)):
+        x = skyline[i][0]
+        if x + w > strip_width and x > 0:
+            break
+        y, j, covered = 0, i, 0
+        while covered < w and j < len(skyline):
+            y = max(y, skyline[j][1])
+            covered = skyline[j][0] + skyline[j][2] - x
+            j += 1
+        if best is None or y < best[2]:
+            best = (i, x, y)
+    return best
+
+
+def _add_rect_into_skyline_(skyline, index, x, top, w):
+    """Raise the skyline segments under the rectangle placed at x to its top.
+    """
+    end = x + w
+    j = index
+    while j < len(skyline) and skyline[j][0] < end:
+        j += 1
+    # The segment partly covered by the rectangle keeps the part on the right.
+    last = skyline[j - 1]
+    rest = None
+    if last[0] + last[2] > end:
+        rest = [end, last[1], last[0] + last[2] - end]
+    new_segments = [[x, top, w]]
+    if rest is not None:
+        new_segments.append(rest)
+    skyline[index:j] = new_segments
+    # Merge the adjacent segments with the same height.
+    k = max(index - 1, 0)
+    while k < len(skyline) - 1 and k <= index + 1:
+        if skyline[k][1] == skyline[k + 1][1]:
+            skyline[k][2] += skyline[k + 1][2]
+            del skyline[k + 1]
+        else:
+            k += 1
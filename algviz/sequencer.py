@@ -2,6 +2,13 @@
 
 """Sequencer can sequence different svg animation frames.
 
+The frames are saved in the FrameStore as the serialized <g> and <svg> children of the
+SVG rendered by the display object, they are parsed into xml nodes only when they are exported.
+
+In delta mode (see Sequencer.export_delta), the elements which are not changed between the adjacent
+frames are exported only once, and shown/hidden by <set> animations when the frames change. The merged
+elements are only known after the last frame is merged, so they are all kept in memory until exported.
+
 Author: zjl9959@gmail.com
 
 License: GPLv3
@@ -9,76 +16,71 @@ License: GPLv3
 """
 
 
-from xml.dom.minidom import parseString, Document
+from difflib import SequenceMatcher
+from xml.dom.minidom import parseString
+from xml.parsers.expat import ExpatError
+
+
+DELTA_CONTAINER_TAGS = ('g', 'svg')     # The elements whose children are merged one by one in delta mode.
+DELTA_ANIMATE_TAGS = ('animate', 'animateMotion', 'set')    # The elements which are not shown/hidden in delta mode.
 
 
 class Sequencer:
-    def __init__(self, vid, display_obj, root_dom, uid):
+    def __init__(self, vid, display_obj, root_dom, uid, frame_store, first_frame=0):
+        """
+        Args:
+            frame_store (FrameStore): The store to save the frames content, can be shared by several sequencers.
+            first_frame (int): The first frame of this display object, the frames before it are not displayed.
+        """
         self._vid = vid                     # This id bound with the Visualizer and Layouter.
         self._display_obj = display_obj     # The data object to be displayed.
         self._root_dom = root_dom           # The root dom Document to contain all the new created nodes.
         self._uid = uid                     # Unique id for this sequencer.
-        self._size = list()                 # The svg size at each frame.
-        self._frames = list()               # list(xmldom.Element) frame group node.
+        self._frame_store = frame_store     # The FrameStore to save the content of each frame.
+        self._first_frame = first_frame     # The number of not displayed frames before the first frame.
+        self._frames = list()               # list((frame store key, width, height)) of each frame since first_frame.
+        self._widths = _RangeMax()          # The widths of the frames to query the maximum width of a frame range.
+        self._heights = _RangeMax()         # The heights of the frames to query the maximum height of a frame range.
 
     def size(self, start_frame, end_frame):
         """Return the maximum size of all the svg frames.
         Returns:
             (int, int): (max_width, max_height).
         """
-        max_width, max_height = 0, 0
-        for i in range(start_frame, end_frame):
-            (width, height) = self._size[i]
-            if max_width < width:
-                max_width = width
-            if max_height < height:
-                max_height = height
-        return (max_width, max_height)
+        start = max(start_frame, self._first_frame) - self._first_frame
+        end = min(end_frame, self._frame_count_()) - self._first_frame
+        return (self._widths.query(start, end), self._heights.query(start, end))
 
     def same_as(self, display_obj):
         """Check if the display_obj is the same as sequencer manager's obj.
         """
         return id(self._display_obj) == id(display_obj)
 
-    def update(self, frame_count, skip=False):
+    def update(self, frame_count, rendered=None):
         """Update the svg content of current frame.
 
-        This function just cache the svg nodes of display_obj,
+        This function just cache the frame content of display_obj,
         But will not modify the content.
 
+        Args:
+            rendered ((int, int, str)): The frame already rendered from display_obj by render_frame,
+                render display_obj if it's None.
         """
-        # Wrap the svg's child node with a frame group.
-        g_frame = self._root_dom.createElement('g')
-        g_frame.setAttribute('class', 'frame')
-        g_frame.setAttribute('style', 'opacity:0')
-        if not skip:
-            if len(self._frames) != frame_count:
-                raise Exception("Sequence:{}.update frame count({}) error!".format(self, frame_count))
-            # Get svg xmldom tree from display_obj.
-            dom = parseString(self._display_obj._repr_svg_())
-            if type(dom) != Document:
-                return
-            svgs = dom.getElementsByTagName('svg')
-            if len(svgs) == 0:
-                return
-            svg = svgs[0]
-            # Try update svg max size.
-            width = int(svg.getAttribute('width')[0:-2])
-            height = int(svg.getAttribute('height')[0:-2])
-            self._size.append((width, height))
-            cache_child_nodes = list()
-            for child in svg.childNodes:
-                if hasattr(child, 'tagName') and (child.tagName == 'g' or child.tagName == 'svg'):
-                    cache_child_nodes.append(child)
-            for child in cache_child_nodes:
-                g_frame.appendChild(child)
-        else:
-            self._size.append((0, 0))
-        # Cache the g_frame node.
-        self._frames.append(g_frame)
+        if self._frame_count_() != frame_count:
+            raise Exception("Sequence:{}.update frame count({}) error!".format(self, frame_count))
+        if rendered is None:
+            rendered = render_frame(self._display_obj)
+        if rendered is None:
+            return
+        (width, height, content) = rendered
+        # Cache the frame content, it will be parsed when exported.
+        key = self._frame_store.put(content)
+        self._frames.append((key, width, height))
+        self._widths.append(width)
+        self._heights.append(height)
 
-    def export(self, pos_offset, frame_delays, start_frame, end_frame, logo):
-        """Return the merged dom tree which contain all the svg frames.
+    def export_frames(self, pos_offset, frame_delays, start_frame, end_frame, logo):
+        """Generate the frame groups of all the svg frames one by one.
 
         This will traverse all the <g>...</g> nodes in svg and update all
         the 'x' and 'y' attributes by pos_offset. At the same time, all
@@ -88,14 +90,15 @@ class Sequencer:
         Args:
             pos_offset (float, float): The x and y position's offset of the nodes.
 
-        Returns:
-            dict_values(xmldom.Element): The svg nodes for all the frames.
+        Yields:
+            (int, xmldom.Element): The frame index and the svg node of the frame, the frames are parsed
+                only when they are generated, so the caller can release each frame after it's written.
 
         """
         start_frame = max(start_frame, 0)
-        end_frame = min(end_frame, len(self._frames))
+        end_frame = min(end_frame, self._frame_count_())
         for frame in range(start_frame, end_frame):
-            g_frame = self._frames[frame]
+            g_frame = self._load_frame_(frame)
             g_frame.setAttribute('transform', 'translate({},{})'.format(pos_offset[0], pos_offset[1]))
             self._update_gframe_animates_(g_frame, frame)
             animate_appear = None
@@ -109,13 +112,50 @@ class Sequencer:
             g_frame.appendChild(animate_appear)
             animate_disappear = self._create_frame_disappear_animate_(frame, frame_delays[frame])
             g_frame.appendChild(animate_disappear)
-        return self._frames
+            yield (frame, g_frame)
+
+    def export_delta(self, pos_offset, frame_delays, start_frame, end_frame, logo):
+        """Return the delta encoded svg frames.
+
+        The same elements in the adjacent frames are merged into one element, which is shown by a <set>
+        animation when its first frame begins and hidden when its last frame ends. The frame groups
+        only keep the appear and disappear animations, their begin/end events drive the <set> animations.
+
+        Unlike export_frames, the frames are not released one by one: the merged elements of all the frames
+        are built in memory before they are returned, the memory grows with the number of the different
+        elements (which is the number of changes) in the frame range.
+
+        Args:
+            pos_offset (float, float): The x and y position's offset of the nodes.
+
+        Returns:
+            list(xmldom.Element): The empty frame groups, and the group contains all the merged elements.
+        """
+        frame_nodes = list()
+        entries = list()    # The merged elements at the top level.
+        for (frame, g_frame) in self.export_frames(pos_offset, frame_delays, start_frame, end_frame, logo):
+            content = [child for child in g_frame.childNodes if child.tagName in DELTA_CONTAINER_TAGS]
+            for child in content:
+                g_frame.removeChild(child)
+            _merge_delta_entries_(entries, content, frame)
+            frame_nodes.append(g_frame)
+        first_frame = max(start_frame, self._first_frame)
+        last_frame = min(end_frame, self._frame_count_()) - 1
+        if first_frame > last_frame:
+            return frame_nodes
+        g_delta = self._root_dom.createElement('g')
+        g_delta.setAttribute('class', 'delta')
+        g_delta.setAttribute('transform', 'translate({},{})'.format(pos_offset[0], pos_offset[1]))
+        self._export_delta_entries_(g_delta, entries, first_frame, last_frame + 1)
+        self._add_visibility_sets_(g_delta, first_frame, last_frame + 1)
+        frame_nodes.append(g_delta)
+        return frame_nodes
 
     def export_logo(self, pos_offset, frame_delays, start_frame, end_frame):
         start_frame = max(start_frame, 0)
-        end_frame = min(end_frame, len(self._frames))
+        end_frame = min(end_frame, self._frame_count_())
         frame = end_frame
-        g_frame = self._frames[frame]
+        g_frame = self._load_frame_(frame)
         g_frame.setAttribute('transform', 'translate({},{})'.format(pos_offset[0], pos_offset[1]))
         self._update_gframe_animates_(g_frame, frame)
         animate_appear = self._create_first_frame_animate(start_frame, end_frame, frame, frame, frame_delays)
@@ -124,6 +164,59 @@ class Sequencer:
         g_frame.appendChild(animate_disappear)
         return g_frame
 
+    def _frame_count_(self):
+        return self._first_frame + len(self._frames)
+
+    def _load_frame_(self, frame):
+        """Parse the frame from the frame store, and wrap the svg's child nodes with a frame group.
+
+        Returns:
+            xmldom.Element: The frame group node, it's empty if the display object is not displayed in this frame.
+        """
+        g_frame = self._root_dom.createElement('g')
+        g_frame.setAttribute('class', 'frame')
+        g_frame.setAttribute('style', 'opacity:0')
+        if frame < self._first_frame:
+            return g_frame
+        (key, _, _) = self._frames[frame - self._first_frame]
+        dom = parseString(_FRAME_WRAPPER_START + self._frame_store.get(key) + _FRAME_WRAPPER_END)
+        cache_child_nodes = list()
+        for child in dom.documentElement.childNodes:
+            if hasattr(child, 'tagName') and (child.tagName == 'g' or child.tagName == 'svg'):
+                cache_child_nodes.append(child)
+        for child in cache_child_nodes:
+            g_frame.appendChild(child)
+        return g_frame
+
+    def _export_delta_entries_(self, parent, entries, start, end):
+        """Append the merged elements into parent, the elements not displayed in all the frames of parent
+        (from start until end) are shown/hidden by <set> animations.
+        """
+        for entry in entries:
+            node = entry.node
+            if entry.children is not None:
+                for child in list(node.childNodes):
+                    node.removeChild(child)
+                self._export_delta_entries_(node, entry.children, entry.start, entry.end)
+            if (entry.start != start or entry.end != end) and node.tagName not in DELTA_ANIMATE_TAGS:
+                self._add_visibility_sets_(node, entry.start, entry.end)
+            parent.appendChild(node)
+
+    def _add_visibility_sets_(self, node, start, end):
+        """Hide the node except the frames from start until end (exclusive).
+        """
+        node.setAttribute('visibility', 'hidden')
+        show = self._root_dom.createElement('set')
+        show.setAttribute('attributeName', 'visibility')
+        show.setAttribute('to', 'visible')
+        show.setAttribute('begin', 'V{}_{}S{}.begin'.format(self._vid, self._uid, start))
+        node.appendChild(show)
+        hide = self._root_dom.createElement('set')
+        hide.setAttribute('attributeName', 'visibility')
+        hide.setAttribute('to', 'hidden')
+        hide.setAttribute('begin', 'V{}_{}E{}.begin'.format(self._vid, self._uid, end - 1))
+        node.appendChild(hide)
+
     def _create_first_frame_animate(self, frame_start, frame_end, first_frame, last_frame, frame_delays):
         animate = self._root_dom.createElement('animate')
         animate.setAttribute('attributeName', 'opacity')
@@ -228,3 +321,186 @@ class Sequencer:
             elif tag == 'g' or tag == 'text':
                 for child in node.childNodes:
                     node_stack.append(child)
+
+
+class _RangeMax:
+    """The sparse table to query the maximum value of a range in O(1), the values are appended in O(log n).
+    """
+
+    def __init__(self):
+        self._levels = [list()]     # The levels[k][i] is the maximum value of values[i:i + 2**k].
+
+    def append(self, value):
+        levels = self._levels
+        levels[0].append(value)
+        last = len(levels[0]) - 1
+        k = 1
+        while (1 << k) <= last + 1:
+            if k == len(levels):
+                levels.append(list())
+            i = last - (1 << k) + 1
+            levels[k].append(max(levels[k - 1][i], levels[k - 1][i + (1 << (k - 1))]))
+            k += 1
+
+    def query(self, start, end):
+        """
+        Returns:
+            int: The maximum value of values[start:end], 0 if the range is empty.
+        """
+        if start >= end:
+            return 0
+        k = (end - start).bit_length() - 1
+        return max(self._levels[k][start], self._levels[k][end - (1 << k)])
+
+
+class _DeltaEntry:
+    """One merged element in delta mode, it's displayed from the start frame until the end frame (exclusive).
+    """
+    __slots__ = ('node', 'key', 'head', 'start', 'end', 'children')
+
+    def __init__(self, node, key, frame):
+        self.node = node                    # The xmldom element of the first frame.
+        self.key = key                      # The serialized element of the last frame.
+        self.head = _element_head_(node)    # The tag and attributes, the changed containers with same head are merged.
+        self.start = frame
+        self.end = frame + 1
+        self.children = None                # list(_DeltaEntry) of the child elements if the element is a container.
+        if _is_delta_container_(node):
+            self.children = [_DeltaEntry(child, child.toxml(), frame) for child in node.childNodes]
+
+    def extend(self, frame):
+        """Display this element (and its children displayed in the previous frame) in frame too.
+        """
+        if self.children is not None:
+            for child in self.children:
+                if child.end == frame:
+                    child.extend(frame)
+        self.end = frame + 1
+
+
+def _element_head_(node):
+    return (node.tagName, tuple(sorted(node.attributes.items())))
+
+
+def _is_delta_container_(node):
+    if node.tagName not in DELTA_CONTAINER_TAGS or len(node.childNodes) == 0:
+        return False
+    for child in node.childNodes:
+        if child.nodeType != child.ELEMENT_NODE:
+            return False
+    return True
+
+
+def _merge_delta_entries_(entries, nodes, frame):
+    """Merge the elements of frame into the entries at the same level.
+
+    The elements same as the ones displayed in the previous frame extend their entries, the changed containers
+    merge their children recursively, and the other elements are inserted as new entries after the entry of
+    their previous sibling, so the displayed entries of each frame keep the same order as the elements.
+
+    Args:
+        entries (list(_DeltaEntry)): All the entries at this level, updated in place.
+        nodes (list(xmldom.Element)): The elements at this level in frame.
+    """
+    alive = [entry for entry in entries if entry.end == frame]
+    keys = [node.toxml() for node in nodes]
+    placed = list()     # list((_DeltaEntry, is_new)) for the elements in order.
+    matcher = SequenceMatcher(None, [entry.key for entry in alive], keys, autojunk=False)
+    for (tag, i1, i2, j1, j2) in matcher.get_opcodes():
+        if tag == 'equal':
+            for k in range(j2 - j1):
+                alive[i1 + k].extend(frame)
+                placed.append((alive[i1 + k], False))
+            continue
+        i = i1
+        for j in range(j1, j2):
+            entry = None
+            if _is_delta_container_(nodes[j]):
+                head = _element_head_(nodes[j])
+                for k in range(i, i2):
+                    if alive[k].children is not None and alive[k].head == head:
+                        entry = alive[k]
+                        i = k + 1
+                        break
+            if entry is None:
+                placed.append((_DeltaEntry(nodes[j], keys[j], frame), True))
+            else:
+                entry.key = keys[j]
+                entry.end = frame + 1
+                _merge_delta_entries_(entry.children, list(nodes[j].childNodes), frame)
+                placed.append((entry, False))
+    inserts = dict()    # Key:id of the entry; Value:the new entries inserted after it.
+    head_inserts = list()
+    prev = None
+    for (entry, is_new) in placed:
+        if not is_new:
+            prev = entry
+        elif prev is None:
+            head_inserts.append(entry)
+        else:
+            inserts.setdefault(id(prev), list()).append(entry)
+    if len(head_inserts) == 0 and len(inserts) == 0:
+        return
+    merged = head_inserts
+    for entry in entries:
+        merged.append(entry)
+        merged.extend(inserts.get(id(entry), ()))
+    entries[:] = merged
+
+
+# The frame content is a list of elements, wrap them with a root element (which declares the xlink prefix) to parse.
+_FRAME_WRAPPER_START = '<g xmlns:xlink="http://www.w3.org/1999/xlink">'
+_FRAME_WRAPPER_END = '</g>'
+
+
+def render_frame(display_obj):
+    """Render the frame content of display_obj.
+
+    The display objects which have _render_frame_ method serialize their frame content directly,
+    the others are rendered into SVG string by _repr_svg_ and then parsed.
+
+    Returns:
+        (int, int, str)/None: The width, height of the frame and the serialized <g> and <svg> children of the
+            root svg, None if display_obj is not rendered into a svg.
+    """
+    if hasattr(display_obj, '_render_frame_'):
+        return display_obj._render_frame_()
+    return read_svg_frame(display_obj._repr_svg_())
+
+
+def snapshot_frame(display_obj):
+    """Take the snapshot of display_obj to render its frame content later.
+
+    The display objects which have _snapshot_frame_ method (eg: the graphs) only copy the data to display,
+    the heavy layout and rendering run when the returned function is called, the others are rendered now.
+
+    Returns:
+        function: Render the frame content, returns the same result as render_frame.
+    """
+    if hasattr(display_obj, '_snapshot_frame_'):
+        return display_obj._snapshot_frame_()
+    rendered = render_frame(display_obj)
+    return lambda: rendered
+
+
+def read_svg_frame(svg_str):
+    """Read the frame content from the SVG string.
+
+    Args:
+        svg_str (str): The SVG string rendered by the display object.
+
+    Returns:
+        (int, int, str)/None: Same as render_frame.
+    """
+    try:
+        dom = parseString(svg_str)
+    except ExpatError:
+        return None
+    svg = dom.documentElement
+    if svg.tagName != 'svg':
+        return None
+    content = list()
+    for child in svg.childNodes:
+        if hasattr(child, 'tagName') and (child.tagName == 'g' or child.tagName == 'svg'):
+            content.append(child.toxml())
+    return (int(svg.getAttribute('width')[0:-2]), int(svg.getAttribute('height')[0:-2]), ''.join(content))
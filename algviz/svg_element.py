@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+
+"""Define a lightweight SVG element model used instead of xml.dom.minidom.
+
+The classes in this module implement the small subset of the xml.dom.minidom
+interfaces which algviz needs (createElement, setAttribute, appendChild,
+getElementsByTagName, cloneNode, toxml...), so they can be used behind the
+existing SvgTable interfaces and the helper functions in utility module.
+
+Compared with minidom, the nodes here are plain __slots__ objects and the
+attribute values keep their python types. Numeric attribute values are only
+formatted (with two decimals) when the tree is serialized, so there is no need
+to parse them back with float() when they are updated.
+
+Every element also caches its serialized fragment. Modifying an element only
+drops the cached fragments along its path to the root, so serializing a big
+document after a few changes just rebuilds the changed elements and joins the
+cached strings of all the others.
+
+The parse_svg function builds the element tree from a SVG string (eg: the
+graphviz output) in one pass with expat, and indexes the elements by their
+id and class attributes, so they can be found without walking the tree.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+from xml.parsers.expat import ParserCreate
+
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+COMMENT_NODE = 8
+DOCUMENT_NODE = 9
+
+_NO_VALUE = object()
+
+_XML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+})
+
+
+def escape_xml(data):
+    """Escape the special characters in XML text or attribute value.
+
+    Args:
+        data (str): The raw string.
+
+    Returns:
+        str: The escaped string.
+    """
+    return data.translate(_XML_ESCAPE_TABLE)
+
+
+def format_attribute(value):
+    """Convert the attribute value into its SVG string representation.
+
+    Args:
+        value (str/int/float): The attribute value, number will be formatted with two decimals.
+
+    Returns:
+        str: The escaped attribute string.
+    """
+    if type(value) is str:
+        return escape_xml(value)
+    return '{:.2f}'.format(value)
+
+
+class SvgNode:
+    """Base class for all the nodes in the SVG element tree.
+    """
+    __slots__ = ('parentNode',)
+
+    ELEMENT_NODE = ELEMENT_NODE
+    TEXT_NODE = TEXT_NODE
+    COMMENT_NODE = COMMENT_NODE
+    DOCUMENT_NODE = DOCUMENT_NODE
+
+    _cache = None   # Only the elements cache their serialized fragments.
+
+    def toxml(self):
+        """
+        Returns:
+            str: The serialized XML string of this node.
+        """
+        out = list()
+        self._write_(out)
+        return ''.join(out)
+
+    def _write_(self, out):
+        raise NotImplementedError
+
+
+class SvgText(SvgNode):
+    """The text content node in SVG element tree.
+    """
+    __slots__ = ('_data',)
+
+    nodeType = TEXT_NODE
+
+    def __init__(self, data):
+        """
+        Args:
+            data (str): The text content.
+        """
+        self.parentNode = None
+        self._data = data
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        if data == self._data:
+            return
+        self._data = data
+        if self.parentNode is not None:
+            self.parentNode._invalidate_()
+
+    def cloneNode(self, deep=False):
+        return SvgText(self._data)
+
+    def _write_(self, out):
+        out.append(escape_xml(self._data))
+
+
+class SvgComment(SvgNode):
+    """The comment node in SVG element tree.
+    """
+    __slots__ = ('data',)
+
+    nodeType = COMMENT_NODE
+
+    def __init__(self, data):
+        """
+        Args:
+            data (str): The comment content.
+        """
+        self.parentNode = None
+        self.data = data
+
+    def cloneNode(self, deep=False):
+        return SvgComment(self.data)
+
+    def _write_(self, out):
+        out.append('<!--{}-->'.format(self.data))
+
+
+class SvgElement(SvgNode):
+    """The element node (eg: <svg>, <g>, <rect>, <text>) in SVG element tree.
+    """
+    __slots__ = ('tagName', 'childNodes', '_attrs', '_cache')
+
+    nodeType = ELEMENT_NODE
+
+    def __init__(self, tag):
+        """
+        Args:
+            tag (str): The tag name of this element.
+        """
+        self.parentNode = None
+        self.tagName = tag
+        self.childNodes = list()
+        self._attrs = dict()
+        self._cache = None          # The serialized string of this element, None if it's dirty.
+
+    @property
+    def firstChild(self):
+        if len(self.childNodes) == 0:
+            return None
+        return self.childNodes[0]
+
+    def setAttribute(self, name, value):
+        """Set the attribute value, the value can be a str or a number.
+
+        Setting the same value again will not make this element dirty.
+        """
+        old_value = self._attrs.get(name, _NO_VALUE)
+        if old_value is value or (type(old_value) is type(value) and old_value == value):
+            return
+        self._attrs[name] = value
+        self._invalidate_()
+
+    def getAttribute(self, name):
+        """
+        Returns:
+            str/int/float: The typed attribute value, return '' if attribute not exist (same as minidom).
+        """
+        return self._attrs.get(name, '')
+
+    def hasAttribute(self, name):
+        return name in self._attrs
+
+    def removeAttribute(self, name):
+        if name in self._attrs:
+            self._attrs.pop(name)
+            self._invalidate_()
+
+    def appendChild(self, node):
+        """Append a child node at the end of this element, the node will be moved if it already has a parent.
+
+        Returns:
+            SvgNode: The appended node.
+        """
+        if node.parentNode is not None:
+            node.parentNode.removeChild(node)
+        self.childNodes.append(node)
+        node.parentNode = self
+        self._invalidate_()
+        return node
+
+    def removeChild(self, node):
+        """Remove a child node from this element.
+
+        Returns:
+            SvgNode: The removed node.
+        """
+        self.childNodes.remove(node)
+        node.parentNode = None
+        self._invalidate_()
+        return node
+
+    def getElementsByTagName(self, name):
+        """Find all the descendant elements with the given tag name in document order.
+
+        Returns:
+            list(SvgElement): The matched elements.
+        """
+        res = list()
+        node_stack = list(reversed(self.childNodes))
+        while len(node_stack) > 0:
+            node = node_stack.pop()
+            if node.nodeType != ELEMENT_NODE:
+                continue
+            if node.tagName == name:
+                res.append(node)
+            node_stack.extend(reversed(node.childNodes))
+        return res
+
+    def cloneNode(self, deep=False):
+        """
+        Args:
+            deep (bool): Whether to clone the descendant nodes.
+
+        Returns:
+            SvgElement: The cloned element without parent.
+        """
+        clone = SvgElement(self.tagName)
+        clone._attrs = dict(self._attrs)
+        if deep:
+            for child in self.childNodes:
+                clone.appendChild(child.cloneNode(True))
+        return clone
+
+    def _invalidate_(self):
+        """Drop the cached fragments of this element and all its ancestors.
+
+        The fragment of a parent is always built after its children, so the
+        walk can stop at the first ancestor which is already dirty.
+        """
+        node = self
+        while node is not None and node._cache is not None:
+            node._cache = None
+            node = node.parentNode
+
+    def _write_(self, out):
+        if self._cache is None:
+            fragment = ['<' + self.tagName]
+            for name, value in self._attrs.items():
+                fragment.append(' {}="{}"'.format(name, format_attribute(value)))
+            if len(self.childNodes) == 0:
+                fragment.append('/>')
+            else:
+                fragment.append('>')
+                for child in self.childNodes:
+                    child._write_(fragment)
+                fragment.append('</{}>'.format(self.tagName))
+            self._cache = ''.join(fragment)
+        out.append(self._cache)
+
+
+class SvgDocument(SvgNode):
+    """The document object which creates and contains the SVG element tree.
+    """
+    __slots__ = ('childNodes', '_ids', '_classes')
+
+    nodeType = DOCUMENT_NODE
+
+    def __init__(self):
+        self.parentNode = None
+        self.childNodes = list()
+        self._ids = None            # The first element of each id attribute, only the parsed documents have index.
+        self._classes = None        # The elements of each class attribute in document order.
+
+    @property
+    def documentElement(self):
+        for child in self.childNodes:
+            if child.nodeType == ELEMENT_NODE:
+                return child
+        return None
+
+    def createElement(self, tag):
+        return SvgElement(tag)
+
+    def createTextNode(self, data):
+        return SvgText(data)
+
+    def createComment(self, data):
+        return SvgComment(data)
+
+    def appendChild(self, node):
+        if node.parentNode is not None:
+            node.parentNode.removeChild(node)
+        self.childNodes.append(node)
+        node.parentNode = self
+        return node
+
+    def removeChild(self, node):
+        self.childNodes.remove(node)
+        node.parentNode = None
+        return node
+
+    def getElementsByTagName(self, name):
+        res = list()
+        for child in self.childNodes:
+            if child.nodeType != ELEMENT_NODE:
+                continue
+            if child.tagName == name:
+                res.append(child)
+            res.extend(child.getElementsByTagName(name))
+        return res
+
+    def getElementById(self, element_id):
+        """Find the first element with the id attribute in document order.
+
+        For the documents built by parse_svg, the elements are looked up in the index, which contains the
+        parsed elements and the elements added by indexElement.
+
+        Returns:
+            SvgElement/None: The matched element.
+        """
+        if self._ids is not None:
+            return self._ids.get(element_id)
+        for element in self._iter_elements_():
+            if element.getAttribute('id') == element_id:
+                return element
+        return None
+
+    def getElementsByClassName(self, name):
+        """Find the elements with the class attribute in document order.
+
+        Returns:
+            list(SvgElement): The matched elements.
+        """
+        if self._classes is not None:
+            return list(self._classes.get(name, ()))
+        return [element for element in self._iter_elements_() if element.getAttribute('class') == name]
+
+    def indexElement(self, element):
+        """Add the element created after parsing into the id and class index.
+        """
+        if self._ids is None:
+            return
+        element_id = element.getAttribute('id')
+        if element_id != '' and element_id not in self._ids:
+            self._ids[element_id] = element
+        element_class = element.getAttribute('class')
+        if element_class != '':
+            self._classes.setdefault(element_class, list()).append(element)
+
+    def frameContent(self):
+        """Serialize the <g> and <svg> children of the root svg element, which are the content of one animation frame.
+
+        Returns:
+            (int, int, str)/None: The width, height(in pt) of the root svg and the serialized children,
+                None if the root element is not svg.
+        """
+        svg = self.documentElement
+        if svg is None or svg.tagName != 'svg':
+            return None
+        width = int(str(svg.getAttribute('width'))[0:-2])
+        height = int(str(svg.getAttribute('height'))[0:-2])
+        out = list()
+        for child in svg.childNodes:
+            if child.nodeType == ELEMENT_NODE and (child.tagName == 'g' or child.tagName == 'svg'):
+                child._write_(out)
+        return (width, height, ''.join(out))
+
+    def _iter_elements_(self):
+        node_stack = list(reversed(self.childNodes))
+        while len(node_stack) > 0:
+            node = node_stack.pop()
+            if node.nodeType != ELEMENT_NODE:
+                continue
+            yield node
+            node_stack.extend(reversed(node.childNodes))
+
+    def _write_(self, out):
+        out.append('<?xml version="1.0" ?>')
+        for child in self.childNodes:
+            child._write_(out)
+
+
+def parse_svg(svg_str):
+    """Parse the SVG string into SvgDocument in one pass.
+
+    The DOCTYPE, comments and the whitespaces between elements are dropped. The elements are indexed
+    by their id and class attributes, see SvgDocument.getElementById and getElementsByClassName.
+
+    Args:
+        svg_str (str): The SVG string, eg: the output of graphviz.
+
+    Returns:
+        SvgDocument: The parsed document.
+    """
+    doc = SvgDocument()
+    doc._ids = dict()
+    doc._classes = dict()
+    node_stack = [doc]
+
+    def start_element(tag, attrs):
+        element = SvgElement(tag)
+        element._attrs = attrs
+        parent = node_stack[-1]
+        parent.childNodes.append(element)
+        element.parentNode = parent
+        node_stack.append(element)
+        if 'id' in attrs and attrs['id'] not in doc._ids:
+            doc._ids[attrs['id']] = element
+        if 'class' in attrs:
+            doc._classes.setdefault(attrs['class'], list()).append(element)
+
+    def end_element(tag):
+        node_stack.pop()
+
+    def char_data(data):
+        parent = node_stack[-1]
+        if parent is doc or (data.isspace() and parent.tagName != 'text'):
+            return
+        text = SvgText(data)
+        parent.childNodes.append(text)
+        text.parentNode = parent
+
+    parser = ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = char_data
+    parser.Parse(svg_str, True)
+    return doc
@@ -11,18 +11,19 @@ License: GPLv3
 
 """
 
+from functools import partial
+
 from algviz.utility import str2rgbcolor, text_font_size, auto_text_color, rgbcolor2str, FONT_FAMILY
 from algviz.utility import add_animate_appear_into_node, add_animate_move_into_node, layout_text
 from algviz.utility import TraceColorStack, ConsecutiveIdMap, AlgvizFatalError
-from algviz.utility import add_desc_into_svg, find_tag_by_id, add_animate_scale_into_text
+from algviz.utility import add_desc_into_svg, add_animate_scale_into_text
 from algviz.graph import GraphNode
 from algviz.tree import BinaryTreeNode, TreeNode
 from algviz.linked_list import ForwardLinkedListNode, DoublyLinkedListNode
-
-from graphviz import Digraph as graphviz_Digraph
-from graphviz import Graph as graphviz_Graph
-from graphviz import __version__ as graphviz_version
-from xml.dom.minidom import parseString as mindom_parseString
+from algviz.graphviz_pool import get_graphviz_pool
+from algviz.layout_cache import get_layout_cache
+from algviz.graph_layout import layout_tree, layout_force, force_layout_supported
+from algviz.svg_element import SvgDocument, parse_svg
 
 
 SVG_GRAPH_NODE_WIDTH = 32
@@ -31,13 +32,15 @@ SVG_GRAPH_NODE_WIDTH = 32
 class _SvgGraphType:
     """This class is used to specific the layout parameter for SvgGraph class.
     """
-    def __init__(self, rankdir=None, shape='circle'):
+    def __init__(self, rankdir=None, shape='circle', engine='graphviz'):
         """
         Args:
             rankdir (str): The layout direction for graph. example: 'LR'
+            engine (str): The layout engine for graph, 'graphviz' or the built-in 'tree' layout.
         """
         self.rankdir = rankdir
         self.shape = shape
+        self.engine = engine
 
 
 def _get_graph_type_by_data_(data):
@@ -60,10 +63,10 @@ def _get_graph_type_by_data_(data):
         layout = _SvgGraphType('LR')
     elif type(data) == BinaryTreeNode:
         # For binary tree layout.
-        layout = _SvgGraphType()
+        layout = _SvgGraphType(engine='tree')
     elif type(data) == TreeNode:
         # For normal tree layout.
-        layout = _SvgGraphType()
+        layout = _SvgGraphType(engine='tree')
     elif type(data) == ForwardLinkedListNode:
         # For forward linked list layout.
         layout = _SvgGraphType('LR')
@@ -73,6 +76,30 @@ def _get_graph_type_by_data_(data):
     return layout
 
 
+class _SvgGraphFrame:
+    """The snapshot of a SvgGraph taken when it's displayed, the frame is rendered from the snapshot later.
+
+    The snapshot holds the layout input and the changes recorded since the last frame, so the frame can be
+    rendered in another thread while the graph is changed by the user algorithm.
+    """
+    def __init__(self, layout_input, delay):
+        """
+        Args:
+            layout_input (tuple): The node and edge id maps, node labels, edges and layout key, see SvgGraph._layout_input_.
+            delay (float): Animation delay time of this frame.
+        """
+        (self.node_idmap, self.edge_idmap, self.node_labels, self.edges, self.layout_key) = layout_input
+        self.delay = delay
+        self.layout_prefetch = None     # The (layout key, graphviz output) rendered ahead by prefetch_graphs_layout.
+        self.node_appear = set()        # The node(s) appearing in this frame.
+        self.node_disappear = set()     # The node(s) disappearing in this frame.
+        self.edge_appear = set()        # The edge(s) appearing in this frame.
+        self.edge_disappear = set()     # The edge(s) disappearing in this frame.
+        self.mark_ops = list()          # The mark operations since last frame, see SvgGraph._mark_ops.
+        self.nodes_label_update = dict()    # The old label of the node(s) whose label changed since last frame.
+        self.edges_label_update = dict()    # The old label of the edge(s) whose label changed since last frame.
+
+
 class SvgGraph():
     """A SvgGraph object can record all the nodes in it's binded graph.
 
@@ -91,9 +118,12 @@ class SvgGraph():
         """
         self._directed = directed       # Whether the graph is a directed graph.
         self._delay = delay             # Delay time of each frame of animation.
-        self._node_seq = list()         # The graph node(s) list arranged in a certain order.
-        self._add_nodes = list()        # Record the externally added node(s) since last frame.
-        self._remove_nodes = list()     # Record the externally deleted node(s) since last frame.
+        self._node_seq = dict()         # The graph node(s) arranged in the order they are added (ordered set, value is None).
+        self._add_nodes = list()        # Record the externally added node(s) since last topology sync.
+        self._dirty_nodes = dict()      # Record the node(s) whose neighbors changed since last topology sync (ordered set).
+        self._node_edges = dict()       # The output edges of each node (node: list((edge_key, neighbor_node))) in neighbors order.
+        self._in_edges = dict()         # The nodes point to each node (node: dict(source_node: count)).
+        self._edge_refs = dict()        # The number of (node, neighbor) pairs refer to each edge, undirected edge can be referred twice.
         self._edge_label = dict()       # Label information to be displayed on each edge of the graph.
         self._node_tcs = dict()         # Record the trajectory access information for all nodes in the current graph (node: ColorStack).
         self._edge_tcs = dict()         # Record the trajectory access information of all edges in the current graph ((start_node, end_node): ColorStack).
@@ -103,16 +133,24 @@ class SvgGraph():
         self._edge_disappear = set()    # Record the collection of edge(s) that disappear in the next frame of animation.
         self._node_move = set()         # Record the collection of nodes moving in the animation effect.
         self._frame_trace_old = list()  # Cache the node/edge related information that needs to be cleared in the previous frame (node_index/edge_index, ColorStack).
-        self._frame_trace = list()      # Cache the node/edge related information to be refreshed in the next frame (node_index/edge_index, ColorStack, persistence).
+        # The mark operations since last frame, they are applied to the trace colors when the frame is rendered:
+        # ('node', node, color, hold), ('edge', edge, color, hold) or ('remove', color, nodes, edges).
+        self._mark_ops = list()
         self._svg = None                # The svg object of the graph to be displayed.
         self._node_idmap = None         # Map node_index value to the corresponding node index in graphviz's output svg.
         self._edge_idmap = None         # Map edge_index value to the corresponding edge index in graphviz's output svg.
         self._add_history = set()       # Record all the nodes that have been added since graph created. Used to check duplicates when add/remove nodes in the graph.
         self._nodes_label_update = dict()   # Cache all the nodes label in the graph to be update since last frame.
         self._edges_lable_update = dict()   # Cache all the edges label in the graph to be update since last frame.
+        self._layout_cache = None       # The (layout key, graphviz output, node labels) of the last graphviz layout.
+        self._layout_prefetch = None    # The (layout key, graphviz output) rendered ahead by prefetch_graphs_layout.
+        self._force_positions = dict()  # The position of each node in the last force layout (node: (x, y)), used to warm start the next layout.
+        self._svg_geometry = dict()     # The (node positions, edges) of the parsed SVG documents, see _get_svg_geometry_.
         self._type = _get_graph_type_by_data_(data)
         # Init graph nodes and svg.
-        (self._svg, self._node_idmap, self._edge_idmap) = self._create_svg_()
+        frame = self._take_snapshot_()
+        self._svg = self._create_svg_(frame)
+        (self._node_idmap, self._edge_idmap) = (frame.node_idmap, frame.edge_idmap)
         self._init_graph_nodes(data)    # Traverse the data and add nodes into this graph.
         add_desc_into_svg(self._svg)
 
@@ -153,40 +191,31 @@ class SvgGraph():
         Returns:
             int: The number of node(s) removed from graph.
         """
+        self._sync_topology_()
         subgraph_nodes = set()
         if recursive:
             node_stack = [node]
             while len(node_stack) > 0:
                 cur_node = node_stack.pop()
-                if cur_node is None or cur_node in subgraph_nodes:
+                if cur_node is None or cur_node in subgraph_nodes or cur_node not in self._node_seq:
                     continue
-                if cur_node in self._remove_nodes or cur_node not in self._add_history:
-                    continue
-                cur_node._remove_bind_graph_(self)
-                self._add_history.remove(cur_node)
                 subgraph_nodes.add(cur_node)
                 for neighbor in cur_node._neighbors_():
                     node_stack.append(neighbor[0])
         else:
-            if node and node in self._add_history:
+            if node is not None and node in self._node_seq:
                 subgraph_nodes.add(node)
             else:
                 return 0
-        # Make sure there is no output edge into the subgraph nodes to be removed.
-        node_stack = self._node_seq + self._add_nodes
-        visited = set(self._remove_nodes)
-        while len(node_stack) > 0:
-            cur_node = node_stack.pop()
-            if cur_node is None or cur_node in subgraph_nodes or cur_node in visited:
-                continue
-            visited.add(cur_node)
-            for neigh in cur_node._neighbors_():
-                if neigh[0] is not None:
-                    if neigh[0] in subgraph_nodes:
-                        return 0
-                    node_stack.append(neigh[0])
-        for node in subgraph_nodes:
-            self._remove_nodes.append(node)
+        # Make sure there is no output edge from the remain nodes into the subgraph nodes to be removed.
+        for cur_node in subgraph_nodes:
+            for source_node in self._in_edges.get(cur_node, ()):
+                if source_node not in subgraph_nodes:
+                    return 0
+        for cur_node in subgraph_nodes:
+            cur_node._remove_bind_graph_(self)
+            self._add_history.discard(cur_node)
+            self._remove_node_(cur_node)
         return len(subgraph_nodes)
 
     def markNode(self, color, node, hold=False):
@@ -199,10 +228,7 @@ class SvgGraph():
             hold (bool): Whether to keep the mark color in future animation frames.
         """
         if node is not None:
-            if node not in self._node_tcs.keys():
-                self._node_tcs[node] = TraceColorStack()
-            self._node_tcs[node].add(color)
-            self._frame_trace.append((node, color, hold))
+            self._mark_ops.append(('node', node, color, hold))
 
     def markNodes(self, color, nodes, hold=False):
         """Emphasize some nodes by mark it's background color.
@@ -228,10 +254,7 @@ class SvgGraph():
         """
         if node1 is not None and node2 is not None:
             edge_key = self._make_edge_tuple_(node1, node2)
-            if edge_key not in self._edge_tcs.keys():
-                self._edge_tcs[edge_key] = TraceColorStack(bgcolor=(123, 123, 123))
-            self._edge_tcs[edge_key].add(color)
-            self._frame_trace.append((edge_key, color, hold))
+            self._mark_ops.append(('edge', edge_key, color, hold))
 
     def markEdges(self, color, edges, hold=False):
         """Emphasize some edges by mark it's stoke color.
@@ -254,16 +277,7 @@ class SvgGraph():
             color ((R,G,B)): R, G, B stand for color channel for red, green, blue.
                 R,G,B should be int value and 0 <= R,G,B <= 255. eg:(0, 255, 0)
         """
-        for k in self._node_seq:
-            if self._node_tcs[k].remove(color):
-                node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
-                node = find_tag_by_id(self._svg, 'g', node_id)
-                self._update_node_color_(node, self._node_tcs[k].color())
-        for k in self._edge_label.keys():
-            if self._edge_tcs[k].remove(color):
-                edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
-                edge = find_tag_by_id(self._svg, 'g', edge_id)
-                self._update_edge_color_(edge, self._edge_tcs[k].color())
+        self._mark_ops.append(('remove', color, list(self._node_seq), list(self._edge_label.keys())))
 
     def removeMarks(self, color_list):
         """Remove the mark colors for node(s) and edge(s).
@@ -297,12 +311,12 @@ class SvgGraph():
             label = ''
         self._nodes_label_update[node] = label
 
-    def _update_svg_nodes_label(self, svg, node_idmap):
-        time0 = (0, self._delay * 0.5)
-        time1 = (self._delay * 0.6, self._delay)
-        for node, old_label in self._nodes_label_update.items():
+    def _update_svg_nodes_label(self, svg, node_idmap, frame):
+        time0 = (0, frame.delay * 0.5)
+        time1 = (frame.delay * 0.6, frame.delay)
+        for node, old_label in frame.nodes_label_update.items():
             node_id = 'node{}'.format(node_idmap.toConsecutiveId(node))
-            svg_node = find_tag_by_id(svg, 'g', node_id)
+            svg_node = svg.getElementById(node_id)
             if svg_node is None:
                 return
             ellipse = svg_node.getElementsByTagName('ellipse')[0]
@@ -348,13 +362,23 @@ class SvgGraph():
         if label is None:
             label = ''
         self._edges_lable_update[edge_key] = label
+        self._updateNodeNeighbors(node1)
+
+    def _updateNodeNeighbors(self, node):
+        """Record the node whose neighbors or edge labels changed, it's edges will be updated in the next frame.
 
-    def _update_svg_edges_label(self, svg, edge_idmap):
-        time0 = (0, self._delay * 0.5)
-        time1 = (self._delay * 0.6, self._delay)
-        for edge_key, old_label in self._edges_lable_update.items():
+        Args:
+            node (subclass of GraphNodeBase): The node object whose neighbors changed. Can be a graph/tree/linked_list node.
+        """
+        if node in self._add_history:
+            self._dirty_nodes[node] = None
+
+    def _update_svg_edges_label(self, svg, edge_idmap, frame):
+        time0 = (0, frame.delay * 0.5)
+        time1 = (frame.delay * 0.6, frame.delay)
+        for edge_key, old_label in frame.edges_label_update.items():
             edge_id = 'edge{}'.format(edge_idmap.toConsecutiveId(edge_key))
-            svg_node = find_tag_by_id(svg, 'g', edge_id)
+            svg_node = svg.getElementById(edge_id)
             if svg_node is None:
                 return
             text_nodes = svg_node.getElementsByTagName('text')
@@ -380,17 +404,86 @@ class SvgGraph():
         Returns:
             str: SVG string to representation graph nodes and edges with animation.
         """
+        return self._next_frame_(SvgDocument.toxml).replace('\n', '')
+
+    def _render_frame_(self):
+        """Render the graph for the layouter to record one frame.
+
+        Returns:
+            (int, int, str): The width, height and content of the frame, see SvgDocument.frameContent.
+        """
+        return self._render_frame_snapshot_(self._take_snapshot_())
+
+    def _snapshot_frame_(self):
+        """Take the snapshot of the graph for the layouter to record one frame, the frame is rendered from it later.
+
+        The returned function can be called in another thread while the graph is changed by the user algorithm,
+        but the frames must be rendered in the order they are snapshotted.
+
+        Returns:
+            function: Render the frame, returns the same result as _render_frame_.
+        """
+        return partial(self._render_frame_snapshot_, self._take_snapshot_())
+
+    def _render_frame_snapshot_(self, frame):
+        (width, height, content) = self._render_snapshot_(frame, SvgDocument.frameContent)
+        return (width, height, content.replace('\n', ''))
+
+    def _next_frame_(self, render):
+        """Layout the graph, add animation effects, render the SVG and prepare for the next frame.
+
+        Args:
+            render (function): Render the SvgDocument of this frame, eg: SvgDocument.toxml.
+
+        Returns:
+            The render result.
+        """
+        return self._render_snapshot_(self._take_snapshot_(), render)
+
+    def _take_snapshot_(self):
+        """Sync the topology and take the snapshot of the graph, then start recording the changes of the next frame.
+
+        Only the nodes and edges of the graph are read from the user data, the rendering doesn't need them.
+
+        Returns:
+            _SvgGraphFrame: The snapshot of this frame.
+        """
+        self._sync_topology_()
+        frame = _SvgGraphFrame(self._layout_input_(), self._delay)
+        (frame.layout_prefetch, self._layout_prefetch) = (self._layout_prefetch, None)
+        (frame.node_appear, self._node_appear) = (self._node_appear, set())
+        (frame.node_disappear, self._node_disappear) = (self._node_disappear, set())
+        (frame.edge_appear, self._edge_appear) = (self._edge_appear, set())
+        (frame.edge_disappear, self._edge_disappear) = (self._edge_disappear, set())
+        (frame.mark_ops, self._mark_ops) = (self._mark_ops, list())
+        (frame.nodes_label_update, self._nodes_label_update) = (self._nodes_label_update, dict())
+        (frame.edges_label_update, self._edges_lable_update) = (self._edges_lable_update, dict())
+        return frame
+
+    def _render_snapshot_(self, frame, render):
+        """Layout the graph, add animation effects, render the SVG of the frame and prepare for the next frame.
+
+        Only the rendering state (the last SVG, id maps, trace colors and layout caches) of the graph is changed.
+
+        Args:
+            frame (_SvgGraphFrame): The snapshot of this frame.
+            render (function): Render the SvgDocument of this frame, eg: SvgDocument.toxml.
+
+        Returns:
+            The render result.
+        """
         # Sequence the graph and add animation effects.
-        self._traverse_graph_()
-        (new_svg, node_idmap, edge_idmap) = self._create_svg_()
+        frame_trace = self._apply_mark_ops_(frame)
+        new_svg = self._create_svg_(frame)
         add_desc_into_svg(new_svg)
         self._update_svg_size_(new_svg)
-        self._update_svg_(new_svg, node_idmap, edge_idmap)
-        self._update_trace_color_()
+        self._update_svg_(new_svg, frame)
+        self._update_trace_color_(frame_trace)
         self._compress_svg_()
-        res = self._svg.toxml()
+        res = render(self._svg)
         # Update the SVG content and prepare for the next frame.
-        self._svg, self._node_idmap, self._edge_idmap = new_svg, node_idmap, edge_idmap
+        self._svg, self._node_idmap, self._edge_idmap = new_svg, frame.node_idmap, frame.edge_idmap
+        self._svg_geometry = {new_svg: self._get_svg_geometry_(new_svg)}
         new_nodes = self._get_node_pos_(self._svg)
         for node_id in new_nodes.keys():
             node = self._node_idmap.toAttributeId(node_id)
@@ -400,91 +493,169 @@ class SvgGraph():
             edge = self._edge_idmap.toAttributeId(edge_id)
             self._update_edge_color_(new_edges[edge_id], self._edge_tcs[edge].color())
         # Update auxiliary data caches.
-        for node in self._node_disappear:
+        for node in frame.node_disappear:
             self._node_tcs.pop(node)
-        for edge in self._edge_disappear:
+        for edge in frame.edge_disappear:
             self._edge_tcs.pop(edge)
-        self._node_appear.clear()
-        self._node_disappear.clear()
-        self._edge_appear.clear()
-        self._edge_disappear.clear()
         self._node_move.clear()
-        return res.replace('\n', '')
+        return res
 
-    def _compress_svg_(self):
-        graphs = self._svg.getElementsByTagName('g')
-        for graph in graphs:
-            if graph.getAttribute('class') != 'graph':
-                continue
-            nodes_to_remove = list()
-            for node in graph.childNodes:
-                if node.nodeType == node.COMMENT_NODE:
-                    nodes_to_remove.append(node)
-                elif node.nodeType == node.ELEMENT_NODE:
-                    if node.getAttribute('class') == 'node':
-                        titles = node.getElementsByTagName('title')
-                        for title in titles:
-                            node.removeChild(title)
-                            pass
-                    elif node.getAttribute('class') == 'edge':
-                        titles = node.getElementsByTagName('title')
-                        for title in titles:
-                            title_content = title.firstChild.data
-                            if self._directed:
-                                title_content = title_content.split('->')
-                            else:
-                                title_content = title_content.split('--')
-                            node.removeChild(title)
-                    elif node.tagName == 'title':
-                        nodes_to_remove.append(node)
-            for node in nodes_to_remove:
-                graph.removeChild(node)
-
-    def _traverse_graph_(self):
-        """Traverse each node in the graph and update the related data structure.
-        """
-        # Traverse the nodes in the graph and record the new topology structure of this graph.
-        new_node_seq = list()
-        new_edge_label = dict()
-        visited = set(self._remove_nodes)
-        node_stack = self._node_seq + self._add_nodes
-        node_stack.reverse()
-        while len(node_stack) > 0:
-            cur_node = node_stack.pop()
-            if cur_node is None or cur_node in visited:
-                continue
-            visited.add(cur_node)
-            new_node_seq.append(cur_node)
-            for neigh in cur_node._neighbors_()[::-1]:
-                if neigh[0] is not None and neigh[0] not in self._remove_nodes:
-                    temp_edge = self._make_edge_tuple_(cur_node, neigh[0])
-                    new_edge_label[temp_edge] = neigh[1]
-                    node_stack.append(neigh[0])
-        # Update the newly added and disappeared edges and nodes.
-        old_node_set = set(self._node_seq)
-        new_node_set = set(new_node_seq)
-        self._node_appear = new_node_set - old_node_set
-        self._node_disappear = old_node_set - new_node_set
-        self._edge_appear = new_edge_label.keys() - self._edge_label.keys()
-        self._edge_disappear = self._edge_label.keys() - new_edge_label.keys()
-        # Update the cached track color information.
-        for node in self._node_appear:
+    def _apply_mark_ops_(self, frame):
+        """Create the trace colors of the appeared nodes and edges, and apply the mark operations of the frame.
+
+        Args:
+            frame (_SvgGraphFrame): The snapshot of this frame.
+
+        Returns:
+            list((node/edge, (R,G,B), bool)): The node(s) and edge(s) marked in this frame, with the color and hold flag.
+        """
+        for node in frame.node_appear:
             if node not in self._node_tcs.keys():
                 self._node_tcs[node] = TraceColorStack()
-        for edge in self._edge_appear:
+        for edge in frame.edge_appear:
             if edge not in self._edge_tcs.keys():
                 self._edge_tcs[edge] = TraceColorStack(bgcolor=(123, 123, 123))
-        # Update other auxiliary data.
-        self._node_seq = new_node_seq
-        self._edge_label = new_edge_label
-        self._add_nodes.clear()
-        self._remove_nodes.clear()
+        frame_trace = list()
+        for op in frame.mark_ops:
+            if op[0] == 'node':
+                (_, node, color, hold) = op
+                if node not in self._node_tcs.keys():
+                    self._node_tcs[node] = TraceColorStack()
+                self._node_tcs[node].add(color)
+                frame_trace.append((node, color, hold))
+            elif op[0] == 'edge':
+                (_, edge, color, hold) = op
+                if edge not in self._edge_tcs.keys():
+                    self._edge_tcs[edge] = TraceColorStack(bgcolor=(123, 123, 123))
+                self._edge_tcs[edge].add(color)
+                frame_trace.append((edge, color, hold))
+            else:
+                (_, color, nodes, edges) = op
+                for k in nodes:
+                    if k in self._node_tcs.keys() and self._node_tcs[k].remove(color):
+                        node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
+                        node = self._svg.getElementById(node_id)
+                        self._update_node_color_(node, self._node_tcs[k].color())
+                for k in edges:
+                    if k in self._edge_tcs.keys() and self._edge_tcs[k].remove(color):
+                        edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
+                        edge = self._svg.getElementById(edge_id)
+                        self._update_edge_color_(edge, self._edge_tcs[k].color())
+        return frame_trace
+
+    def _compress_svg_(self):
+        """Remove the titles of the graph, nodes and edges in SVG, which are only used by graphviz.
+        """
+        elements = list()
+        for graph_id in ('graph0', 'graph1'):
+            graph = self._svg.getElementById(graph_id)
+            if graph is not None:
+                elements.append(graph)
+        graph1 = self._svg.getElementById('graph1')
+        if graph1 is not None:
+            elements.extend(graph1.childNodes)  # The cloned nodes and edges for animations.
+        elements.extend(self._svg.getElementsByClassName('node'))
+        elements.extend(self._svg.getElementsByClassName('edge'))
+        for element in elements:
+            title = element.firstChild
+            if title is not None and title.nodeType == title.ELEMENT_NODE and title.tagName == 'title':
+                element.removeChild(title)
+
+    def _sync_topology_(self):
+        """Apply the added nodes and the changed neighbors since last sync to the nodes and edges of this graph.
+
+        Only the added nodes and the nodes whose neighbors changed are visited, the appeared and disappeared
+        nodes/edges are accumulated until the next frame is rendered.
+        """
+        while len(self._add_nodes) > 0 or len(self._dirty_nodes) > 0:
+            for node in self._add_nodes:
+                if node not in self._node_seq:
+                    self._node_seq[node] = None
+                    self._mark_node_appear_(node)
+                    self._dirty_nodes[node] = None
+            self._add_nodes.clear()
+            dirty_nodes = list(self._dirty_nodes.keys())
+            self._dirty_nodes.clear()
+            for node in dirty_nodes:
+                if node in self._node_seq:
+                    self._update_node_edges_(node)
+
+    def _update_node_edges_(self, node):
+        """Rescan the neighbors of the node and update it's output edges.
+
+        Args:
+            node (subclass of GraphNodeBase): The node object in this graph.
+        """
+        new_edges = list()
+        for (neighbor, label) in node._neighbors_():
+            if neighbor is None:
+                continue
+            if neighbor not in self._node_seq:
+                self.addNode(neighbor)
+            edge_key = self._make_edge_tuple_(node, neighbor)
+            self._add_edge_ref_(edge_key, node, neighbor, label)
+            new_edges.append((edge_key, neighbor))
+        # Release the old edges after the new ones are referred, so the unchanged edges are kept.
+        for (edge_key, neighbor) in self._node_edges.get(node, ()):
+            self._remove_edge_ref_(edge_key, node, neighbor)
+        self._node_edges[node] = new_edges
+
+    def _remove_node_(self, node):
+        """Remove the node and it's output edges from this graph.
+
+        Args:
+            node (subclass of GraphNodeBase): The node object in this graph.
+        """
+        self._node_seq.pop(node)
+        self._dirty_nodes.pop(node, None)
+        for (edge_key, neighbor) in self._node_edges.pop(node, ()):
+            self._remove_edge_ref_(edge_key, node, neighbor)
+        self._in_edges.pop(node, None)
+        if node in self._node_appear:
+            self._node_appear.remove(node)
+        else:
+            self._node_disappear.add(node)
+
+    def _add_edge_ref_(self, edge_key, node, neighbor, label):
+        count = self._edge_refs.get(edge_key, 0)
+        self._edge_refs[edge_key] = count + 1
+        self._edge_label[edge_key] = label
+        in_edges = self._in_edges.setdefault(neighbor, dict())
+        in_edges[node] = in_edges.get(node, 0) + 1
+        if count == 0:
+            if edge_key in self._edge_disappear:
+                self._edge_disappear.remove(edge_key)
+            else:
+                self._edge_appear.add(edge_key)
+
+    def _remove_edge_ref_(self, edge_key, node, neighbor):
+        in_edges = self._in_edges.get(neighbor)
+        if in_edges is not None and node in in_edges:
+            in_edges[node] -= 1
+            if in_edges[node] == 0:
+                in_edges.pop(node)
+        count = self._edge_refs[edge_key] - 1
+        if count > 0:
+            self._edge_refs[edge_key] = count
+            return
+        self._edge_refs.pop(edge_key)
+        self._edge_label.pop(edge_key)
+        if edge_key in self._edge_appear:
+            self._edge_appear.remove(edge_key)
+        else:
+            self._edge_disappear.add(edge_key)
+
+    def _mark_node_appear_(self, node):
+        if node in self._node_disappear:
+            self._node_disappear.remove(node)
+        else:
+            self._node_appear.add(node)
 
     def _update_node_color_(self, node, color):
         """Update the color attribute of the node in SVG.
 
         Args:
-            node (xmldom.Node): The node to be updated in SVG.
+            node (SvgElement): The node to be updated in SVG.
             color ((R,G,B)): R, G, B stand for color channel for red, green, blue.
                 R,G,B should be int value and 0 <= R,G,B <= 255. eg:(0, 255, 0)
         """
@@ -501,7 +672,7 @@ class SvgGraph():
         """Update the color attribute of the edge in SVG.
 
         Args:
-            edge (xmldom.Node): The edge to be updated in SVG.
+            edge (SvgElement): The edge to be updated in SVG.
             color ((R,G,B)): R, G, B stand for color channel for red, green, blue.
                 R,G,B should be int value and 0 <= R,G,B <= 255. eg:(0, 255, 0)
         """
@@ -513,44 +684,46 @@ class SvgGraph():
                 polygons[0].setAttribute('fill', rgbcolor2str(color))
                 polygons[0].setAttribute('stroke', rgbcolor2str(color))
 
-    def _update_trace_color_(self):
+    def _update_trace_color_(self, frame_trace):
         """Update the color change of the SVG track in the frame.
+
+        Args:
+            frame_trace (list((node/edge, (R,G,B), bool))): The node(s) and edge(s) marked in this frame.
         """
         for k, color in self._frame_trace_old:
             if type(k) == tuple and k in self._edge_tcs.keys():
-                if (k, color, False) not in self._frame_trace and (k, color, True) not in self._frame_trace:
+                if (k, color, False) not in frame_trace and (k, color, True) not in frame_trace:
                     self._edge_tcs[k].remove(color)
                 edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
-                edge = find_tag_by_id(self._svg, 'g', edge_id)
+                edge = self._svg.getElementById(edge_id)
                 self._update_edge_color_(edge, self._edge_tcs[k].color())
             elif k in self._node_tcs.keys():
-                if (k, color, False) not in self._frame_trace and (k, color, True) not in self._frame_trace:
+                if (k, color, False) not in frame_trace and (k, color, True) not in frame_trace:
                     self._node_tcs[k].remove(color)
                 node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
-                node = find_tag_by_id(self._svg, 'g', node_id)
+                node = self._svg.getElementById(node_id)
                 self._update_node_color_(node, self._node_tcs[k].color())
         self._frame_trace_old.clear()
-        for k, color, hold in self._frame_trace:
+        for k, color, hold in frame_trace:
             if type(k) == tuple:
                 edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
-                edge = find_tag_by_id(self._svg, 'g', edge_id)
+                edge = self._svg.getElementById(edge_id)
                 self._update_edge_color_(edge, self._edge_tcs[k].color())
             else:
                 node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
-                node = find_tag_by_id(self._svg, 'g', node_id)
+                node = self._svg.getElementById(node_id)
                 self._update_node_color_(node, self._node_tcs[k].color())
             if not hold:
                 self._frame_trace_old.append((k, color))
-        self._frame_trace.clear()
 
     def _update_svg_size_(self, new_svg):
         """Adjust the view size of self._svg to ensure that all elements can be observed.
 
         Args:
-            new_svg (xmldom.Document): The latest SVG object to be updated.
+            new_svg (SvgDocument): The latest SVG object to be updated.
         """
-        old_svg_node = self._svg.getElementsByTagName('svg')[0]
-        new_svg_node = new_svg.getElementsByTagName('svg')[0]
+        old_svg_node = self._svg.documentElement
+        new_svg_node = new_svg.documentElement
         old_svg_width = int(old_svg_node.getAttribute('width')[0:-2])
         old_svg_height = int(old_svg_node.getAttribute('height')[0:-2])
         new_svg_width = int(new_svg_node.getAttribute('width')[0:-2])
@@ -560,29 +733,30 @@ class SvgGraph():
         old_svg_node.setAttribute('width', '{}pt'.format(width))
         old_svg_node.setAttribute('height', '{}pt'.format(height))
         old_svg_node.setAttribute('viewBox', '0.00 0.00 {:.2f} {:.2f}'.format(width, height))
-        graph = find_tag_by_id(new_svg, 'g', 'graph0')
+        graph = new_svg.getElementById('graph0')
         clone_graph = graph.cloneNode(deep=False)
         clone_graph.setAttribute('id', 'graph1')
         old_svg_node.appendChild(clone_graph)
+        self._svg.indexElement(clone_graph)
 
-    def _update_svg_(self, new_svg, node_idmap, edge_idmap):
+    def _update_svg_(self, new_svg, frame):
         """Add all node and edge related animations into SVG.
 
         Args:
-            new_svg (xmldom.Doucment): The latest SVG object to be updated.
-            node_idmap (ConsecutiveIdMap): The two-way mapping relationship between the node ID in the memory and the ID in the SVG.
-            edge_idmap (ConsecutiveIdMap): The two-way mapping relationship between the edge ID in the memory and the ID in the SVG.
+            new_svg (SvgDocument): The latest SVG object to be updated.
+            frame (_SvgGraphFrame): The snapshot of this frame, with the id maps of new_svg and the appeared/disappeared nodes and edges.
         """
+        (node_idmap, edge_idmap) = (frame.node_idmap, frame.edge_idmap)
         old_pos = self._get_node_pos_(self._svg)
         new_pos = self._get_node_pos_(new_svg)
         old_edges = self._get_svg_edges_(self._svg)
         new_edges = self._get_svg_edges_(new_svg)
         has_disappear_animate = False
-        disappear_animate_end_time = self._delay * 0.2
+        disappear_animate_end_time = frame.delay * 0.2
         # Add the disappearing animation effect for the graph nodes.
         for old_node_id in old_pos.keys():
             old_node = self._node_idmap.toAttributeId(old_node_id)
-            if old_node in self._node_disappear:
+            if old_node in frame.node_disappear:
                 g = old_pos[old_node_id][0]
                 animate = self._svg.createElement('animate')
                 add_animate_appear_into_node(g, animate, (0, disappear_animate_end_time), False)
@@ -599,7 +773,7 @@ class SvgGraph():
         # Add the disappearing animation effect for the edge.
         for old_edge_id in old_edges.keys():
             (node1, node2) = self._edge_idmap.toAttributeId(old_edge_id)  # The ID value of the edge (start_node, end_node) in the memory.
-            if (node1, node2) in self._edge_disappear or node1 in self._node_move or node2 in self._node_move:
+            if (node1, node2) in frame.edge_disappear or node1 in self._node_move or node2 in self._node_move:
                 g = old_edges[old_edge_id]
                 animate = self._svg.createElement('animate')
                 add_animate_appear_into_node(g, animate, (0, disappear_animate_end_time), False)
@@ -607,7 +781,7 @@ class SvgGraph():
         # Add the moving animation effect for the graph nodes.
         has_move_animate = False
         move_animate_start_time = disappear_animate_end_time if has_disappear_animate else 0
-        move_animate_end_time = move_animate_start_time + (self._delay - move_animate_start_time) * 0.6
+        move_animate_end_time = move_animate_start_time + (frame.delay - move_animate_start_time) * 0.6
         for old_node_id in old_pos.keys():
             old_node = self._node_idmap.toAttributeId(old_node_id)
             if old_node in node_idmap._attr2id.keys():
@@ -621,44 +795,66 @@ class SvgGraph():
                     add_animate_move_into_node(g, animate, move, (move_animate_start_time, move_animate_end_time), False)
                     has_move_animate = True
         # Add the appearing animation effect for the graph nodes.
-        graph = find_tag_by_id(self._svg, 'g', 'graph1')
+        graph = self._svg.getElementById('graph1')
         appear_animate_start_time = move_animate_end_time if has_move_animate else move_animate_start_time
-        for old_node in self._node_appear:
+        for old_node in frame.node_appear:
             new_node_id = node_idmap.toConsecutiveId(old_node)
             old_node_id = self._node_idmap.toConsecutiveId(old_node)
             clone_node = new_pos[new_node_id][0].cloneNode(deep=True)
             clone_node.setAttribute('id', 'node{}'.format(old_node_id))
             graph.appendChild(clone_node)
             animate = self._svg.createElement('animate')
-            add_animate_appear_into_node(clone_node, animate, (appear_animate_start_time, self._delay), True)
+            add_animate_appear_into_node(clone_node, animate, (appear_animate_start_time, frame.delay), True)
         # Add the appearing animation effect for the graph edges.
-        graph = find_tag_by_id(self._svg, 'g', 'graph1')
+        graph = self._svg.getElementById('graph1')
         for new_edge_id in new_edges.keys():
             (node1, node2) = edge_idmap.toAttributeId(new_edge_id)
-            if (node1, node2) in self._edge_appear or node1 in self._node_move or node2 in self._node_move:
+            if (node1, node2) in frame.edge_appear or node1 in self._node_move or node2 in self._node_move:
                 old_edge_id = self._edge_idmap.toConsecutiveId((node1, node2))
                 clone_edge = new_edges[new_edge_id].cloneNode(deep=True)
                 clone_edge.setAttribute('id', 'edge{}'.format(old_edge_id))
                 graph.appendChild(clone_edge)
                 animate = self._svg.createElement('animate')
-                add_animate_appear_into_node(clone_edge, animate, (appear_animate_start_time, self._delay), True)
+                add_animate_appear_into_node(clone_edge, animate, (appear_animate_start_time, frame.delay), True)
         # Add node/edge label text zoom in/out animations.
-        self._update_svg_nodes_label(self._svg, self._node_idmap)
-        self._nodes_label_update.clear()
-        self._update_svg_edges_label(self._svg, self._edge_idmap)
-        self._edges_lable_update.clear()
+        self._update_svg_nodes_label(self._svg, self._node_idmap, frame)
+        self._update_svg_edges_label(self._svg, self._edge_idmap, frame)
 
     def _get_node_pos_(self, svg):
         """Get the absolute coordinates of all the graph node(s) in the SVG.
 
         Args:
-            svg (xmldom.Document): The SVG object to be display.
+            svg (SvgDocument): The SVG object to be display.
 
         Returns:
-            dict(int:tuple(xmldom.Node,float,float)): The map from SVG_node_id to the SVG_node_object and node position.
+            dict(int:tuple(SvgElement,float,float)): The map from SVG_node_id to the SVG_node_object and node position.
                 Key is SVG_node_id, value is (SVG_node_object, position_x, position_y).
         """
-        graph = find_tag_by_id(svg, 'g', 'graph0')
+        return self._get_svg_geometry_(svg)[0]
+
+    def _get_svg_edges_(self, svg):
+        """Get all the edges index and object in the SVG xml tree.
+
+        Args:
+            svg (SvgDocument): The SVG object to be display.
+
+        Returns:
+            dict(int:SvgElement): Key is the edge index in SVG, Value is the edge node in SVG.
+        """
+        return self._get_svg_geometry_(svg)[1]
+
+    def _get_svg_geometry_(self, svg):
+        """Collect the node positions and the edges from the id and class index of the parsed SVG.
+
+        The result is cached, so each SVG is only collected once, when it's created and when it's the
+        last frame. The animations added later don't change the positions.
+
+        Returns:
+            (dict(int:tuple(SvgElement,float,float)), dict(int:SvgElement)): The node positions and edges.
+        """
+        if svg in self._svg_geometry:
+            return self._svg_geometry[svg]
+        graph = svg.getElementById('graph0')
         transform = graph.getAttribute('transform')
         translate_index = transform.find('translate')
         delt_x, delt_y = 0, 0
@@ -668,32 +864,18 @@ class SvgGraph():
             translate = transform[st:ed].split(' ')
             delt_x, delt_y = float(translate[0]), float(translate[1])
         positions = dict()
-        nodes = svg.getElementsByTagName('g')
-        for node in nodes:
-            if node.getAttribute('class') == 'node':
-                node_id = int(node.getAttribute('id')[4:])
-                ellipse = node.getElementsByTagName('ellipse')[0]
-                cx = float(ellipse.getAttribute('cx')) + delt_x
-                cy = float(ellipse.getAttribute('cy')) + delt_y
-                positions[node_id] = (node, cx, cy)
-        return positions
-
-    def _get_svg_edges_(self, svg):
-        """Get all the edges index and object in the SVG xml tree.
-
-        Args:
-            svg (xmldom.Document): The SVG object to be display.
-
-        Returns:
-            dict(int:xmldom.Node): Key is the edge index in SVG, Value is the edge node in SVG.
-        """
+        for node in svg.getElementsByClassName('node'):
+            node_id = int(node.getAttribute('id')[4:])
+            ellipse = node.getElementsByTagName('ellipse')[0]
+            cx = float(ellipse.getAttribute('cx')) + delt_x
+            cy = float(ellipse.getAttribute('cy')) + delt_y
+            positions[node_id] = (node, cx, cy)
         edges = dict()
-        nodes = svg.getElementsByTagName('g')
-        for node in nodes:
-            if node.getAttribute('class') == 'edge':
-                edge_id = int(node.getAttribute('id')[4:])
-                edges[edge_id] = node
-        return edges
+        for edge in svg.getElementsByClassName('edge'):
+            edge_id = int(edge.getAttribute('id')[4:])
+            edges[edge_id] = edge
+        self._svg_geometry[svg] = (positions, edges)
+        return (positions, edges)
 
     def _make_edge_tuple_(self, node1, node2):
         """Create an edge tuple according to nodes and the graph's type.
@@ -709,19 +891,143 @@ class SvgGraph():
             else:
                 return (node2, node1)
 
-    def _create_svg_(self):
-        """Call graphviz lib to create a new SVG object to represent the latest graph.
+    def _create_svg_(self, frame):
+        """Call graphviz lib to create a new SVG object to represent the graph of the frame.
         The SVG is static and don't include animations.
 
+        If the topology and the layout related attributes of the graph are the same as the last
+        rendered graph, the last graphviz output will be reused and only the node labels are patched.
+        Trees and undirected graphs are layout by the built-in layout engines without calling graphviz.
+
+        Args:
+            frame (_SvgGraphFrame): The snapshot of the graph to layout.
+
         Returns:
-            xmldom.Document: The xmldom.Document object of the SVG.
+            SvgDocument: The SvgDocument object of the SVG.
 
         Raises:
             AlgvizFatalError: Unsupported graphviz version xxx.
         """
-        dot = None
+        (node_labels, edges, layout_key) = (frame.node_labels, frame.edges, frame.layout_key)
+        if self._layout_cache is not None and self._layout_cache[0] == layout_key:
+            svg = parse_svg(self._layout_cache[1])
+            if _patch_svg_nodes_label_(svg, self._layout_cache[2], node_labels):
+                return svg
+        raw_svg_str = None
+        if frame.layout_prefetch is not None and frame.layout_prefetch[0] == layout_key:
+            raw_svg_str = frame.layout_prefetch[1]
+        if raw_svg_str is None:
+            nodes = [frame.node_idmap.toAttributeId(i + 1) for i in range(len(node_labels))]
+            raw_svg_str = self._render_builtin_(nodes, node_labels, edges)
+        if raw_svg_str is None:
+            raw_svg_str = self._render_graphviz_(node_labels, edges)
+        self._layout_cache = (layout_key, raw_svg_str, node_labels)
+        return parse_svg(raw_svg_str)
+
+    def _layout_input_(self):
+        """Collect the information needed by graphviz to layout the graph.
+
+        The edges are arranged by their start nodes, and in the neighbors order of each start node.
+
+        Returns:
+            (ConsecutiveIdMap, ConsecutiveIdMap, list((str, str)), list((int, int, str)), tuple):
+                The node and edge id maps, the (label, font_size) of each node, the (start node id, end node id, label)
+                of each edge, and the layout key which identify the graphviz layout result.
+        """
         node_idmap = ConsecutiveIdMap(1)
         edge_idmap = ConsecutiveIdMap(1)
+        node_labels = list()
+        node_layout_keys = list()
+        for node in self._node_seq:
+            node_idmap.toConsecutiveId(node)
+            if node is None:
+                label, font_size = None, None
+            else:
+                label = str(node)
+                font_size = '{:.2f}'.format(min(14, text_font_size(SVG_GRAPH_NODE_WIDTH, label)))
+            node_labels.append((label, font_size))
+            node_layout_keys.append(_node_layout_key_(label, font_size))
+        edges = list()
+        for node in self._node_seq:
+            for (edge_key, _) in self._node_edges.get(node, ()):
+                if edge_key in edge_idmap._attr2id:
+                    continue    # The undirected edge is already added by the other node.
+                label = self._edge_label[edge_key]
+                if label is not None:
+                    label = '{}'.format(label)
+                edges.append((node_idmap.toConsecutiveId(edge_key[0]), node_idmap.toConsecutiveId(edge_key[1]), label))
+                edge_idmap.toConsecutiveId(edge_key)
+        layout_key = (self._directed, self._type.rankdir, self._type.shape, self._type.engine, FONT_FAMILY,
+                      tuple(node_layout_keys), tuple(edges))
+        return (node_idmap, edge_idmap, node_labels, edges, layout_key)
+
+    def _layout_job_(self):
+        """Get the graphviz job to layout the graph of next frame, used to layout several graphs concurrently.
+
+        Returns:
+            (tuple, str, str)/None: The (layout key, DOT source, engine) of the graph, None if no need to call graphviz.
+        """
+        if self._builtin_layout_() is not None:
+            return None
+        self._sync_topology_()
+        (_, _, node_labels, edges, layout_key) = self._layout_input_()
+        if self._layout_cache is not None and self._layout_cache[0] == layout_key:
+            return None
+        dot = self._build_dot_(node_labels, edges)
+        return (layout_key, dot.source, dot.engine)
+
+    def _builtin_layout_(self):
+        """Choose the built-in layout engine which can be used instead of graphviz.
+
+        Returns:
+            str/None: 'tree' for the directed trees (fall back to graphviz if the graph is not a forest),
+                'force' for the undirected graphs if numpy is installed (the 'force' extra of algviz),
+                None to use graphviz.
+        """
+        if self._type.engine == 'tree' and self._directed:
+            return 'tree'
+        if not self._directed and force_layout_supported():
+            return 'force'
+        return None
+
+    def _render_builtin_(self, nodes, node_labels, edges):
+        """Layout the graph by the built-in layout engine.
+
+        Args:
+            nodes (list(node)): The nodes of the graph in the order of node_labels.
+            node_labels (list((str, str))): The (label, font_size) of each node, the SVG node id is index + 1.
+            edges (list((int, int, str))): The (SVG start node id, SVG end node id, label) of each edge.
+
+        Returns:
+            str/None: The SVG string in graphviz format, None if the graph should be layout by graphviz.
+        """
+        layout = self._builtin_layout_()
+        if layout == 'tree':
+            return layout_tree(node_labels, edges)
+        elif layout == 'force':
+            init_positions = [self._force_positions.get(node) for node in nodes]
+            res = layout_force(node_labels, edges, init_positions)
+            if res is None:
+                return None
+            (raw_svg_str, positions) = res
+            self._force_positions = dict(zip(nodes, positions))
+            return raw_svg_str
+        return None
+
+    def _build_dot_(self, node_labels, edges):
+        """Build the DOT graph to be layout by graphviz.
+
+        Args:
+            node_labels (list((str, str))): The (label, font_size) of each node, the SVG node id is index + 1.
+            edges (list((int, int, str))): The (SVG start node id, SVG end node id, label) of each edge.
+
+        Returns:
+            graphviz.Digraph/graphviz.Graph: The graphviz graph object.
+        """
+        # graphviz is imported on first use, it's not needed by the graphs laid out without graphviz.
+        from graphviz import Digraph as graphviz_Digraph
+        from graphviz import Graph as graphviz_Graph
+        dot = None
         if self._directed:
             dot = graphviz_Digraph(format='svg')
         else:
@@ -731,35 +1037,164 @@ class SvgGraph():
         dot.graph_attr['bgcolor'] = '#00000000'
         dot.node_attr.update(shape=self._type.shape, fixedsize='shape', color='#7B7B7B', fontname=FONT_FAMILY)
         dot.edge_attr.update(arrowhead='vee', color='#7B7B7B', fontname=FONT_FAMILY)
-        for node in self._node_seq:
-            node_id = node_idmap.toConsecutiveId(node)
-            if node is None:
-                dot.node(name='{}'.format(node_id))
+        for i in range(len(node_labels)):
+            (label, font_size) = node_labels[i]
+            if label is None:
+                dot.node(name='{}'.format(i + 1))
             else:
-                fs = min(14, text_font_size(SVG_GRAPH_NODE_WIDTH, str(node)))
-                dot.node(name='{}'.format(node_id), label='{}'.format(str(node)), fontsize='{:.2f}'.format(fs))
-        for (node1, node2) in self._edge_label.keys():
-            label = self._edge_label[(node1, node2)]
-            node1_id = node_idmap.toConsecutiveId(node1)
-            node2_id = node_idmap.toConsecutiveId(node2)
+                dot.node(name='{}'.format(i + 1), label=label, fontsize=font_size)
+        for (node1_id, node2_id, label) in edges:
             if label is None:
                 dot.edge('{}'.format(node1_id), '{}'.format(node2_id))
             else:
-                dot.edge('{}'.format(node1_id), '{}'.format(node2_id), label='{}'.format(label), fontcolor='#C0C0C0', fontsize='12')
-            edge_idmap.toConsecutiveId((node1, node2))
-        raw_svg_str = ''
-        if hasattr(dot, '_repr_svg_') and callable(getattr(dot, '_repr_svg_')):
-            try:
-                raw_svg_str = dot._repr_svg_()
-            except Exception as e:
-                raise AlgvizFatalError('Error when rendering graph:{}'.format(e))
-        elif hasattr(dot, '_repr_image_svg_xml') and callable(getattr(dot, '_repr_image_svg_xml')):
-            # graphviz replaced interface '_repr_svg_' since version 0.19
-            # Link: https://graphviz.readthedocs.io/en/stable/changelog.html#version-0-19
-            try:
-                raw_svg_str = dot._repr_image_svg_xml()
-            except Exception as e:
-                raise AlgvizFatalError('Error when rendering graph:{}'.format(e))
-        else:
-            raise AlgvizFatalError('Unsupported graphviz version {}'.format(graphviz_version))
-        return (mindom_parseString(raw_svg_str), node_idmap, edge_idmap)
+                dot.edge('{}'.format(node1_id), '{}'.format(node2_id), label=label, fontcolor='#C0C0C0', fontsize='12')
+        return dot
+
+    def _render_graphviz_(self, node_labels, edges):
+        """Call graphviz to layout the graph.
+
+        The layout cache on the disk is checked first if it's enabled. The long-lived graphviz worker
+        processes are used if possible, otherwise call the graphviz lib.
+
+        Args:
+            node_labels (list((str, str))): The (label, font_size) of each node, the SVG node id is index + 1.
+            edges (list((int, int, str))): The (SVG start node id, SVG end node id, label) of each edge.
+
+        Returns:
+            str: The raw SVG string output by graphviz.
+
+        Raises:
+            AlgvizFatalError: Unsupported graphviz version xxx.
+        """
+        dot = self._build_dot_(node_labels, edges)
+        cache = get_layout_cache()
+        if cache is not None:
+            raw_svg_str = cache.get(dot.source, dot.engine)
+            if raw_svg_str is not None:
+                return raw_svg_str
+        raw_svg_str = _call_graphviz_(dot)
+        if cache is not None:
+            cache.put(dot.source, dot.engine, raw_svg_str)
+        return raw_svg_str
+
+
+def _call_graphviz_(dot):
+    """Layout the DOT graph by the graphviz worker pool or the graphviz lib.
+
+    Returns:
+        str: The raw SVG string output by graphviz.
+
+    Raises:
+        AlgvizFatalError: Unsupported graphviz version xxx.
+    """
+    raw_svg_str = get_graphviz_pool().render(dot.source, dot.engine)
+    if raw_svg_str is not None:
+        return raw_svg_str
+    if hasattr(dot, '_repr_svg_') and callable(getattr(dot, '_repr_svg_')):
+        try:
+            raw_svg_str = dot._repr_svg_()
+        except Exception as e:
+            raise AlgvizFatalError('Error when rendering graph:{}'.format(e))
+    elif hasattr(dot, '_repr_image_svg_xml') and callable(getattr(dot, '_repr_image_svg_xml')):
+        # graphviz replaced interface '_repr_svg_' since version 0.19
+        # Link: https://graphviz.readthedocs.io/en/stable/changelog.html#version-0-19
+        try:
+            raw_svg_str = dot._repr_image_svg_xml()
+        except Exception as e:
+            raise AlgvizFatalError('Error when rendering graph:{}'.format(e))
+    else:
+        from graphviz import __version__ as graphviz_version
+        raise AlgvizFatalError('Unsupported graphviz version {}'.format(graphviz_version))
+    return raw_svg_str
+
+
+def prefetch_graphs_layout(graphs):
+    """Layout the graphs to be displayed in the same frame concurrently by the graphviz worker pool.
+
+    The results are cached in each SvgGraph and used by their next `_repr_svg_` call.
+    The layouts found in the layout cache on the disk are not sent to graphviz.
+
+    Args:
+        graphs (list(SvgGraph)): The graphs to be displayed in this frame.
+    """
+    pool = get_graphviz_pool()
+    cache = get_layout_cache()
+    if cache is None and not pool.available('dot') and not pool.available('neato'):
+        return
+    targets, jobs = list(), list()
+    for graph in graphs:
+        job = graph._layout_job_()
+        if job is None:
+            continue
+        if cache is not None:
+            raw_svg_str = cache.get(job[1], job[2])
+            if raw_svg_str is not None:
+                graph._layout_prefetch = (job[0], raw_svg_str)
+                continue
+        targets.append((graph, job[0]))
+        jobs.append((job[1], job[2]))
+    if len(jobs) < 2:
+        return
+    results = pool.render_many(jobs)
+    for ((graph, layout_key), job, raw_svg_str) in zip(targets, jobs, results):
+        if raw_svg_str is not None:
+            graph._layout_prefetch = (layout_key, raw_svg_str)
+            if cache is not None:
+                cache.put(job[0], job[1], raw_svg_str)
+
+
+def _node_layout_key_(label, font_size):
+    """Get the part of node label which may affect the graphviz layout.
+
+    The node shape has fixed size, so a plain label only affects the layout by its font size and line number.
+    Other labels (empty, escape sequences, repeated or edge spaces) are kept as they are, since they can not be
+    patched into the SVG directly.
+
+    Returns:
+        tuple: The layout key of this node.
+    """
+    if label is None or not _is_label_patchable_(label):
+        return (label, font_size)
+    return (font_size, label.count('\n') + 1)
+
+
+def _is_label_patchable_(label):
+    """Check if graphviz outputs one <text> with the same content for each line of the label.
+    """
+    if '\\' in label or '  ' in label:
+        return False
+    for line in label.split('\n'):
+        if line == '' or line.strip() != line:
+            return False
+    return True
+
+
+def _patch_svg_nodes_label_(svg, old_labels, new_labels):
+    """Replace the text content of the nodes whose label has changed in the graphviz output SVG.
+
+    Args:
+        svg (SvgDocument): The SVG object output by graphviz with old_labels.
+        old_labels, new_labels (list((str, str))): The (label, font_size) of each node.
+
+    Returns:
+        bool: Return False if some labels can't be patched.
+    """
+    changed_nodes = dict()
+    for i in range(len(new_labels)):
+        if old_labels[i] != new_labels[i]:
+            changed_nodes['node{}'.format(i + 1)] = new_labels[i][0]
+    if len(changed_nodes) == 0:
+        return True
+    for (node_id, label) in changed_nodes.items():
+        g = svg.getElementById(node_id)
+        if g is None:
+            return False
+        lines = label.split('\n')
+        texts = g.getElementsByTagName('text')
+        if len(texts) != len(lines):
+            return False
+        for (t, line) in zip(texts, lines):
+            for child in list(t.childNodes):
+                t.removeChild(child)
+            t.appendChild(svg.createTextNode(line))
+    return True
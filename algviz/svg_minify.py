@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+"""Minify the exported svg animation.
+
+The exported svg carries a lot of repetitive text: the numbers formatted with two decimals, the same
+fill/stroke/font attributes on thousands of elements and the long animation ids. SvgMinifier shrinks
+the frame groups one by one before they are written, so it works with the streaming export:
+
+- Round the numbers in the attribute values to the given precision and strip the trailing zeros.
+- Move the repeated styling attributes into the CSS classes, the rules are written at the end of the svg.
+- Rename the ids (and the references in the animation timing) into short names, the numeric ids are kept
+  since they are short already and never collide with the new names.
+- Drop the attributes with default values.
+
+Author: zjl9959@gmail.com
+
+License: GPLv3
+
+"""
+
+import re
+import string
+
+
+MINIFY_PRECISION = 1    # The default number of decimals kept in the minified svg.
+
+# The styling attributes which can be moved into the CSS classes.
+STYLE_ATTRIBUTES = ('fill', 'stroke', 'stroke-width', 'stroke-dasharray', 'font-family',
+                    'font-size', 'font-weight', 'font-style', 'text-anchor')
+# The styling attributes set by the existing CSS classes (see utility.add_default_text_style). The CSS rules
+# override the attributes, so these attributes are kept inline to keep the rules taking effect. The styling
+# attributes of the elements with other classes (eg: the logo) are all kept inline.
+CLASS_STYLE_ATTRIBUTES = {'txt': ('text-anchor', 'font-family')}
+# The styling attributes which need the unit in CSS.
+CSS_LENGTH_ATTRIBUTES = ('font-size', 'stroke-width')
+
+ANIMATION_TAGS = ('animate', 'animateMotion', 'animateTransform', 'animateColor', 'set')
+
+# The non-inherited attributes with default values, dropping an inherited one may change the value inherited
+# from the parent element.
+DEFAULT_ATTRIBUTES = {'x': '0', 'y': '0', 'dx': '0', 'dy': '0', 'opacity': '1'}
+ANIMATION_DEFAULT_ATTRIBUTES = {'fill': 'remove', 'additive': 'replace', 'accumulate': 'none', 'restart': 'always'}
+
+# The attributes whose numbers are not rounded, only the trailing zeros are stripped: the time values and the
+# transforms (a rounded scale factor is multiplied to all the coordinates).
+UNROUNDED_ATTRIBUTES = ('begin', 'end', 'dur', 'keyTimes', 'transform')
+# The attributes which are the names or references.
+NAME_ATTRIBUTES = ('id', 'class', 'href', 'xlink:href', 'attributeName')
+
+_NUMBER_PATTERN = re.compile(r'-?\d+\.\d+(?:[eE][-+]?\d+)?')
+_LENGTH_PATTERN = re.compile(r'-?\d+(\.\d+)?')     # The length without unit.
+_TIME_REFERENCE_PATTERN = re.compile(r'([A-Za-z_][\w\-]*)\.(begin|end)\b')
+_URL_REFERENCE_PATTERN = re.compile(r'url\(#([^)]+)\)')
+
+_NAME_START_CHARS = string.ascii_letters
+_NAME_CHARS = string.ascii_letters + string.digits
+
+
+def open_svg_file(path):
+    """Open the file to write the svg animation, the file is gzip compressed (svgz) if path ends with .svgz.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        file: The text file object opened for writing.
+    """
+    if path.endswith('.svgz'):
+        import gzip
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+class SvgMinifier:
+    """Minify the xml.dom.minidom elements of one svg animation in place.
+
+    The ids and CSS classes are shared by all the elements minified by the same SvgMinifier, so a new one
+    should be created for each exported svg.
+    """
+
+    def __init__(self, precision=MINIFY_PRECISION):
+        """
+        Args:
+            precision (int): The number of decimals kept when rounding the numbers.
+        """
+        self._precision = precision
+        self._ids = dict()              # Key:original id; Value:short id.
+        self._style_counts = dict()     # Key:styling attributes tuple; Value:the times it appears.
+        self._style_classes = dict()    # Key:styling attributes tuple; Value:CSS class name.
+
+    def minify(self, node):
+        """Minify the node and all its descendant elements.
+
+        Args:
+            node (xml.dom.minidom.Element): The element to minify.
+        """
+        node_stack = [node]
+        while len(node_stack) > 0:
+            element = node_stack.pop()
+            if element.nodeType != element.ELEMENT_NODE:
+                continue
+            self._minify_element_(element)
+            node_stack.extend(reversed(element.childNodes))
+
+    def style_element(self, dom):
+        """Create the style element with the CSS rules of the styling attributes moved into classes.
+
+        Args:
+            dom (xml.dom.minidom.Document): The document to create the element.
+
+        Returns:
+            xml.dom.minidom.Element/None: The style element, None if no CSS class is created.
+        """
+        if len(self._style_classes) == 0:
+            return None
+        rules = list()
+        for key, name in self._style_classes.items():
+            declarations = list()
+            for (attr, value) in key:
+                if attr in CSS_LENGTH_ATTRIBUTES and _LENGTH_PATTERN.fullmatch(value):
+                    value += 'px'
+                declarations.append('{}:{}'.format(attr, value))
+            rules.append('.{}{{{}}}'.format(name, ';'.join(declarations)))
+        style = dom.createElement('style')
+        style.appendChild(dom.createTextNode(''.join(rules)))
+        return style
+
+    def _minify_element_(self, element):
+        is_animation = element.tagName in ANIMATION_TAGS
+        defaults = ANIMATION_DEFAULT_ATTRIBUTES if is_animation else DEFAULT_ATTRIBUTES
+        for (attr, value) in list(element.attributes.items()):
+            if attr == 'id':
+                value = self._short_id_(value)
+            elif attr in ('href', 'xlink:href') and value.startswith('#'):
+                value = '#' + self._short_id_(value[1:])
+            elif attr in UNROUNDED_ATTRIBUTES or element.tagName == 'animateTransform':
+                if attr in ('begin', 'end'):
+                    value = _TIME_REFERENCE_PATTERN.sub(lambda m: self._short_id_(m.group(1)) + '.' + m.group(2), value)
+                value = _NUMBER_PATTERN.sub(lambda m: _strip_zeros_(m.group(0)), value)
+            elif attr not in NAME_ATTRIBUTES:
+                value = _NUMBER_PATTERN.sub(self._round_number_, value)
+                value = _URL_REFERENCE_PATTERN.sub(lambda m: 'url(#{})'.format(self._short_id_(m.group(1))), value)
+            if defaults.get(attr) == value:
+                element.removeAttribute(attr)
+            else:
+                element.setAttribute(attr, value)
+        if not is_animation:
+            self._move_style_into_class_(element)
+
+    def _move_style_into_class_(self, element):
+        # The attributes changed by the animations are kept, the CSS rules would override the animated values.
+        kept = set()
+        for child in element.childNodes:
+            if child.nodeType == child.ELEMENT_NODE and child.tagName in ANIMATION_TAGS:
+                kept.add(child.getAttribute('attributeName'))
+        for class_name in element.getAttribute('class').split():
+            if class_name not in CLASS_STYLE_ATTRIBUTES:
+                return
+            kept.update(CLASS_STYLE_ATTRIBUTES[class_name])
+        key = list()
+        for attr in STYLE_ATTRIBUTES:
+            if not element.hasAttribute(attr) or attr in kept:
+                continue
+            value = element.getAttribute(attr)
+            if ';' in value or '{' in value or '}' in value:
+                continue
+            key.append((attr, value))
+        if len(key) == 0:
+            return
+        key = tuple(key)
+        # The styling attributes appear only once are kept inline.
+        if key not in self._style_classes:
+            count = self._style_counts.get(key, 0) + 1
+            self._style_counts[key] = count
+            if count < 2:
+                return
+            self._style_classes[key] = '_' + _short_name_(len(self._style_classes))
+            self._style_counts.pop(key)
+        for (attr, _) in key:
+            element.removeAttribute(attr)
+        class_name = self._style_classes[key]
+        if element.hasAttribute('class'):
+            class_name = element.getAttribute('class') + ' ' + class_name
+        element.setAttribute('class', class_name)
+
+    def _short_id_(self, element_id):
+        if element_id.isdigit():
+            return element_id
+        if element_id not in self._ids:
+            self._ids[element_id] = _short_name_(len(self._ids))
+        return self._ids[element_id]
+
+    def _round_number_(self, match):
+        return _strip_zeros_('{:.{}f}'.format(float(match.group(0)), self._precision))
+
+
+def _strip_zeros_(number):
+    """
+    Returns:
+        str: The number string without the trailing zeros after the decimal point.
+    """
+    if '.' in number and 'e' not in number.lower():
+        number = number.rstrip('0').rstrip('.')
+    if number == '-0':
+        number = '0'
+    return number
+
+
+def _short_name_(index):
+    """
+    Returns:
+        str: An unique name of the index, starts with a letter and followed by letters or digits.
+    """
+    name = _NAME_START_CHARS[index % len(_NAME_START_CHARS)]
+    index //= len(_NAME_START_CHARS)
+    while index > 0:
+        name += _NAME_CHARS[index % len(_NAME_CHARS)]
+        index //= len(_NAME_CHARS)
+    return name
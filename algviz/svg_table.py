@@ -12,11 +12,11 @@ License: GPLv3
 
 """
 
-from xml.dom.minidom import Document, Node
+from algviz.svg_element import SvgDocument, TEXT_NODE
 from algviz.utility import add_desc_into_svg, add_default_text_style, rgbcolor2str, text_font_size, FONT_FAMILY
-from algviz.utility import auto_text_color, find_tag_by_id, str2rgbcolor, clamp, add_animate_scale_into_text
-from algviz.utility import add_animate_move_into_node, add_animate_appear_into_node, clear_svg_animates
-from algviz.utility import layout_text
+from algviz.utility import auto_text_color, str2rgbcolor, clamp, add_animate_scale_into_text
+from algviz.utility import add_animate_move_into_node, add_animate_appear_into_node
+from algviz.utility import layout_box_text
 
 
 class SvgTable():
@@ -27,8 +27,10 @@ class SvgTable():
             width (float): The width of svg table.
             heigt (float): The height of svg table.
         """
-        self._dom = Document()
+        self._dom = SvgDocument()
         self._cur_id = 0
+        self._gid2elem = dict()     # Map the unique ID of each element into it's <g> node in svg.
+        self._animates = list()     # The animation nodes added in current frame: list((kind, g, node, animate)).
         self._svg = self._dom.createElement('svg')
         self._svg.setAttribute('width', '{:.0f}pt'.format(width))
         self._svg.setAttribute('height', '{:.0f}pt'.format(height))
@@ -70,27 +72,26 @@ class SvgTable():
         g = self._dom.createElement('g')
         g.setAttribute('id', gid)
         self._svg.appendChild(g)
+        self._gid2elem[int(gid)] = g
         r = self._dom.createElement('rect')
-        r.setAttribute('x', '{:.2f}'.format(rect[0]))
-        r.setAttribute('y', '{:.2f}'.format(rect[1]))
-        r.setAttribute('width', '{:.2f}'.format(rect[2]))
-        r.setAttribute('height', '{:.2f}'.format(rect[3]))
+        r.setAttribute('x', rect[0])
+        r.setAttribute('y', rect[1])
+        r.setAttribute('width', rect[2])
+        r.setAttribute('height', rect[3])
         if angle is True:
-            r.setAttribute('rx', '{:.2f}'.format(min(rect[2], rect[3]) * 0.1))
-            r.setAttribute('ry', '{:.2f}'.format(min(rect[2], rect[3]) * 0.1))
+            r.setAttribute('rx', min(rect[2], rect[3]) * 0.1)
+            r.setAttribute('ry', min(rect[2], rect[3]) * 0.1)
         r.setAttribute('fill', rgbcolor2str(fill))
         r.setAttribute('stroke', rgbcolor2str(stroke))
         g.appendChild(r)
         if text is not None:
-            txt_font_size = min(rect[3] - 1, text_font_size(rect[2], '{}'.format(text)))
-            txt_font_size = max(txt_font_size, 4)
-            text_info = layout_text(str(text), rect[2], rect[3], txt_font_size)
+            (txt_font_size, text_info) = layout_box_text(str(text), rect[2], rect[3])
             for (s, pos_x, pos_y) in text_info:
                 t = self._dom.createElement('text')
                 t.setAttribute('class', 'txt')
-                t.setAttribute('x', '{:.2f}'.format(rect[0] + pos_x))
-                t.setAttribute('y', '{:.2f}'.format(rect[1] + pos_y))
-                t.setAttribute('font-size', '{:.2f}'.format(txt_font_size))
+                t.setAttribute('x', rect[0] + pos_x)
+                t.setAttribute('y', rect[1] + pos_y)
+                t.setAttribute('font-size', txt_font_size)
                 t.setAttribute('fill', auto_text_color(fill))
                 tt = self._dom.createTextNode('{}'.format(s))
                 t.appendChild(tt)
@@ -115,10 +116,11 @@ class SvgTable():
         g = self._dom.createElement('g')
         g.setAttribute('id', gid)
         self._svg.appendChild(g)
+        self._gid2elem[int(gid)] = g
         t = self._dom.createElement('text')
-        t.setAttribute('x', '{:.2f}'.format(pos[0]))
-        t.setAttribute('y', '{:.2f}'.format(pos[1]))
-        t.setAttribute('font-size', '{:.2f}'.format(font_size))
+        t.setAttribute('x', pos[0])
+        t.setAttribute('y', pos[1])
+        t.setAttribute('font-size', font_size)
         t.setAttribute('font-family', FONT_FAMILY)
         t.setAttribute('fill', rgbcolor2str(fill))
         tt = self._dom.createTextNode('{}'.format(text))
@@ -137,21 +139,21 @@ class SvgTable():
             fill ((R,G,B)): Stroke color of this text element. R, G, B stand for color channel for red, green, blue.
                 R,G,B should be int value and 0 <= R,G,B <= 255. eg:(0, 0, 0)
         """
-        g = find_tag_by_id(self._svg, 'g', str(gid))
+        g = self._gid2elem.get(gid)
         if g is None:
             return
         t = g.getElementsByTagName('text')
         for txt in t:
             if pos is not None:
-                txt.setAttribute('x', '{:.2f}'.format(pos[0]))
-                txt.setAttribute('y', '{:.2f}'.format(pos[1]))
+                txt.setAttribute('x', pos[0])
+                txt.setAttribute('y', pos[1])
             if text is not None:
                 for t_child in txt.childNodes:
                     txt.removeChild(t_child)
                 tt = self._dom.createTextNode('{}'.format(text))
                 txt.appendChild(tt)
             if font_size is not None:
-                txt.setAttribute('font-size', '{:.2f}'.format(font_size))
+                txt.setAttribute('font-size', font_size)
             if fill is not None:
                 txt.setAttribute('fill', rgbcolor2str(fill))
 
@@ -167,7 +169,7 @@ class SvgTable():
             opacity (float or None): New opacity arrtibute for this rectangle. Keep old opacity if opacity is None.
             delay (float): The total delay time of text scale animations.
         """
-        g = find_tag_by_id(self._svg, 'g', str(gid))
+        g = self._gid2elem.get(gid)
         if g is None:
             return
         rects = g.getElementsByTagName('rect')
@@ -182,18 +184,18 @@ class SvgTable():
             for t in text_nodes:
                 t.setAttribute('fill', auto_text_color(fill))
         if rect is not None:
-            r.setAttribute('x', '{:.2f}'.format(rect[0]))
-            r.setAttribute('y', '{:.2f}'.format(rect[1]))
-            r.setAttribute('width', '{:.2f}'.format(rect[2]))
-            r.setAttribute('height', '{:.2f}'.format(rect[3]))
+            r.setAttribute('x', rect[0])
+            r.setAttribute('y', rect[1])
+            r.setAttribute('width', rect[2])
+            r.setAttribute('height', rect[3])
             if r.getAttribute('rx') != '':
-                r.setAttribute('rx', '{:.2f}'.format(min(rect[2], rect[3]) * 0.1))
-                r.setAttribute('ry', '{:.2f}'.format(min(rect[2], rect[3]) * 0.1))
+                r.setAttribute('rx', min(rect[2], rect[3]) * 0.1)
+                r.setAttribute('ry', min(rect[2], rect[3]) * 0.1)
             texts = ['', '']
             split_text_nodes = [[], []]
             for t in text_nodes:
                 for child in t.childNodes:
-                    if child.nodeType == Node.TEXT_NODE:
+                    if child.nodeType == TEXT_NODE:
                         if t.getAttribute('font-size') == '0':
                             texts[0] += child.data + '\n'
                             split_text_nodes[0].append(t)
@@ -203,25 +205,23 @@ class SvgTable():
                         break
             for i in range(len(texts)):
                 temp_text = texts[i][0:-1]
-                new_font = text_font_size(rect[2], '{}'.format(temp_text))
-                new_font = max(4, min(new_font, rect[3] - 1))
-                text_info = layout_text(str(temp_text), rect[2], rect[3], new_font)
+                (new_font, text_info) = layout_box_text(temp_text, rect[2], rect[3])
                 for j in range(len(text_info)):
                     t = split_text_nodes[i][j]
                     (s, pos_x, pos_y) = text_info[j]
-                    t.setAttribute('x', '{:.2f}'.format(rect[0] + pos_x))
-                    t.setAttribute('y', '{:.2f}'.format(rect[1] + pos_y))
+                    t.setAttribute('x', rect[0] + pos_x)
+                    t.setAttribute('y', rect[1] + pos_y)
                     if t.getAttribute('font-size') == '0':
                         continue
                     for child in t.childNodes:
-                        if child.nodeType == Node.TEXT_NODE:
-                            t.setAttribute('font-size', '{:.2f}'.format(new_font))
+                        if child.nodeType == TEXT_NODE:
+                            t.setAttribute('font-size', new_font)
                             break
         if text is not None:
-            rx = float(r.getAttribute('x'))
-            ry = float(r.getAttribute('y'))
-            width = float(r.getAttribute('width'))
-            height = float(r.getAttribute('height'))
+            rx = r.getAttribute('x')
+            ry = r.getAttribute('y')
+            width = r.getAttribute('width')
+            height = r.getAttribute('height')
             fc = str2rgbcolor(r.getAttribute('fill'))
             time0 = (0, delay * 0.5)
             time1 = (delay * 0.6, delay)
@@ -229,22 +229,21 @@ class SvgTable():
                 font_size = float(t.getAttribute('font-size'))
                 animate0 = self._dom.createElement('animate')
                 add_animate_scale_into_text(t, animate0, time0, font_size, False)
-            txt_font_size = text_font_size(width, '{}'.format(text))
-            txt_font_size = min(height - 1, txt_font_size)
-            txt_font_size = max(txt_font_size, 4)
-            text_info = layout_text(str(text), width, height, txt_font_size)
+                self._animates.append(('scale', g, t, animate0))
+            (txt_font_size, text_info) = layout_box_text(str(text), width, height)
             for (s, pos_x, pos_y) in text_info:
                 t1 = self._dom.createElement('text')
                 g.appendChild(t1)
                 t1.setAttribute('class', 'txt')
-                t1.setAttribute('x', '{:.2f}'.format(rx + pos_x))
-                t1.setAttribute('y', '{:.2f}'.format(ry + pos_y))
+                t1.setAttribute('x', rx + pos_x)
+                t1.setAttribute('y', ry + pos_y)
                 t1.setAttribute('font-size', '0')
                 t1.setAttribute('fill', auto_text_color(fc))
                 tt = self._dom.createTextNode('{}'.format(s))
                 t1.appendChild(tt)
                 animate1 = self._dom.createElement('animate')
                 add_animate_scale_into_text(t1, animate1, time1, txt_font_size, True)
+                self._animates.append(('scale', g, t1, animate1))
         if stroke is not None:
             r.setAttribute('stroke', rgbcolor2str(stroke))
 
@@ -254,7 +253,7 @@ class SvgTable():
         Args:
             gid (int): The unique ID of the element to be deleted.
         """
-        g = find_tag_by_id(self._svg, 'g', str(gid))
+        g = self._gid2elem.pop(gid, None)
         if g is not None:
             self._svg.removeChild(g)
 
@@ -267,10 +266,11 @@ class SvgTable():
             time (tuple(float, float)): (begin, end) The begin and end time of this animation.
             bessel (bool): Whether to set the path of this move animation as bezier curve.
         """
-        g = find_tag_by_id(self._svg, 'g', str(gid))
+        g = self._gid2elem.get(gid)
         if g is not None:
             animate = self._dom.createElement('animateMotion')
             add_animate_move_into_node(g, animate, move, time, bessel)
+            self._animates.append(('move', g, g, animate))
 
     def add_animate_appear(self, gid, time, appear=True):
         """Add appear animate for specific element.
@@ -280,10 +280,11 @@ class SvgTable():
             time ((begin, end)): The begin and end time of this animation.
             appear (bool): True for appear animation; False for disappear animation.
         """
-        g = find_tag_by_id(self._svg, 'g', str(gid))
+        g = self._gid2elem.get(gid)
         if g is not None:
             animate = self._dom.createElement('animate')
             add_animate_appear_into_node(g, animate, time, appear)
+            self._animates.append(('appear', g, g, animate))
 
     def add_cursor_element(self, cursor, color=(123, 123, 123), name=None, dir='U'):
         """Add a cursor into SVG table.
@@ -308,6 +309,7 @@ class SvgTable():
         g = self._dom.createElement('g')
         g.setAttribute('id', gid)
         self._svg.appendChild(g)
+        self._gid2elem[int(gid)] = g
         # Create the arrow "^" node of the cursor.
         arrow_width = clamp(cursor[2] * 0.2, 4, 10) * 0.5
         arrow_top_x = cursor[0] + cursor[2]
@@ -362,17 +364,17 @@ class SvgTable():
                 txt_pos_x = cursor[0] - cursor[4] + txt_font_size * 0.5
                 txt_pos_y = cursor[1]
                 t.setAttribute('transform', 'rotate(-90, {}, {})'.format(txt_pos_x, txt_pos_y))
-            t.setAttribute('x', '{:.2f}'.format(txt_pos_x))
-            t.setAttribute('y', '{:.2f}'.format(txt_pos_y))
-            t.setAttribute('font-size', '{:.2f}'.format(txt_font_size))
+            t.setAttribute('x', txt_pos_x)
+            t.setAttribute('y', txt_pos_y)
+            t.setAttribute('font-size', txt_font_size)
             t.setAttribute('fill', rgbcolor2str(color))
             tt = self._dom.createTextNode('{}'.format(name))
             t.appendChild(tt)
             g.appendChild(t)
         # Create the tail line node of the cursor's arrow.
         svg_line = self._dom.createElement('line')
-        svg_line.setAttribute('x1', '{:.2f}'.format(arrow_top_x))
-        svg_line.setAttribute('y1', '{:.2f}'.format(arrow_top_y))
+        svg_line.setAttribute('x1', arrow_top_x)
+        svg_line.setAttribute('y1', arrow_top_y)
         svg_line.setAttribute('stroke', rgbcolor2str(color))
         line_x2, line_y2 = arrow_top_x, max(arrow_top_y + cursor[4] - txt_font_size * 1.1, arrow_top_y)
         if dir == 'D':
@@ -383,8 +385,8 @@ class SvgTable():
         elif dir == 'R':
             line_x2 = min(arrow_top_x - cursor[4] + txt_font_size * 1.1, arrow_top_x)
             line_y2 = arrow_top_y
-        svg_line.setAttribute('x2', '{:.2f}'.format(line_x2))
-        svg_line.setAttribute('y2', '{:.2f}'.format(line_y2))
+        svg_line.setAttribute('x2', line_x2)
+        svg_line.setAttribute('y2', line_y2)
         g.appendChild(svg_line)
         return int(gid)
 
@@ -395,7 +397,7 @@ class SvgTable():
             gid (int): The unique ID of the cursor to be updated.
             new_pos (delt_x:float, delt_y:float): New position of the cursor's arrow top, relative to cursor's old position.
         """
-        g = find_tag_by_id(self._svg, 'g', str(gid))
+        g = self._gid2elem.get(gid)
         if g is None:
             return
         # Update cursor arrow polyine's position.
@@ -412,31 +414,57 @@ class SvgTable():
         txts = g.getElementsByTagName('text')
         for t in txts:
             if t.hasAttribute('transform'):
-                text_pos_x = float(t.getAttribute('x')) - new_pos[1]
-                text_pos_y = float(t.getAttribute('y')) + new_pos[0]
+                text_pos_x = t.getAttribute('x') - new_pos[1]
+                text_pos_y = t.getAttribute('y') + new_pos[0]
             else:
-                text_pos_x = float(t.getAttribute('x')) + new_pos[0]
-                text_pos_y = float(t.getAttribute('y')) + new_pos[1]
-            t.setAttribute('x', '{:.2f}'.format(text_pos_x))
-            t.setAttribute('y', '{:.2f}'.format(text_pos_y))
+                text_pos_x = t.getAttribute('x') + new_pos[0]
+                text_pos_y = t.getAttribute('y') + new_pos[1]
+            t.setAttribute('x', text_pos_x)
+            t.setAttribute('y', text_pos_y)
         # Update cursor tail line's position.
         lines = g.getElementsByTagName('line')
         for svg_line in lines:
-            line_x1 = float(svg_line.getAttribute('x1')) + new_pos[0]
-            line_y1 = float(svg_line.getAttribute('y1')) + new_pos[1]
-            line_x2 = float(svg_line.getAttribute('x2')) + new_pos[0]
-            line_y2 = float(svg_line.getAttribute('y2')) + new_pos[1]
-            svg_line.setAttribute('x1', '{:.2f}'.format(line_x1))
-            svg_line.setAttribute('y1', '{:.2f}'.format(line_y1))
-            svg_line.setAttribute('x2', '{:.2f}'.format(line_x2))
-            svg_line.setAttribute('y2', '{:.2f}'.format(line_y2))
+            line_x1 = svg_line.getAttribute('x1') + new_pos[0]
+            line_y1 = svg_line.getAttribute('y1') + new_pos[1]
+            line_x2 = svg_line.getAttribute('x2') + new_pos[0]
+            line_y2 = svg_line.getAttribute('y2') + new_pos[1]
+            svg_line.setAttribute('x1', line_x1)
+            svg_line.setAttribute('y1', line_y1)
+            svg_line.setAttribute('x2', line_x2)
+            svg_line.setAttribute('y2', line_y2)
 
     def clear_animates(self):
         """Clear all the animations in this SvgTable.
+
+        Only the animation nodes recorded in this frame will be visited, so the cost
+        is proportional to the number of animations instead of the size of the svg.
         """
-        clear_svg_animates(self._svg)
+        for (kind, g, node, animate) in self._animates:
+            if animate.parentNode is not node:
+                continue
+            if kind == 'scale':
+                # Remove the zoomed out text, and fix the font size of the zoomed in text.
+                if node.parentNode is not g:
+                    continue
+                font_size = animate.getAttribute('to')
+                if font_size == '0':
+                    g.removeChild(node)
+                    continue
+                node.setAttribute('font-size', font_size)
+            elif kind == 'appear':
+                g.removeAttribute('style')
+            node.removeChild(animate)
+        self._animates.clear()
 
     def _repr_svg_(self):
         """Internal function for jupyter notebook display refresh.
         """
         return self._dom.toxml()
+
+    def _render_frame_(self):
+        """Internal function for the layouter to record one frame.
+
+        Returns:
+            (int, int, str): The width, height and content of this frame, see SvgDocument.frameContent.
+        """
+        return self._dom.frameContent()
@@ -389,6 +389,24 @@ class Table():
         Returns:
             str: The SVG representation of current table.
         """
+        return self._next_frame_(self._svg._repr_svg_)
+
+    def _render_frame_(self):
+        """
+        Returns:
+            (int, int, str): The width, height and content of current table frame, used by the layouter.
+        """
+        return self._next_frame_(self._svg._render_frame_)
+
+    def _next_frame_(self, render):
+        """Apply the changes since last frame, render the SVG and prepare for the next frame.
+
+        Args:
+            render (function): Render the SvgTable of this table, eg: SvgTable._repr_svg_.
+
+        Returns:
+            The render result.
+        """
         for (gid, color) in self._frame_trace_old:
             if (gid, color, True) not in self._frame_trace and (gid, color, False) not in self._frame_trace:
                 self._cell_tcs[gid].remove(color)
@@ -403,7 +421,7 @@ class Table():
         self._items_to_update.clear()
         self._row_cursor_mgr.refresh_cursors_animation(self._row, (0, self._delay))
         self._col_cursor_mgr.refresh_cursors_animation(self._col, (0, self._delay))
-        res_svg = self._svg._repr_svg_()
+        res_svg = render()
         self._svg.clear_animates()
         self._frame_trace.clear()
         self._row_cursor_mgr.update_cursors_position()
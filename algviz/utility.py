@@ -8,7 +8,9 @@ License: GPLv3
 
 """
 
+from bisect import bisect_right
 from colorsys import rgb_to_hls
+from functools import lru_cache
 
 
 _version = '0.3.1'                  # algviz version
@@ -16,6 +18,27 @@ _url = 'https://zjl9959.github.io/algviz'         # The homepage for algviz
 RANDOM_SEED = None
 KFATAL_HELP_INFO = """You can report this bug from link: https://github.com/zjl9959/algviz/issues"""
 FONT_FAMILY = 'Courier,monospace'
+# The (first, last) code points of the East Asian wide and fullwidth characters, which take two columns to display.
+_WIDE_CHAR_RANGES = (
+    (0x1100, 0x115F),       # Hangul Jamo
+    (0x2E80, 0x303E),       # CJK Radicals, Kangxi Radicals, CJK Symbols and Punctuation
+    (0x3041, 0x33FF),       # Hiragana, Katakana, Bopomofo, Hangul Compatibility Jamo, Enclosed CJK, CJK Compatibility
+    (0x3400, 0x4DBF),       # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF),       # CJK Unified Ideographs
+    (0xA000, 0xA4CF),       # Yi Syllables and Radicals
+    (0xA960, 0xA97F),       # Hangul Jamo Extended-A
+    (0xAC00, 0xD7A3),       # Hangul Syllables
+    (0xF900, 0xFAFF),       # CJK Compatibility Ideographs
+    (0xFE10, 0xFE19),       # Vertical Forms
+    (0xFE30, 0xFE6F),       # CJK Compatibility Forms, Small Form Variants
+    (0xFF00, 0xFF60),       # Fullwidth Forms
+    (0xFFE0, 0xFFE6),       # Fullwidth Signs
+    (0x1F300, 0x1F64F),     # Miscellaneous Symbols and Pictographs, Emoticons
+    (0x1F900, 0x1F9FF),     # Supplemental Symbols and Pictographs
+    (0x20000, 0x2FFFD),     # CJK Unified Ideographs Extension B~F
+    (0x30000, 0x3FFFD),     # CJK Unified Ideographs Extension G
+)
+_WIDE_CHAR_STARTS = [first for (first, _) in _WIDE_CHAR_RANGES]
 
 
 # Define exceptions for algviz runtime.
@@ -253,6 +276,27 @@ def add_animate_scale_into_text(t, animate, time, font_size, zoom_in=True):
     animate.setAttribute('fill', 'freeze')
 
 
+@lru_cache(maxsize=1024)
+def _rgbcolor_info_(color):
+    """Convert the color into its SVG string and its contrasting text color at once.
+
+    The palettes used in one animation are small and repeat constantly, so the result is cached.
+
+    Args:
+        color ((R,G,B)): The color tuple, must be hashable.
+
+    Returns:
+        (str, str): The hexadecimal color string and the text color string. eg: ('#00ff00', '#000000')
+    """
+    color_str = '#{:0>2x}{:0>2x}{:0>2x}'.format(color[0], color[1], color[2])
+    (_, l_rate, _) = rgb_to_hls(color[0] / 255, color[1] / 255, color[2] / 255)
+    if l_rate >= 0.5:
+        # For bright color, fill black.
+        return (color_str, '#000000')
+    else:
+        return (color_str, '#FFFFFF')
+
+
 def auto_text_color(back_color):
     """Auto pick one text stroke color according to it's background color.
 
@@ -264,15 +308,7 @@ def auto_text_color(back_color):
         str: Text stroke color value formatted with hexadecimal number(SVG format).
             eg: '#FFFFFF'
     """
-    r = back_color[0] / 255
-    g = back_color[1] / 255
-    b = back_color[2] / 255
-    (_, l_rate, _) = rgb_to_hls(r, g, b)
-    if l_rate >= 0.5:
-        # For bright color, fill black.
-        return '#000000'
-    else:
-        return '#FFFFFF'
+    return _rgbcolor_info_(tuple(back_color[0:3]))[1]
 
 
 def rgbcolor2str(color):
@@ -285,9 +321,10 @@ def rgbcolor2str(color):
     Returns:
         str: Hexadecimal formatted string. (SVG format). eg: '#FFFFFF'
     """
-    return '#{:0>2x}{:0>2x}{:0>2x}'.format(color[0], color[1], color[2])
+    return _rgbcolor_info_(tuple(color[0:3]))[0]
 
 
+@lru_cache(maxsize=1024)
 def str2rgbcolor(color_str):
     """Convert hexadecimal formatted string into (R, G, B) formatted color.
 
@@ -349,11 +386,16 @@ def text_char_num(text):
     Returns:
         int: The number of characters in the text.
     """
+    if text.isascii():
+        return len(text)
     count = 0
     for ch in text:
-        if '\u4e00' <= ch <= '\u9fff':
-            count += 2
-        else:
+        code = ord(ch)
+        count += 1
+        if code < 0x1100:
+            continue
+        i = bisect_right(_WIDE_CHAR_STARTS, code) - 1
+        if code <= _WIDE_CHAR_RANGES[i][1]:
             count += 1
     return count
 
@@ -387,6 +429,26 @@ def layout_text(text, width, height, font_size):
     return res
 
 
+@lru_cache(maxsize=4096)
+def layout_box_text(text, width, height):
+    """Choose the font size and layout the text in the given text box.
+
+    The result only depends on the arguments, so it's cached to make the
+    re-layout of unchanged labels (eg: cells move in each frame) free.
+
+    Args:
+        text (str): The text content (should be unicode format string).
+        width (float): The width of the text box.
+        height (float): The height of the text box.
+
+    Returns:
+        (float, tuple(tuple(str, float, float))): The font size and the (string, x_pos, y_pos) of each text line.
+    """
+    font_size = min(height - 1, text_font_size(width, text))
+    font_size = max(font_size, 4)
+    return (font_size, tuple(layout_text(text, width, height, font_size)))
+
+
 def clamp(val, min_val, max_val):
     """
     Returns:
@@ -402,13 +464,12 @@ def add_desc_into_svg(dom):
         dom (xmldom.document) The dom object to contain the description.
     """
     # Check if there is already a description in svg.
-    svgs = dom.getElementsByTagName('svg')
-    if len(svgs) == 0:
-        return
-    svg = svgs[0]
-    descs = svg.getElementsByTagName('desc')
-    if len(descs) > 0:
+    svg = dom.documentElement
+    if svg is None or svg.tagName != 'svg':
         return
+    for child in svg.childNodes:
+        if child.nodeType == child.ELEMENT_NODE and child.tagName == 'desc':
+            return
     desc_str = 'Generated by algviz-{}(see {}).'.format(_version, _url)
     desc = dom.createElement('desc')
     text = dom.createTextNode('{}'.format(desc_str))
@@ -350,6 +350,24 @@ class Vector():
         Returns:
             str: The SVG representation of current Vector.
         """
+        return self._next_frame_(self._svg._repr_svg_)
+
+    def _render_frame_(self):
+        """
+        Returns:
+            (int, int, str): The width, height and content of current Vector frame, used by the layouter.
+        """
+        return self._next_frame_(self._svg._render_frame_)
+
+    def _next_frame_(self, render):
+        """Apply the changes since last frame, render the SVG and prepare for the next frame.
+
+        Args:
+            render (function): Render the SvgTable of this vector, eg: SvgTable._repr_svg_.
+
+        Returns:
+            The render result.
+        """
         # Update the color of the cell tracker.
         all_data_num = len(self._data) + len(self._rect_disappear)
         self._update_svg_size_(all_data_num)
@@ -398,7 +416,7 @@ class Vector():
                 self._create_new_subscripts_(len(self._index2text), len(self._data))
         self._rect_move.clear()
         self._cursor_manager.refresh_cursors_animation(all_data_num, (0, self._delay))
-        res = self._svg._repr_svg_()
+        res = render()
         # Clear the animation effect, update the SVG content, and prepare for the next frame.
         self._svg.clear_animates()
         if self._show_histogram > 0:
@@ -9,18 +9,21 @@ License: GPLv3
 """
 
 from weakref import WeakKeyDictionary
+from functools import partial
 from time import sleep
-from IPython import display
 
 from algviz.table import Table
 from algviz.vector import Vector
-from algviz.svg_graph import SvgGraph
+from algviz.svg_graph import SvgGraph, prefetch_graphs_layout
 from algviz.svg_table import SvgTable
 from algviz.logger import Logger
 from algviz.cursor import Cursor, _CursorRange
 from algviz.map import Map
 from algviz.utility import AlgvizParamError, AlgvizTypeError, AlgvizRuntimeError, kMaxNameChars
-from algviz.layouter import Layouter, is_layout_supported
+from algviz.layouter import Layouter, CHUNK_FRAMES
+from algviz.sequencer import render_frame
+from algviz.frame_store import FRAME_STORE_MEMORY_LIMIT
+from algviz.svg_minify import MINIFY_PRECISION, open_svg_file
 
 
 class _NoDisplay():
@@ -28,6 +31,14 @@ class _NoDisplay():
         return ''
 
 
+class _RenderedDisplay():
+    def __init__(self, svg_str):
+        self._svg_str = svg_str
+
+    def _repr_svg_(self):
+        return self._svg_str
+
+
 class _NameDisplay():
     def __init__(self, name):
         if type(name) != str or len(name) > kMaxNameChars:
@@ -44,13 +55,24 @@ _next_visualizer_id = 0
 
 class Visualizer():
 
-    def __init__(self, delay=2.0, wait=0.5, layout=False):
+    def __init__(self, delay=2.0, wait=0.5, layout=False, headless=False, pipeline=False, render_workers=1,
+                 frame_memory=FRAME_STORE_MEMORY_LIMIT):
         """
         Args:
             delay (float): Animation delay time (in seconds).
             wait (True/float/int): (True) wait for the key input to continue execute the code.
                                    (float/int) the wait time before start the next frame of animation.
             layout (boolean): wheather to layout different display objects or not.
+            headless (boolean): Record the animation frames as fast as possible without displaying them,
+                                the frames can be exported into one svg animation by calling export.
+                                This mode can be used outside of jupyter notebook and always layout the display objects.
+            pipeline (boolean): Render the graphs and assemble the frames in a background thread while the code
+                                keeps running, only works when the frames are layout (layout or headless mode).
+            render_workers (int): The number of threads to render the display objects of one frame concurrently,
+                                  the graphs waiting for graphviz can be rendered in parallel.
+                                  It's not used in pipeline mode, the frames are rendered by the pipeline thread.
+            frame_memory (int): The maximum bytes of the compressed frames kept in memory by the layouter,
+                                the other frames are saved into a temporary file until they are exported.
         """
         global _next_visualizer_id
         self._vid = _next_visualizer_id  # One notebook may contain multply visualizers, use vid to identify them.
@@ -65,6 +87,9 @@ class Visualizer():
             self._wait = 0.5
         if type(self._wait) != bool and self._wait < 0:
             self._wait = 0
+        self._headless = headless
+        if self._headless and self._wait is True:
+            self._wait = 0              # Nobody will press the key in headless mode.
 
         # The mapping relationship between the display object and the display id.
         self._element2display = WeakKeyDictionary()
@@ -74,12 +99,37 @@ class Visualizer():
         self._displayid2name = dict()
         # The next unique cursor id created by this visualizer.
         self._next_cursor_id = -1
+        # The thread pool to render the display objects concurrently, render them one by one if it's None.
+        self._render_executor = None
+        if type(render_workers) == int and render_workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            self._render_executor = ThreadPoolExecutor(render_workers)
         # Init display engine.
-        if layout is True and is_layout_supported():
-            self._layouter = Layouter(self._vid)
+        if layout is True or headless is True:
+            self._layouter = Layouter(self._vid, pipeline, frame_memory)
         else:
             self._layouter = None
 
+    def close(self):
+        """Wait for the frames being rendered, then stop the render threads and the pipeline thread.
+
+        The visualizer can't display or export the frames after it's closed.
+        """
+        if self._layouter is not None:
+            self._layouter.close()
+        if self._render_executor is not None:
+            self._render_executor.shutdown(wait=True)
+            self._render_executor = None
+
+    def __del__(self):
+        # The threads are stopped without waiting, the visualizer may be collected in any thread.
+        layouter = getattr(self, '_layouter', None)
+        if layouter is not None:
+            layouter.close(wait=False)
+        executor = getattr(self, '_render_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
     def display(self, delay=None):
         """Refresh all created display objects.
 
@@ -88,7 +138,9 @@ class Visualizer():
         """
         if delay is None or delay < 0:
             delay = self._delay
+        self._prefetch_graphs_layout()
         if type(self._wait) == float or type(self._wait) == int:
+            rendered_frames = self._render_frame(delay)
             for elem in self._element2display.keyrefs():
                 did = self._element2display[elem()]
                 if did not in self._displayed:
@@ -96,14 +148,14 @@ class Visualizer():
                         svg_title = _NameDisplay(self._displayid2name[did])
                         self._display(svg_title, 'algviz_{}'.format(did))
                     elem()._delay = delay
-                    self._display(elem(), 'algviz{}'.format(did))
+                    self._display(elem(), 'algviz{}'.format(did), rendered_frames.get(did))
                     self._displayed.add(did)
                 else:
                     if did in self._displayid2name:
                         svg_title = _NameDisplay(self._displayid2name[did])
                         self._update_display(svg_title, 'algviz_{}'.format(did))
                     elem()._delay = delay
-                    self._update_display(elem(), 'algviz{}'.format(did))
+                    self._update_display(elem(), 'algviz{}'.format(did), rendered_frames.get(did))
             temp_displayed = list(self._displayed)
             for did in temp_displayed:
                 if did not in self._element2display.values():
@@ -117,6 +169,8 @@ class Visualizer():
                 sleep(delay + self._wait)
             return None
         elif self._wait is True and self._layouter is None:
+            from IPython import display
+            rendered_frames = self._render_frame(delay)
             display.clear_output(wait=True)
             for elem in self._element2display.keyrefs():
                 did = self._element2display[elem()]
@@ -126,7 +180,10 @@ class Visualizer():
                     svg_title.add_text_element((4, 14), title_name, font_size=14, fill=(0, 0, 0))
                     display.display(svg_title, display_id='algviz_{}'.format(did))
                 elem()._delay = delay
-                display.display(elem(), display_id='algviz{}'.format(did))
+                if did in rendered_frames:
+                    display.display(_RenderedDisplay(rendered_frames[did]), display_id='algviz{}'.format(did))
+                else:
+                    display.display(elem(), display_id='algviz{}'.format(did))
                 self._displayed.add(did)
             return input('Input `Enter` to continue:')
         else:
@@ -178,6 +235,8 @@ class Visualizer():
             data (iterable): The root node(s) to initialize the topology graph.
             name (str): The name of this Vector object.
             directed (bool): Should this graph be directed graph or undirected.
+                The undirected graph is layout by the built-in force layout if numpy is installed
+                (`pip install algviz[force]`), otherwise by the graphviz neato engine.
 
         Returns:
             SvgGraph: Created SvgGraph object.
@@ -279,11 +338,13 @@ class Visualizer():
         self._next_cursor_id += 1
         return _CursorRange(self._next_cursor_id, name, st, ed, step)
 
-    def layout(self, max_width=800, bg_color=None):
+    def layout(self, max_width=800, bg_color=None, delta=False):
         """Layout all the svg animation pictures.
         Args:
             max_width (int): The maximum strip width limit to layouter.
             bg_color (str): The background color for the export animation.
+            delta (bool): Output the unchanged elements only once and show/hide them when the frames change,
+                          the animation size scales with the number of changes instead of the number of frames.
 
         Returns:
             str: The final svg string to display.
@@ -293,17 +354,147 @@ class Visualizer():
         global _next_display_id
         self._layouter._max_width = max_width
         self._layouter._bg_color = bg_color
+        self._layouter._delta = delta
+        from IPython import display
         display.display(self._layouter, display_id='algviz_{}'.format(_next_display_id))
         _next_display_id += 1
 
-    def _display(self, content, did):
+    def export(self, path=None, max_width=800, bg_color=None, stream=False, delta=False, minify=False,
+               precision=MINIFY_PRECISION):
+        """Merge the animation frames recorded since the last layout/export into one svg animation.
+
+        Args:
+            path (str/file): The file path to save the svg animation, nothing will be saved if path is None.
+                             The file is gzip compressed if path ends with .svgz.
+                             It can also be a text file object opened for writing in stream mode.
+            max_width (int): The maximum strip width limit to layouter.
+            bg_color (str): The background color for the export animation.
+            stream (bool): Write the svg animation into path frame by frame without building the whole svg
+                           string, only one frame is kept in memory at a time. path is required in this mode.
+                           With delta, the merged elements of all the frames are still kept in memory until
+                           they are written, use exportChunks to bound the memory of a very long animation.
+            delta (bool): Output the unchanged elements only once and show/hide them when the frames change,
+                          the animation size scales with the number of changes instead of the number of frames.
+            minify (bool): Round the numbers, move the repeated styling attributes into CSS classes, shorten the ids
+                           and drop the default attributes to reduce the animation size.
+            precision (int): The number of decimals kept in the numbers when minify is True.
+
+        Returns:
+            str: The svg animation string, None in stream mode.
+
+        Raises:
+            AlgvizRuntimeError: The visualizer was not created with layout or headless mode, or failed to layout the frames.
+        """
+        if self._layouter is None:
+            raise AlgvizRuntimeError('Visualizer should be created with layout=True or headless=True to export.')
+        self._layouter._max_width = max_width
+        self._layouter._bg_color = bg_color
+        self._layouter._delta = delta
+        self._layouter._minify = precision if minify else None
+        if stream:
+            if path is None:
+                raise AlgvizRuntimeError('The path to write the svg animation is required in stream mode.')
+            if hasattr(path, 'write'):
+                success = self._layouter.write_next_svg(path)
+            else:
+                with open_svg_file(path) as f:
+                    success = self._layouter.write_next_svg(f)
+            if not success:
+                raise AlgvizRuntimeError('Failed to layout the animation frames.')
+            return None
+        svg_str = self._layouter._repr_svg_()
+        if svg_str is None:
+            raise AlgvizRuntimeError('Failed to layout the animation frames.')
+        if path is not None:
+            with open_svg_file(path) as f:
+                f.write(svg_str)
+        return svg_str
+
+    def exportChunks(self, path, chunk_frames=CHUNK_FRAMES, max_width=800, bg_color=None, delta=False, minify=False,
+                     precision=MINIFY_PRECISION):
+        """Split the animation frames recorded since the last layout/export into several svg files.
+
+        Each chunk file is a standalone svg animation of at most chunk_frames frames. A manifest.json
+        file lists the duration, frames, size and layout of each chunk, so a player can load them lazily.
+
+        Args:
+            path (str): The directory to save the chunk files and the manifest.
+            chunk_frames (int): The maximum number of frames in each chunk file.
+            max_width (int): The maximum strip width limit to layouter.
+            bg_color (str): The background color for the export animation.
+            delta (bool): Output the unchanged elements only once in each chunk, see export.
+                          The merged elements of one chunk are kept in memory until the chunk is written.
+            minify (bool): Minify each chunk file, see export.
+            precision (int): The number of decimals kept in the numbers when minify is True.
+
+        Returns:
+            dict: The manifest written into manifest.json.
+
+        Raises:
+            AlgvizParamError: chunk_frames is not a positive integer.
+            AlgvizRuntimeError: The visualizer was not created with layout or headless mode, or failed to layout the frames.
+        """
+        if type(chunk_frames) != int or chunk_frames <= 0:
+            raise AlgvizParamError('chunk_frames should be a positive integer, got:{}'.format(chunk_frames))
+        if self._layouter is None:
+            raise AlgvizRuntimeError('Visualizer should be created with layout=True or headless=True to export.')
+        self._layouter._max_width = max_width
+        self._layouter._bg_color = bg_color
+        self._layouter._delta = delta
+        self._layouter._minify = precision if minify else None
+        manifest = self._layouter.write_chunks(path, chunk_frames)
+        if manifest is None:
+            raise AlgvizRuntimeError('Failed to layout the animation frames.')
+        return manifest
+
+    def _prefetch_graphs_layout(self):
+        if self._is_pipeline():
+            return      # The graphs are layout one by one by the pipeline thread.
+        graphs = list()
+        for elem in self._element2display.keyrefs():
+            element = elem()
+            if type(element) == SvgGraph:
+                graphs.append(element)
+            elif type(element) == Map:
+                graphs.append(element._graph)
+        if len(graphs) > 1:
+            prefetch_graphs_layout(graphs)
+
+    def _render_frame(self, delay):
+        """Render all the display objects of this frame concurrently by the render executor.
+
+        Returns:
+            dict(int:str/tuple): Key is the display id, value is the SVG string (or the frame content rendered by
+                render_frame in layout mode). Empty if there is no render executor.
+        """
+        if self._render_executor is None or self._is_pipeline():
+            return dict()
+        futures = list()
+        for elem in self._element2display.keyrefs():
+            element = elem()
+            if element is not None:
+                element._delay = delay
+                render = element._repr_svg_ if self._layouter is None else partial(render_frame, element)
+                futures.append((self._element2display[element], self._render_executor.submit(render)))
+        return {did: future.result() for (did, future) in futures}
+
+    def _is_pipeline(self):
+        return self._layouter is not None and self._layouter._pipeline is not None
+
+    def _display(self, content, did, rendered=None):
         if self._layouter is None:
+            if rendered is not None:
+                content = _RenderedDisplay(rendered)
+            from IPython import display
             display.display(content, display_id=did)
         else:
-            self._layouter.display(content, display_id=did)
+            self._layouter.display(content, display_id=did, rendered=rendered)
 
-    def _update_display(self, content, did):
+    def _update_display(self, content, did, rendered=None):
         if self._layouter is None:
+            if rendered is not None:
+                content = _RenderedDisplay(rendered)
+            from IPython import display
             display.update_display(content, display_id=did)
         else:
-            self._layouter.update_display(content, display_id=did)
+            self._layouter.update_display(content, display_id=did, rendered=rendered)
@@ -41,6 +41,10 @@ setup(
         'ipykernel >= 6.4.0, <= 6.23.1',
         'ipython >= 8.0.0, <= 8.12.0'
     ],
+    extras_require={
+        # The undirected graphs are layout by the built-in force layout instead of graphviz neato.
+        'force': ['numpy >= 1.17']
+    },
     python_requires='>=3.8',
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+'''
+@author: zjl9959@gmail.com
+@license: GPLv3
+
+A fake graphviz `dot` executable used when graphviz is not installed, it speaks the same protocol as
+`dot -K<engine> -Tsvg` used by the graphviz worker pool: read the DOT graphs from stdin one by one and
+write the SVG of each graph into stdout (ends with </svg>).
+The graph can't be parsed is reported into stderr and nothing is output for it, like dot does.
+'''
+
+
+import re
+import sys
+from xml.sax.saxutils import escape
+
+
+_NODE_PATTERN = re.compile(r'^\s*("[^"]*"|\w+)\s*(\[(.*)\])?\s*$')
+_EDGE_PATTERN = re.compile(r'^\s*("[^"]*"|\w+)\s*(->|--)\s*("[^"]*"|\w+)\s*(\[(.*)\])?\s*$')
+_LABEL_PATTERN = re.compile(r'\blabel=("(?:[^"\\]|\\.)*"|[^\s\]]+)')
+
+
+def parse_graph(source):
+    '''
+    @function: Parse the nodes and edges of a DOT graph.
+    @param: {source->str} The DOT graph source.
+    @return: {list((str, str)), list((str, str)), str} The (name, label) of nodes and the (start, end) of edges,
+        and the statement can't be parsed (None if the graph is parsed).
+    '''
+    nodes, edges = dict(), list()
+    body = source[source.index('{') + 1:source.rindex('}')]
+    for statement in re.split(r'[\n;]', body):
+        statement = statement.strip()
+        if statement == '' or statement.split(' ')[0] in ('graph', 'node', 'edge'):
+            continue
+        match = _EDGE_PATTERN.match(statement)
+        if match:
+            nodes.setdefault(match.group(1).strip('"'), None)
+            nodes.setdefault(match.group(3).strip('"'), None)
+            edges.append((match.group(1).strip('"'), match.group(3).strip('"')))
+            continue
+        match = _NODE_PATTERN.match(statement)
+        if match is None:
+            return None, None, statement
+        label = _LABEL_PATTERN.search(match.group(3) or '')
+        nodes[match.group(1).strip('"')] = label.group(1).strip('"') if label else None
+    return list(nodes.items()), edges, None
+
+
+def render_graph(nodes, edges, directed):
+    '''
+    @function: Render the graph into a SVG in graphviz format, the nodes are placed in one row.
+    '''
+    width = 60 * len(nodes) + 8
+    out = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n',
+           '<svg width="{0}pt" height="80pt" viewBox="0.00 0.00 {0}.00 80.00" '.format(width),
+           'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n',
+           '<g id="graph0" class="graph" transform="scale(1 1) rotate(0) translate(4 76)">\n<title>%3</title>\n']
+    node_x = dict()
+    for i, (name, label) in enumerate(nodes):
+        node_x[name] = 30 + 60 * i
+        out.append('<g id="node{}" class="node">\n<title>{}</title>\n'.format(i + 1, escape(name)))
+        out.append('<ellipse fill="none" stroke="#7b7b7b" cx="{}" cy="-36" rx="27" ry="27"/>\n'.format(node_x[name]))
+        out.append('<text text-anchor="middle" x="{}" y="-32.3">{}</text>\n</g>\n'.format(
+            node_x[name], escape(label if label is not None else name)))
+    for i, (start, end) in enumerate(edges):
+        out.append('<g id="edge{}" class="edge">\n<title>{}{}{}</title>\n'.format(
+            i + 1, escape(start), '&#45;&gt;' if directed else '&#45;&#45;', escape(end)))
+        out.append('<path fill="none" stroke="#7b7b7b" d="M{0},-36C{0},-36 {1},-36 {1},-36"/>\n</g>\n'.format(
+            node_x[start], node_x[end]))
+    out.append('</g>\n</svg>\n')
+    return ''.join(out)
+
+
+def main():
+    lines, depth, line_number = list(), 0, 0
+    for line in sys.stdin:
+        line_number += 1
+        lines.append(line)
+        depth += line.count('{') - line.count('}')
+        if depth > 0 or '{' not in ''.join(lines):
+            continue
+        source, lines, depth = ''.join(lines), list(), 0
+        nodes, edges, error_line = parse_graph(source)
+        directed = source.lstrip().startswith('digraph')
+        if error_line is not None:
+            sys.stderr.write('Error: <stdin>: syntax error in line {} near \'{}\'\n'.format(line_number, error_line))
+            sys.stderr.flush()
+            continue
+        sys.stdout.write(render_graph(nodes, edges, directed))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@
 '''
 
 
+import os
 import time
 import sys
 
@@ -22,12 +23,20 @@ def main():
     nb_failed += run_test_module(test_linked_list)
     import test_tree
     nb_failed += run_test_module(test_tree)
+    import test_graphviz_pool
+    nb_failed += run_test_module(test_graphviz_pool)
     import test_graph
     nb_failed += run_test_module(test_graph)
     import test_map
     nb_failed += run_test_module(test_map)
+    import test_visual
+    nb_failed += run_test_module(test_visual)
     import test_regression
     nb_failed += run_test_module(test_regression)
+    # The benchmarks take much longer than the other tests, they are only run when asked to.
+    if '--benchmark' in sys.argv or os.environ.get('ALGVIZ_BENCHMARK_TIME'):
+        import test_benchmark
+        nb_failed += run_test_module(test_benchmark)
     print("*" * 45)
     if nb_failed == 0:
         print('Congratulations, everything is OK !!!')
@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+
+'''
+@author: zjl9959@gmail.com
+@license: GPLv3
+'''
+
+import os
+import sys
+import time
+import tempfile
+import random
+import subprocess
+import tracemalloc
+from xml.dom.minidom import parseString, Document
+
+from result import TestResult
+import algviz
+from algviz.svg_table import SvgTable
+from algviz.svg_graph import SvgGraph
+from algviz.graph_layout import layout_tree, layout_force, force_layout_supported, FORCE_EDGE_LENGTH
+from algviz.svg_element import parse_svg, SvgDocument
+from algviz.sequencer import render_frame, read_svg_frame
+from algviz.layouter import Layouter, load_dll, solve_strip_packing
+from algviz.packing_solver import solve_strip_packing as solve_builtin_strip_packing
+from algviz.utility import AlgvizRuntimeError
+from algviz import graphviz_pool
+from test_graphviz_pool import get_dot_executable
+from test_visual import record_frames
+
+
+# The benchmarks are run by `python tests/run.py --benchmark`, the wall-clock time is only printed since it depends
+# on the machine and its load. Set the environment variable to check the time (it also runs the benchmarks).
+BENCHMARK_TIME_ENV = 'ALGVIZ_BENCHMARK_TIME'
+
+
+def measure(func, repeat=3):
+    '''
+    @function: Run func several times and return the best elapsed time.
+    @param: {func->callable} The function to be measured.
+    @return: {float} The minimum elapsed seconds of all the runs.
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def add_time_case(res, ok, name, actual=None, expect=None):
+    '''
+    @function: Add the test case which compares the wall-clock time, it's only checked when ALGVIZ_BENCHMARK_TIME is set.
+    @param: {res->TestResult} The test result to add the case.
+    @param: {ok->bool} Whether the measured time meets the expectation.
+    '''
+    if os.environ.get(BENCHMARK_TIME_ENV):
+        res.add_case(ok, name, actual, expect)
+
+
+def is_linear(small_time, large_time, scale):
+    '''
+    @function: Check if the time grows (roughly) linearly with the problem size.
+        Quadratic growth would be scale*scale times slower, so allow twice of the linear growth.
+    '''
+    return large_time <= small_time * scale * 2
+
+
+def test_svg_table_update_frame():
+    res = TestResult()
+
+    def create_table(cells):
+        svg = SvgTable(cells * 43, 46)
+        gids = list()
+        for i in range(cells):
+            gids.append(svg.add_rect_element((i * 43 + 3, 3, 40, 40), text=i))
+        return svg, gids
+
+    def update_frame(svg, gids):
+        for gid in gids:
+            svg.update_rect_element(gid, fill=(255, 0, 0))
+            svg.update_rect_element(gid, fill=(255, 255, 255))
+
+    small_svg, small_gids = create_table(500)
+    large_svg, large_gids = create_table(2000)
+    small_time = measure(lambda: update_frame(small_svg, small_gids))
+    large_time = measure(lambda: update_frame(large_svg, large_gids))
+    print('   SvgTable frame update: 500 cells {:.2f} ms, 2000 cells {:.2f} ms'.format(
+        small_time * 1000, large_time * 1000))
+    add_time_case(res, is_linear(small_time, large_time, 4), 'Linear frame update',
+                  '{:.2f} ms'.format(large_time * 1000), '<= {:.2f} ms'.format(small_time * 8000))
+    return res
+
+
+def test_svg_table_serialize_frame():
+    res = TestResult()
+    cells = 10000
+    svg = SvgTable(cells * 43, 46)
+    gids = list()
+    for i in range(cells):
+        gids.append(svg.add_rect_element((i * 43 + 3, 3, 40, 40), text=i))
+    full_time = measure(lambda: svg._repr_svg_(), repeat=1)
+    colors = [(255, 0, 0), (255, 255, 255)]
+
+    def update_two_cells():
+        colors.reverse()
+        svg.update_rect_element(gids[0], fill=colors[0])
+        svg.update_rect_element(gids[-1], fill=colors[0])
+        svg._repr_svg_()
+
+    part_time = measure(update_two_cells)
+    print('   SvgTable serialize {} cells: full {:.2f} ms, two cells changed {:.2f} ms'.format(
+        cells, full_time * 1000, part_time * 1000))
+    add_time_case(res, part_time * 4 < full_time, 'Incremental serialize',
+                  '{:.2f} ms'.format(part_time * 1000), '< {:.2f} ms'.format(full_time * 250))
+    return res
+
+
+def test_svg_table_clear_animates():
+    res = TestResult()
+
+    def create_table(cells):
+        svg = SvgTable(cells * 43, 46)
+        gids = list()
+        for i in range(cells):
+            gids.append(svg.add_rect_element((i * 43 + 3, 3, 40, 40), text=i))
+        return svg, gids
+
+    def animate_frames(svg, gids):
+        for _ in range(100):
+            for gid in gids[:5]:
+                svg.add_animate_move(gid, (43, 0), (0, 1))
+                svg.update_rect_element(gid, text='x', delay=1)
+            svg.clear_animates()
+
+    small_svg, small_gids = create_table(500)
+    large_svg, large_gids = create_table(5000)
+    small_time = measure(lambda: animate_frames(small_svg, small_gids))
+    large_time = measure(lambda: animate_frames(large_svg, large_gids))
+    print('   SvgTable clear 5 animations: 500 cells {:.2f} ms, 5000 cells {:.2f} ms'.format(
+        small_time * 1000, large_time * 1000))
+    add_time_case(res, large_time < small_time * 3, 'Flat clear cost',
+                  '{:.2f} ms'.format(large_time * 1000), '< {:.2f} ms'.format(small_time * 3000))
+    return res
+
+
+def test_svg_element_allocation():
+    res = TestResult()
+    cells = 5000
+
+    # Build the cells of a large vector, the same as SvgTable does.
+    def build_cells(doc, number):
+        svg = doc.createElement('svg')
+        doc.appendChild(svg)
+        for i in range(cells):
+            g = doc.createElement('g')
+            g.setAttribute('id', str(i))
+            rect = doc.createElement('rect')
+            for (name, value) in (('x', i * 43 + 3), ('y', 3), ('width', 40), ('height', 40)):
+                rect.setAttribute(name, number(value))
+            rect.setAttribute('fill', '#ffffff')
+            rect.setAttribute('stroke', '#7b7b7b')
+            text = doc.createElement('text')
+            text.setAttribute('x', number(i * 43 + 23))
+            text.setAttribute('y', number(23))
+            text.appendChild(doc.createTextNode(str(i)))
+            g.appendChild(rect)
+            g.appendChild(text)
+            svg.appendChild(g)
+        return doc
+
+    def measure_model(create_doc, number):
+        tracemalloc.start()
+        doc = build_cells(create_doc(), number)
+        (size, _) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        build_time = measure(lambda: build_cells(create_doc(), number), repeat=1)
+        doc.toxml()
+        serialize_time = measure(doc.toxml)
+        return (size, build_time, serialize_time)
+
+    (svg_size, svg_build, svg_serialize) = measure_model(SvgDocument, lambda v: v)
+    (dom_size, dom_build, dom_serialize) = measure_model(Document, lambda v: '{:.2f}'.format(v))
+    print('   Build {} cells: SvgDocument {:.2f} MB {:.2f} ms, minidom {:.2f} MB {:.2f} ms'.format(
+        cells, svg_size / 1e6, svg_build * 1000, dom_size / 1e6, dom_build * 1000))
+    print('   Serialize again {} cells: SvgDocument {:.2f} ms, minidom {:.2f} ms'.format(
+        cells, svg_serialize * 1000, dom_serialize * 1000))
+    res.add_case(svg_size * 3 < dom_size, 'Less memory than minidom', svg_size, '< {}'.format(dom_size / 3))
+    add_time_case(res, svg_build * 5 < dom_build, 'Faster build than minidom',
+                  '{:.2f} ms'.format(svg_build * 1000), '< {:.2f} ms'.format(dom_build * 200))
+    add_time_case(res, svg_serialize * 10 < dom_serialize, 'Faster serialize than minidom',
+                  '{:.2f} ms'.format(svg_serialize * 1000), '< {:.2f} ms'.format(dom_serialize * 100))
+    return res
+
+
+def test_tree_layout():
+    res = TestResult()
+
+    def create_tree(nodes_num):
+        node_labels = [(str(i), '14.00') for i in range(nodes_num)]
+        # Half random tree and half deep chain.
+        edges = list()
+        for i in range(2, nodes_num + 1):
+            parent = random.randint(1, i - 1) if i <= nodes_num // 2 else i - 1
+            edges.append((parent, i, None))
+        return node_labels, edges
+
+    small_tree = create_tree(1250)
+    large_tree = create_tree(5000)
+    small_time = measure(lambda: layout_tree(*small_tree))
+    large_time = measure(lambda: layout_tree(*large_tree))
+    print('   Tree layout: 1250 nodes {:.2f} ms, 5000 nodes {:.2f} ms'.format(
+        small_time * 1000, large_time * 1000))
+    add_time_case(res, is_linear(small_time, large_time, 4), 'Linear tree layout',
+                  '{:.2f} ms'.format(large_time * 1000), '<= {:.2f} ms'.format(small_time * 8000))
+    svg_str = layout_tree(*large_tree)
+    res.add_case(svg_str is not None and svg_str.count('class="node"') == 5000, 'Tree layout nodes')
+    cycle = [('1', '14.00'), ('2', '14.00')]
+    res.add_case(layout_tree(cycle, [(1, 2, None), (2, 1, None)]) is None, 'Tree layout rejects cycle')
+    return res
+
+
+def test_parse_svg():
+    res = TestResult()
+    node_labels = [(str(i), '14.00') for i in range(2000)]
+    edges = [(i // 2, i, None) for i in range(2, 2001)]
+    svg_str = layout_tree(node_labels, edges)
+    parse_time = measure(lambda: parse_svg(svg_str))
+    minidom_time = measure(lambda: parseString(svg_str))
+    svg = parse_svg(svg_str)
+    lookup_time = measure(lambda: [svg.getElementById('node{}'.format(i)) for i in range(1, 2001)])
+    print('   Parse graph SVG 2000 nodes: parse_svg {:.2f} ms, minidom {:.2f} ms, 2000 lookups {:.2f} ms'.format(
+        parse_time * 1000, minidom_time * 1000, lookup_time * 1000))
+    add_time_case(res, parse_time < minidom_time, 'Faster than minidom',
+                  '{:.2f} ms'.format(parse_time * 1000), '< {:.2f} ms'.format(minidom_time * 1000))
+    add_time_case(res, lookup_time < parse_time, 'Indexed lookup',
+                  '{:.2f} ms'.format(lookup_time * 1000), '< {:.2f} ms'.format(parse_time * 1000))
+    res.add_case(len(svg.getElementsByClassName('node')) == 2000, 'Indexed nodes')
+    dom = parseString(svg_str)
+    elements = [len(svg.documentElement.getElementsByTagName(tag)) for tag in ('g', 'title', 'ellipse', 'text', 'path')]
+    expect = [len(dom.documentElement.getElementsByTagName(tag)) for tag in ('g', 'title', 'ellipse', 'text', 'path')]
+    res.add_case(elements == expect, 'Same elements as minidom', elements, expect)
+    return res
+
+
+def test_force_layout():
+    res = TestResult()
+    if not force_layout_supported():
+        print('   Force layout: skipped (numpy is not installed)')
+        return res
+    nodes_num = 500
+    node_labels = [(str(i), '14.00') for i in range(nodes_num)]
+    edges = [(random.randint(1, i - 1), i, None) for i in range(2, nodes_num + 1)]
+    cold_time = measure(lambda: layout_force(node_labels, edges), repeat=1)
+    (_, positions) = layout_force(node_labels, edges)
+    # Add one node into the graph, the other nodes should stay stable.
+    edges.append((1, nodes_num + 1, None))
+    new_labels = node_labels + [('new', '14.00')]
+    warm_time = measure(lambda: layout_force(new_labels, edges, positions + [None]), repeat=1)
+    (_, new_positions) = layout_force(new_labels, edges, positions + [None])
+    max_move = max([abs(p1[0] - p2[0]) + abs(p1[1] - p2[1]) for (p1, p2) in zip(positions, new_positions)])
+    print('   Force layout {} nodes: cold {:.2f} ms, warm {:.2f} ms, max move {:.2f}pt'.format(
+        nodes_num, cold_time * 1000, warm_time * 1000, max_move))
+    add_time_case(res, warm_time < cold_time, 'Warm start faster', '{:.2f} ms'.format(warm_time * 1000),
+                  '< {:.2f} ms'.format(cold_time * 1000))
+    res.add_case(max_move < FORCE_EDGE_LENGTH, 'Stable warm start', max_move, '< {}'.format(FORCE_EDGE_LENGTH))
+    return res
+
+
+def test_graph_topology_sync():
+    res = TestResult()
+
+    def create_graph(nodes_num):
+        nodes = [algviz.TreeNode(i) for i in range(nodes_num)]
+        for i in range(1, nodes_num):
+            nodes[i - 1].add(nodes[i])
+        graph = SvgGraph(nodes[0:1], True, 1.0)
+        graph._sync_topology_()
+        return graph, nodes
+
+    def update_one_edge(graph, nodes):
+        for _ in range(100):
+            nodes[0].add(nodes[-1])
+            graph._sync_topology_()
+            nodes[0].remove(nodes[-1])
+            graph._sync_topology_()
+
+    small_graph, small_nodes = create_graph(1000)
+    large_graph, large_nodes = create_graph(10000)
+    small_time = measure(lambda: update_one_edge(small_graph, small_nodes))
+    large_time = measure(lambda: update_one_edge(large_graph, large_nodes))
+    print('   Graph topology sync one edge: 1000 nodes {:.2f} ms, 10000 nodes {:.2f} ms'.format(
+        small_time * 1000, large_time * 1000))
+    add_time_case(res, large_time < small_time * 3, 'Flat topology sync cost',
+                  '{:.2f} ms'.format(large_time * 1000), '< {:.2f} ms'.format(small_time * 3000))
+    res.add_case(len(large_graph._node_seq) == 10000 and len(large_graph._edge_label) == 9999, 'Topology sync result')
+    return res
+
+
+def test_parallel_render():
+    res = TestResult()
+
+    def display_graphs(render_workers):
+        viz = algviz.Visualizer(1, 0, headless=True, render_workers=render_workers)
+        graphs = list()
+        for _ in range(4):
+            # The directed graphs with a cycle are layout by graphviz.
+            nodes = [algviz.GraphNode(i) for i in range(30)]
+            for i in range(1, len(nodes)):
+                nodes[i // 2].add(nodes[i])
+            nodes[-1].add(nodes[0])
+            graphs.append(nodes)
+            viz.createGraph(nodes[0:1])
+        viz.display()
+
+        def add_nodes():
+            for nodes in graphs:    # Change the topology, so the graphs are layout again.
+                nodes.append(algviz.GraphNode(len(nodes)))
+                nodes[len(nodes) // 3].add(nodes[-1])
+            viz.display()
+        elapsed = measure(add_nodes)
+        viz.close()
+        return elapsed
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        executable = get_dot_executable(temp_dir)
+        old_path, old_pool = os.environ['PATH'], graphviz_pool._graphviz_pool
+        os.environ['PATH'] = os.path.dirname(executable) + os.pathsep + old_path
+        # Disable the graphviz workers, so each graph waits for its own graphviz process when it's rendered.
+        graphviz_pool._graphviz_pool = graphviz_pool.GraphvizPool(executable=executable)
+        graphviz_pool._graphviz_pool._executable = None
+        try:
+            serial_time = display_graphs(1)
+            parallel_time = display_graphs(4)
+        finally:
+            os.environ['PATH'], graphviz_pool._graphviz_pool = old_path, old_pool
+    cpu_count = os.cpu_count() or 1
+    print('   Render 4 graphs by graphviz in one frame ({} CPUs): serial {:.2f} ms, 4 workers {:.2f} ms'.format(
+        cpu_count, serial_time * 1000, parallel_time * 1000))
+    if cpu_count >= 4:     # The graphviz processes can't run in parallel with less CPUs.
+        add_time_case(res, parallel_time < serial_time / 2, 'Parallel render',
+                      '{:.2f} ms'.format(parallel_time * 1000), '< {:.2f} ms'.format(serial_time * 500))
+    return res
+
+
+def test_render_frame():
+    res = TestResult()
+    viz = algviz.Visualizer(0.1, 0, headless=True)
+    vec = viz.createVector(list(range(1000)), name='vec')
+    colors = [(255, 0, 0), (255, 255, 255)]
+
+    def next_frame(render):
+        def wrapper():
+            for _ in range(10):
+                colors.reverse()
+                vec.mark(colors[0], 0)
+                render()
+        return wrapper
+
+    render_time = measure(next_frame(lambda: render_frame(vec)))
+    round_trip_time = measure(next_frame(lambda: read_svg_frame(vec._repr_svg_())))
+    print('   Render 10 frames of 1000 elements vector: render_frame {:.2f} ms, _repr_svg_ and parse {:.2f} ms'.format(
+        render_time * 1000, round_trip_time * 1000))
+    add_time_case(res, render_time * 4 < round_trip_time, 'No serialize and parse round trip',
+                  '{:.2f} ms'.format(render_time * 1000), '< {:.2f} ms'.format(round_trip_time * 250))
+    return res
+
+
+def test_pipeline_overlap():
+    res = TestResult()
+    work_time = 0.03    # Simulate the user algorithm waiting for IO between the frames.
+
+    def display_tree(pipeline):
+        viz = algviz.Visualizer(0.1, 0, headless=True, pipeline=pipeline)
+        root = algviz.parseBinaryTree(list(range(127)))
+        viz.createGraph(root, name='tree')
+        nodes = [root]
+        for node in nodes:
+            nodes.extend([child for child in (node.left, node.right) if child is not None])
+        display_time = 0
+        start = time.perf_counter()
+        for i in range(10):
+            time.sleep(work_time)
+            nodes[-1 - i].val = -i
+            display_start = time.perf_counter()
+            viz.display()
+            display_time += time.perf_counter() - display_start
+        viz._layouter.wait_frames()
+        total_time = time.perf_counter() - start
+        viz.close()
+        return (display_time, total_time)
+
+    # Take the best of several runs like measure does.
+    (serial_display, serial_total) = [min(times) for times in zip(*[display_tree(False) for _ in range(3)])]
+    (pipeline_display, pipeline_total) = [min(times) for times in zip(*[display_tree(True) for _ in range(3)])]
+    print('   Display 10 frames of 127 nodes tree: serial {:.2f} ms ({:.2f} ms in display), '
+          'pipeline {:.2f} ms ({:.2f} ms in display)'.format(serial_total * 1000, serial_display * 1000,
+                                                             pipeline_total * 1000, pipeline_display * 1000))
+    add_time_case(res, pipeline_display * 4 < serial_display, 'Render graphs off the caller thread',
+                  '{:.2f} ms'.format(pipeline_display * 1000), '< {:.2f} ms'.format(serial_display * 250))
+    add_time_case(res, pipeline_total < serial_total, 'Render overlaps the user algorithm',
+                  '{:.2f} ms'.format(pipeline_total * 1000), '< {:.2f} ms'.format(serial_total * 1000))
+    return res
+
+
+def test_frame_store_memory():
+    res = TestResult()
+    viz = algviz.Visualizer(0.1, 0, headless=True)
+    vec = viz.createVector(list(range(100)), name='vec')
+    frames_num = 1000
+    for i in range(frames_num):
+        if i % 2 == 0:
+            vec.swap(i % 100, (i * 7) % 100)
+        viz.display()
+    store = viz._layouter._frame_store
+    seq = list(viz._layouter._display_id2seq.values())[0]
+    raw_size = sum([len(store.get(key)) for (key, _, _) in seq._frames])
+    (memory_size, spill_size) = store.memory_size()
+    print('   Frame store {} frames: {} blobs, raw {:.2f} MB, stored {:.2f} MB'.format(
+        frames_num, len(store), raw_size / 1e6, (memory_size + spill_size) / 1e6))
+    res.add_case(len(store) < frames_num, 'Deduplicated frames', len(store), '< {}'.format(frames_num))
+    res.add_case(memory_size + spill_size < raw_size / 10, 'Compressed frames',
+                 memory_size + spill_size, '< {}'.format(raw_size / 10))
+    return res
+
+
+def test_stream_export_memory():
+    res = TestResult()
+    frames_num = 200
+
+    def peak_memory(export):
+        viz = record_frames(lambda viz: viz.createVector(list(range(50)), name='vec'),
+                            lambda vec, i: vec.swap(i % 50, (i * 7) % 50), frames_num)
+        tracemalloc.start()
+        export(viz)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    string_peak = peak_memory(lambda viz: viz.export())
+    with open(os.devnull, 'w') as f:
+        stream_peak = peak_memory(lambda viz: viz.export(f, stream=True))
+    print('   Export {} frames peak memory: string {:.2f} MB, stream {:.2f} MB'.format(
+        frames_num, string_peak / 1e6, stream_peak / 1e6))
+    res.add_case(stream_peak * 4 < string_peak, 'Stream export memory',
+                 stream_peak, '< {}'.format(string_peak / 4))
+    return res
+
+
+def test_delta_export_size():
+    res = TestResult()
+    cells, frames_num = 200, 40
+
+    def change_cell(vec, i):
+        vec[i] = -i      # Change one cell in each frame.
+
+    def export_frames(delta):
+        viz = record_frames(lambda viz: viz.createVector(list(range(cells)), name='vec'), change_cell, frames_num,
+                            display_first=True)
+        return len(viz.export(delta=delta))
+
+    full_size = export_frames(False)
+    delta_size = export_frames(True)
+    print('   Export {} frames of {} cells vector: full {:.2f} MB, delta {:.2f} MB'.format(
+        frames_num, cells, full_size / 1e6, delta_size / 1e6))
+    res.add_case(delta_size * 10 < full_size, 'Delta export size', delta_size, '< {}'.format(full_size / 10))
+    return res
+
+
+def test_minify_export_size():
+    res = TestResult()
+    cells, frames_num = 200, 40
+
+    def export_frames(**kwargs):
+        viz = record_frames(lambda viz: viz.createVector(list(range(cells)), name='vec'),
+                            lambda vec, i: vec.swap(i, cells - 1 - i), frames_num)
+        return viz.export(**kwargs)
+
+    full_size = len(export_frames())
+    minify_size = len(export_frames(minify=True))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        svgz_path = os.path.join(tmp_dir, 'minify.svgz')
+        export_frames(path=svgz_path, minify=True, stream=True)
+        svgz_size = os.path.getsize(svgz_path)
+    print('   Export {} frames of {} cells vector: full {:.2f} MB, minify {:.2f} MB, svgz {:.2f} MB'.format(
+        frames_num, cells, full_size / 1e6, minify_size / 1e6, svgz_size / 1e6))
+    res.add_case(minify_size * 1.5 < full_size, 'Minify export size', minify_size, '< {}'.format(full_size / 1.5))
+    res.add_case(svgz_size * 5 < minify_size, 'Svgz export size', svgz_size, '< {}'.format(minify_size / 5))
+    return res
+
+
+def test_solve_layout():
+    res = TestResult()
+
+    def create_layouter(frames_num):
+        layouter = Layouter(0)
+        objs = [object() for _ in range(8)]
+        for frame in range(frames_num):
+            for (i, obj) in enumerate(objs):
+                rendered = (100 + (i * frame) % 37, 50 + frame % 11, '<g/>')
+                if frame == 0:
+                    layouter.display(obj, 'algviz{}'.format(i), rendered=rendered)
+                else:
+                    layouter.update_display(obj, 'algviz{}'.format(i), rendered=rendered)
+            layouter.next_frame(1)
+        return layouter
+
+    small_layouter = create_layouter(300)
+    large_layouter = create_layouter(3000)
+    small_time = measure(lambda: small_layouter.solve_layout(800, 0, 300))
+    large_time = measure(lambda: large_layouter.solve_layout(800, 0, 3000))
+    print('   Solve layout of 8 objects: 300 frames {:.2f} ms, 3000 frames {:.2f} ms'.format(
+        small_time * 1000, large_time * 1000))
+    add_time_case(res, large_time < small_time * 3, 'Flat solve layout cost',
+                  '{:.2f} ms'.format(large_time * 1000), '< {:.2f} ms'.format(small_time * 3000))
+    offsets = large_layouter.solve_layout(800, 0, 3000)
+    packing = large_layouter._packing
+    res.add_case(large_layouter.solve_layout(800, 0, 3000) == offsets and large_layouter._packing is packing,
+                 'Reuse packing solution')
+    res.add_case(large_layouter.solve_layout(800, 10, 20) != offsets, 'Solve layout of frame range')
+    return res
+
+
+def test_builtin_strip_packing():
+    res = TestResult()
+
+    def packing_height(placements, strip_width):
+        # Return None if the placements are invalid.
+        for (i, (_, x1, y1, w1, h1)) in enumerate(placements):
+            if x1 < 0 or y1 < 0 or x1 + w1 > strip_width:
+                return None
+            for (_, x2, y2, w2, h2) in placements[i + 1:]:
+                if x1 < x2 + w2 and x2 < x1 + w1 and y1 < y2 + h2 and y2 < y1 + h1:
+                    return None
+        return max([y + h for (_, _, y, _, h) in placements])
+
+    try:
+        load_dll()
+        native_supported = True
+    except AlgvizRuntimeError:
+        native_supported = False
+    random.seed(0)
+    for rects_num in (10, 100, 500):
+        rects = [(random.randint(40, 400), random.randint(30, 300)) for _ in range(rects_num)]
+        strip_width = 800
+        lower_bound = max(sum([w * h for (w, h) in rects]) / strip_width, max([h for (_, h) in rects]))
+        builtin_time = measure(lambda: solve_builtin_strip_packing(strip_width, rects))
+        builtin_height = packing_height(solve_builtin_strip_packing(strip_width, rects), strip_width)
+        info = '   Strip packing {} rects: built-in {:.2f} ms height {}'.format(
+            rects_num, builtin_time * 1000, builtin_height)
+        # The native solver searches for seconds when there are more than a few rectangles.
+        if native_supported and rects_num <= 10:
+            native_time = measure(lambda: solve_strip_packing(strip_width, rects), repeat=1)
+            native_height = packing_height(solve_strip_packing(strip_width, rects), strip_width)
+            info += ', native {:.2f} ms height {}'.format(native_time * 1000, native_height)
+        print(info + ', lower bound {:.0f}'.format(lower_bound))
+        res.add_case(builtin_height is not None, 'Valid packing {} rects'.format(rects_num))
+        if builtin_height is not None:
+            res.add_case(builtin_height < lower_bound * 1.5, 'Packing quality {} rects'.format(rects_num),
+                         builtin_height, '< {:.0f}'.format(lower_bound * 1.5))
+        add_time_case(res, builtin_time < 0.5, 'Packing time {} rects'.format(rects_num),
+                      '{:.2f} ms'.format(builtin_time * 1000), '< 500 ms')
+    return res
+
+
+def test_import_time():
+    res = TestResult()
+    # Import algviz in a new interpreter, print the import time and the heavy modules loaded.
+    script = '; '.join([
+        'import sys, time',
+        'start = time.perf_counter()',
+        'import algviz',
+        'elapsed = time.perf_counter() - start',
+        'loaded = [m for m in ("IPython", "graphviz", "ctypes") if m in sys.modules]',
+        'viz = algviz.Visualizer(0, 0, headless=True)',
+        'viz.createVector([1, 2, 3]), viz.createTable(2, 2)',
+        'viz.display()',
+        'used = [m for m in ("IPython", "graphviz") if m in sys.modules]',
+        'print(elapsed, ",".join(loaded), ",".join(used), sep="|")'
+    ])
+    env = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(algviz.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([package_dir, env.get('PYTHONPATH', '')])
+    best = None
+    for _ in range(3):
+        output = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True).stdout
+        (elapsed, loaded, used) = output.strip().split('|')
+        if best is None or float(elapsed) < best:
+            best = float(elapsed)
+    print('   Import algviz: {:.2f} ms'.format(best * 1000))
+    res.add_case(loaded == '', 'Import without heavy modules', loaded, '')
+    res.add_case(used == '', 'Vector and table without IPython and graphviz', used, '')
+    add_time_case(res, best < 0.1, 'Import time', best, '< 0.1')
+    return res
@@ -6,8 +6,17 @@
 '''
 
 
+import os
+import time
+import tempfile
+
 import algviz
 from algviz.graph import parseGraph, generateRandomGraph, AlgvizRuntimeError
+from algviz.graph_layout import layout_tree
+from algviz.svg_graph import SvgGraph, _get_graph_type_by_data_
+from algviz.layout_cache import LayoutCache
+import algviz.layout_cache
+import algviz.svg_graph
 from result import TestResult
 from utility import equal, equal_table, get_graph_elements, hack_graph
 from utility import TestCustomPrintableClass
@@ -244,3 +253,148 @@ def test_generate_random_graph():
         print('test_generate_random_directed_graph exception:', e)
         res.add_case(False, 'Generate directed graph')
     return res
+
+
+def test_layout_cache():
+    res = TestResult()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = LayoutCache(cache_dir, 3000, graphviz_version='test')
+        res.add_case(cache.get('digraph {a}', 'dot') is None, 'Layout cache miss')
+        svg_strs = dict()
+        for name in ['a', 'b', 'c', 'd']:
+            svg_strs[name] = '<svg>{}</svg>'.format(name * 987)
+        for name in ['a', 'b', 'c']:
+            cache.put('digraph {%s}' % name, 'dot', svg_strs[name])
+            time.sleep(0.02)    # Make sure the files have different modify time.
+        res.add_case(cache.get('digraph {a}', 'dot') == svg_strs['a'], 'Layout cache hit')
+        time.sleep(0.02)
+        res.add_case(cache.get('digraph {a}', 'neato') is None, 'Layout cache engine')
+        cache.put('digraph {d}', 'dot', svg_strs['d'])
+        cached = [name for name in ['a', 'b', 'c', 'd'] if cache.get('digraph {%s}' % name, 'dot') is not None]
+        res.add_case(cached == ['a', 'd'], 'Layout cache LRU eviction', cached, ['a', 'd'])
+        res.add_case(len(os.listdir(cache_dir)) == 2, 'Layout cache files', len(os.listdir(cache_dir)), 2)
+        # The graph is not layout by graphviz if it's in the cache.
+        graph_nodes = algviz.parseGraph([0, 1, 2], [[0, 1, None], [0, 2, 'e0_2']])
+        empty_graph = SvgGraph.__new__(SvgGraph)    # The empty graph rendered when the graph is created.
+        empty_graph._directed, empty_graph._type = True, _get_graph_type_by_data_(graph_nodes)
+        dot = empty_graph._build_dot_([], [])
+        cache.put(dot.source, dot.engine, layout_tree([], []))
+        algviz.layout_cache._layout_cache = cache
+        try:
+            viz = algviz.Visualizer()
+            graph = viz.createGraph(graph_nodes)
+            hack_graph(graph)
+            (_, source, engine) = graph._layout_job_()
+            (_, _, node_labels, edges, _) = graph._layout_input_()
+            cache.put(source, engine, layout_tree(node_labels, edges))
+            svg_nodes, svg_edges = get_graph_elements(graph._repr_svg_())
+        finally:
+            algviz.setUpLayoutCache(None)
+        expect_edges = [[0, 1, None], [0, 2, 'e0_2']]
+        res.add_case(equal([0, 1, 2], svg_nodes) and equal_table(expect_edges, svg_edges), 'Layout from cache',
+                     'nodes:{};edges:{}'.format(svg_nodes, svg_edges), 'nodes:{};edges:{}'.format([0, 1, 2], expect_edges))
+    return res
+
+
+def test_layout_reuse():
+    res = TestResult()
+    layout_calls = list()
+    layout_tree_func = algviz.svg_graph.layout_tree
+
+    def layout_tree_counted(node_labels, edges):
+        layout_calls.append(node_labels)
+        return layout_tree_func(node_labels, edges)
+
+    algviz.svg_graph.layout_tree = layout_tree_counted
+    try:
+        viz = algviz.Visualizer()
+        root = algviz.parseBinaryTree([1, 2, 3, 4])
+        tree = viz.createGraph(root)
+        hack_graph(tree)
+        tree._repr_svg_()
+        layout_count = len(layout_calls)
+        layout_key = tree._layout_cache[0]
+        # Only the node colors are changed, the layout is reused.
+        tree.markNode(algviz.color_red, root.left)
+        svg_nodes, svg_edges = get_graph_elements(tree._repr_svg_())
+        expect_nodes = ['1', '2', '3', '4']
+        expect_edges = [('1', '2', None), ('1', '3', None), ('2', '4', 'L')]
+        res.add_case(len(layout_calls) == layout_count, 'Reuse layout(mark node)', len(layout_calls), layout_count)
+        res.add_case(equal(expect_nodes, svg_nodes) and equal_table(expect_edges, svg_edges), 'Reuse layout(mark node) SVG',
+                     'nodes:{};edges:{}'.format(svg_nodes, svg_edges), 'nodes:{};edges:{}'.format(expect_nodes, expect_edges))
+        # The node values are changed, the layout is reused and the labels are patched into the right nodes.
+        root.left.val = 9
+        root.left.left.val = 'x'
+        svg_nodes, svg_edges = get_graph_elements(tree._repr_svg_())
+        expect_nodes = ['1', '3', '9', 'x']
+        expect_edges = [('1', '3', None), ('1', '9', None), ('9', 'x', 'L')]
+        res.add_case(len(layout_calls) == layout_count, 'Reuse layout(node value)', len(layout_calls), layout_count)
+        res.add_case(tree._layout_cache[0] == layout_key, 'Reuse layout(node value) key')
+        res.add_case(equal(expect_nodes, svg_nodes) and equal_table(expect_edges, svg_edges), 'Reuse layout(node value) SVG',
+                     'nodes:{};edges:{}'.format(svg_nodes, svg_edges), 'nodes:{};edges:{}'.format(expect_nodes, expect_edges))
+        # The topology is changed, the layout key is changed and the tree is layout again.
+        root.right.right = algviz.BinaryTreeNode(5)
+        svg_nodes, svg_edges = get_graph_elements(tree._repr_svg_())
+        expect_nodes = ['1', '3', '5', '9', 'x']
+        expect_edges = [('1', '3', None), ('1', '9', None), ('3', '5', 'R'), ('9', 'x', 'L')]
+        res.add_case(len(layout_calls) == layout_count + 1, 'Layout again(topology)', len(layout_calls), layout_count + 1)
+        res.add_case(tree._layout_cache[0] != layout_key, 'Layout again(topology) key')
+        res.add_case(equal(expect_nodes, svg_nodes) and equal_table(expect_edges, svg_edges), 'Layout again(topology) SVG',
+                     'nodes:{};edges:{}'.format(svg_nodes, svg_edges), 'nodes:{};edges:{}'.format(expect_nodes, expect_edges))
+    finally:
+        algviz.svg_graph.layout_tree = layout_tree_func
+    return res
+
+
+def test_remove_graph_nodes():
+    res = TestResult()
+    viz = algviz.Visualizer()
+    graph_nodes = algviz.parseGraph([0, 1, 2, 3], [[0, 1, None], [1, 3, None], [2, 1, None]])
+    graph = viz.createGraph(graph_nodes)
+    hack_graph(graph)
+    # The recursive removal is rejected since node1 has input edge from node2, all the nodes are kept bound.
+    removed = graph.removeNode(graph_nodes[0], recursive=True)
+    res.add_case(removed == 0, 'Reject recursive removal', removed, 0)
+    bound = [graph in graph_nodes[i].bind_graphs() for i in range(4)]
+    res.add_case(bound == [True] * 4, 'Keep nodes bound(rejected removal)', bound, [True] * 4)
+    graph_nodes[3].add(algviz.GraphNode(4))
+    nodes, edges = get_graph_elements(graph._repr_svg_())
+    expect_nodes = [0, 1, 2, 3, 4]
+    expect_edges = [(0, 1, None), (1, 3, None), (2, 1, None), (3, 4, None)]
+    res.add_case(equal(expect_nodes, nodes) and equal_table(expect_edges, edges), 'Update kept nodes(rejected removal)',
+                 'nodes:{};edges:{}'.format(nodes, edges), 'nodes:{};edges:{}'.format(expect_nodes, expect_edges))
+    # The node removed without recursive is unbound, it's changes are not shown in the graph.
+    removed = graph.removeNode(graph_nodes[2])
+    res.add_case(removed == 1, 'Remove node', removed, 1)
+    bound = graph in graph_nodes[2].bind_graphs()
+    res.add_case(not bound, 'Unbind removed node', bound, False)
+    graph_nodes[2].add(algviz.GraphNode(5))
+    graph._repr_svg_()  # Skip the animation frame.
+    nodes, edges = get_graph_elements(graph._repr_svg_())
+    expect_nodes = [0, 1, 3, 4]
+    expect_edges = [(0, 1, None), (1, 3, None), (3, 4, None)]
+    res.add_case(equal(expect_nodes, nodes) and equal_table(expect_edges, edges), 'Ignore removed node changes',
+                 'nodes:{};edges:{}'.format(nodes, edges), 'nodes:{};edges:{}'.format(expect_nodes, expect_edges))
+    return res
+
+
+def test_graph_nodes_order():
+    res = TestResult()
+    viz = algviz.Visualizer()
+    graph_nodes = algviz.parseGraph([0, 1, 2], [[0, 1, None], [0, 2, None]])
+    graph = viz.createGraph(graph_nodes[0])
+    # The nodes are arranged in the order they are added, instead of the DFS order from the first node.
+    graph.addNode(algviz.GraphNode(3))
+    graph_nodes[1].add(algviz.GraphNode(4))
+    graph_nodes[2].add(algviz.GraphNode(5), index=0)
+    graph._sync_topology_()
+    order = [node.val for node in graph._node_seq]
+    res.add_case(order == [0, 1, 2, 3, 4, 5], 'Nodes in insertion order', order, [0, 1, 2, 3, 4, 5])
+    # The removed node is added to the end.
+    graph_nodes[0].remove(graph_nodes[1])
+    graph.removeNode(graph_nodes[1])
+    graph.addNode(graph_nodes[1])
+    graph._sync_topology_()
+    order = [node.val for node in graph._node_seq]
+    res.add_case(order == [0, 2, 3, 4, 5, 1], 'Add removed node', order, [0, 2, 3, 4, 5, 1])
+    return res
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+'''
+@author: zjl9959@gmail.com
+@license: GPLv3
+'''
+
+
+import os
+import sys
+import tempfile
+from shutil import which
+from time import monotonic
+
+from algviz.graphviz_pool import GraphvizPool, GraphvizSourceError, GRAPHVIZ_MAX_FAILURES
+from result import TestResult
+
+
+def get_dot_executable(temp_dir):
+    '''
+    @function: Get the graphviz dot executable, the fake dot (fake_dot.py) is used if graphviz is not installed.
+    @param: {temp_dir->str} The directory to create the fake dot executable.
+    @return: {str} The path of dot executable.
+    '''
+    executable = which('dot')
+    if executable is not None:
+        return executable
+    fake_dot = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_dot.py')
+    if os.name == 'nt':
+        executable = os.path.join(temp_dir, 'dot.bat')
+        content = '@"{}" "{}" %*\r\n'.format(sys.executable, fake_dot)
+    else:
+        executable = os.path.join(temp_dir, 'dot')
+        content = '#!/bin/sh\nexec "{}" "{}" "$@"\n'.format(sys.executable, fake_dot)
+    with open(executable, 'w') as f:
+        f.write(content)
+    os.chmod(executable, 0o755)
+    return executable
+
+
+def test_graphviz_pool():
+    res = TestResult()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = GraphvizPool(size=2, timeout=30, executable=get_dot_executable(temp_dir))
+        try:
+            # Test the idle worker is reused by the sequential renders.
+            svgs = [pool.render('digraph {\n\tn%d\n}' % i, 'dot') for i in range(4)]
+            ok = all([svgs[i] is not None and '<title>n%d</title>' % i in svgs[i] for i in range(4)])
+            res.add_case(ok, 'Render graphs one by one')
+            nb_workers = len(pool._workers['dot'])
+            res.add_case(nb_workers == 1, 'Reuse idle worker', nb_workers, 1)
+            # Test render the graphs concurrently, the results are in the jobs order.
+            jobs = [('digraph {\n\tm%d\n}' % i, 'dot') for i in range(5)] + [('graph {\n\tu -- v\n}', 'neato')]
+            svgs = pool.render_many(jobs)
+            ok = all([svgs[i] is not None and '<title>m%d</title>' % i in svgs[i] for i in range(5)])
+            ok = ok and svgs[5] is not None and '<title>u</title>' in svgs[5]
+            res.add_case(ok, 'Render graphs concurrently')
+            nb_workers = (len(pool._workers['dot']), len(pool._workers['neato']))
+            res.add_case(nb_workers == (2, 1), 'Render graphs concurrently(workers)', nb_workers, (2, 1))
+            res.add_case(len(pool._busy) == 0, 'Release workers', pool._busy, {})
+            # Test the graph can't be parsed fails as soon as dot reports the error, without waiting for the timeout.
+            start = monotonic()
+            svg = pool.render('digraph {\n\ta ->\n}', 'dot')
+            elapsed = monotonic() - start
+            res.add_case(svg is None and elapsed < 15, 'Report error', 'svg:{};seconds:{:.1f}'.format(svg, elapsed), 'svg:None')
+            # Test the errors of the bad sources don't disable the pool.
+            for _ in range(GRAPHVIZ_MAX_FAILURES):
+                pool.render('digraph {\n\ta ->\n}', 'dot')
+            res.add_case(pool._failures.get('dot', 0) == 0, 'Not count source errors', pool._failures.get('dot'), 0)
+            res.add_case(pool.available('dot'), 'Available after source errors')
+            # Test the worker reported error is replaced by a new worker.
+            svg = pool.render('digraph {\n\ta -> b\n}', 'dot')
+            res.add_case(svg is not None and '<title>a&#45;&gt;b</title>' in svg, 'Render after error')
+            # Test the error reported after the last batch is finished doesn't fail the next batch.
+            worker = pool._workers['dot'][0]
+            worker._outputs.put(GraphvizSourceError('Graphviz worker error:late error'))
+            svg = pool.render('digraph {\n\tc -> d\n}', 'dot')
+            res.add_case(svg is not None and '<title>c&#45;&gt;d</title>' in svg, 'Discard late error')
+            res.add_case(worker.alive() and pool._workers['dot'][0] is worker, 'Keep worker after late error')
+            workers = pool._workers['dot'][:]
+        finally:
+            pool.close()
+        res.add_case(not any([worker.alive() for worker in workers]), 'Close workers')
+    return res
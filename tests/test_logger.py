@@ -10,6 +10,7 @@ import xml.dom.minidom as xmldom
 from result import TestResult
 from utility import equal
 import algviz
+from algviz.utility import text_char_num, get_text_width
 
 
 def test_logger():
@@ -52,6 +53,30 @@ def test_logger():
     return res
 
 
+def test_text_width():
+    res = TestResult()
+    # The East Asian wide and fullwidth characters take two columns.
+    cases = [
+        ('algviz 0.3', 10),
+        ('\u6811tree', 6),                           # CJK ideograph and ASCII.
+        ('\ud55c\uad6d\uc5b4 ok', 9),                # Hangul syllables.
+        ('\u1100\u1112\u1161', 5),                   # Hangul leading Jamo are wide, vowels are narrow.
+        ('\u3072\u3089\u30ab\u30ca', 8),             # Hiragana and Katakana.
+        ('\uff21\uff22\uff71', 5),                   # Fullwidth letters, halfwidth Katakana.
+        ('\u3002\uff0c', 4),                         # CJK and fullwidth punctuation.
+        ('\U0001f600\U0001f914!', 5),                # Emoji.
+        ('\U00020000', 2),                           # CJK Unified Ideographs Extension B.
+        ('\u00e9\u03a9\u0416', 3),                   # Latin, Greek and Cyrillic letters are narrow.
+        ('\u6811tree\ub098\ubb34 \u30c4\u30ea\u30fc', 17),  # Mixed CJK, Hangul, Katakana and ASCII.
+    ]
+    for (text, expect) in cases:
+        width = text_char_num(text)
+        res.add_case(width == expect, 'Text width of {}'.format(ascii(text)), width, expect)
+    width = get_text_width('\u6811a', 16)
+    res.add_case(width == 30, 'Text width in pixel', width, 30)
+    return res
+
+
 def get_logs_from_svg(svg_str):
     text_lists = list()
     svg = xmldom.parseString(svg_str)
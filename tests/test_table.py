@@ -11,6 +11,8 @@ from result import TestResult
 import algviz
 
 import xml.dom.minidom as xmldom
+from xml.etree.ElementTree import canonicalize
+from algviz.svg_element import SvgDocument, parse_svg
 
 
 def test_create_table():
@@ -252,6 +254,41 @@ def test_reshape_table():
     return res
 
 
+def test_svg_element_toxml():
+    res = TestResult()
+    viz = algviz.Visualizer()
+    table = viz.createTable(2, 3, [[1, 'a<b', 'x&y'], ['"q"', 2.5, None]])
+    table[0][0] = 7
+    table.mark(algviz.color_red, 1, 1)
+    svg_str = table._repr_svg_()
+    res.add_case(parse_svg(svg_str).toxml() == svg_str, 'Parse and serialize round trip')
+    expect_xml = canonicalize(xmldom.parseString(svg_str).toxml())
+    res.add_case(canonicalize(svg_str) == expect_xml, 'Table svg same as minidom')
+
+    # Build the same elements with SvgDocument (typed numbers) and minidom (formatted strings).
+    def build(doc, number):
+        svg = doc.createElement('svg')
+        doc.appendChild(svg)
+        for i in range(3):
+            g = doc.createElement('g')
+            g.setAttribute('id', str(i))
+            rect = doc.createElement('rect')
+            rect.setAttribute('x', number(i * 43.5))
+            rect.setAttribute('fill', '#ffffff')
+            text = doc.createElement('text')
+            text.appendChild(doc.createTextNode('<{}> & "{}"'.format(i, i)))
+            g.appendChild(rect)
+            g.appendChild(text)
+            svg.appendChild(g)
+        svg.removeChild(svg.firstChild)
+        return doc.toxml()
+
+    svg_xml = build(SvgDocument(), lambda v: v)
+    minidom_xml = build(xmldom.Document(), lambda v: '{:.2f}'.format(v))
+    res.add_case(canonicalize(svg_xml) == canonicalize(minidom_xml), 'Built svg same as minidom', svg_xml, minidom_xml)
+    return res
+
+
 def get_table_elements(svg_str):
     '''
     @function: Parse table elements from it's display SVG string.
@@ -7,7 +7,7 @@
 
 import algviz
 from result import TestResult
-from utility import equal, equal_table, get_graph_elements, hack_graph
+from utility import equal, equal_table, get_graph_elements, get_node_positions, hack_graph
 from algviz.utility import AlgvizParamError
 
 
@@ -223,6 +223,56 @@ def test_modify_tree():
     return res
 
 
+def check_tree_layout(res, name, positions, children, node_size):
+    '''
+    @function: Check the children are placed left to right in order without overlap, and the parent is centered.
+    @param: {res->TestResult} Add the check results into it.
+    @param: {positions->dict(str:(float, float))} The center position of each node.
+    @param: {children->dict(str:list(str))} The children of each parent node in order.
+    @param: {node_size->float} The minimum distance between the centers of two nodes in the same row.
+    '''
+    for (parent, nodes) in children.items():
+        xs = [positions[node][0] for node in nodes]
+        ys = [positions[node][1] for node in nodes]
+        ok = all([xs[i + 1] - xs[i] >= node_size for i in range(len(xs) - 1)])
+        res.add_case(ok, '{}: children of {} left to right'.format(name, parent), xs, 'x in order without overlap')
+        ok = all([y == ys[0] and y > positions[parent][1] for y in ys])
+        res.add_case(ok, '{}: children of {} below parent'.format(name, parent), ys, 'below {}'.format(positions[parent][1]))
+        center = (xs[0] + xs[-1]) / 2
+        ok = abs(positions[parent][0] - center) < 0.01
+        res.add_case(ok, '{}: {} centered'.format(name, parent), positions[parent][0], center)
+    rows = dict()
+    for (x, y) in positions.values():
+        rows.setdefault(y, list()).append(x)
+    for (y, xs) in rows.items():
+        xs = sorted(xs)
+        ok = all([xs[i + 1] - xs[i] >= node_size for i in range(len(xs) - 1)])
+        res.add_case(ok, '{}: no overlap in row {}'.format(name, y), xs, 'x without overlap')
+
+
+def test_tree_layout():
+    res = TestResult()
+    viz = algviz.Visualizer()
+    node_size = 54      # The diameter of the circle node.
+    root = algviz.parseBinaryTree([1, 2, 3, 4, 5, None, 6, None, None, 7, 8])
+    tree = viz.createGraph(root)
+    hack_graph(tree)
+    children = {'1': ['2', '3'], '2': ['4', '5'], '3': ['6'], '5': ['7', '8']}
+    check_tree_layout(res, 'Binary tree', get_node_positions(tree._repr_svg_()), children, node_size)
+    root = algviz.parseTree({0: [1, 2, 3], 1: [4, 5, 6], 3: [7, 8], 8: [9]})
+    tree = viz.createGraph(root)
+    hack_graph(tree)
+    children = {'0': ['1', '2', '3'], '1': ['4', '5', '6'], '3': ['7', '8'], '8': ['9']}
+    check_tree_layout(res, 'Tree', get_node_positions(tree._repr_svg_()), children, node_size)
+    # The children are placed in the new order after the tree is changed.
+    root.add(algviz.TreeNode(10), 1)
+    root.childAt(0).removeAt(2)
+    tree._repr_svg_()   # Skip the animation frame.
+    children = {'0': ['1', '10', '2', '3'], '1': ['4', '5'], '3': ['7', '8'], '8': ['9']}
+    check_tree_layout(res, 'Modified tree', get_node_positions(tree._repr_svg_()), children, node_size)
+    return res
+
+
 def test_regression_issue_4():
     # case1: regression from https://github.com/zjl9959/algviz/issues/4
     res = TestResult()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+
+'''
+@author: zjl9959@gmail.com
+@license: GPLv3
+'''
+
+import io
+import os
+import re
+import time
+import tempfile
+import threading
+import warnings
+import contextlib
+import xml.dom.minidom as xmldom
+
+from result import TestResult
+import algviz
+import algviz.layouter as algviz_layouter
+from algviz.layouter import _FramePipeline
+from algviz.packing_solver import solve_strip_packing as solve_builtin_strip_packing
+
+
+def get_export_info(svg_str):
+    '''
+    @function: Parse the info dict stored in the comment of the exported svg.
+    '''
+    dom = xmldom.parseString(svg_str)
+    svg = dom.getElementsByTagName('svg')[0]
+    for child in svg.childNodes:
+        if child.nodeType == child.COMMENT_NODE:
+            return eval(child.data)
+    return None
+
+
+def test_headless_export():
+    res = TestResult()
+    viz = algviz.Visualizer(10, 1, headless=True)
+    vec = viz.createVector([3, 2, 1], name='vec')
+    start = time.time()
+    for i in range(5):
+        vec.swap(0, 2)
+        viz.display(0.5 * (i + 1))
+    elapsed = time.time() - start
+    res.add_case(elapsed < 10, 'No sleep', '{:.2f}s'.format(elapsed), '< 10s')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        svg_path = os.path.join(tmp_dir, 'vec.svg')
+        svg_str = viz.export(svg_path)
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            res.add_case(f.read() == svg_str, 'Export file')
+    info = get_export_info(svg_str)
+    res.add_case(info['frames'] == 5, 'Export frames', info['frames'], 5)
+    expect_delays = [1.5, 2.0, 2.5, 3.0, 3.5]
+    res.add_case(info['delays'][0:5] == expect_delays, 'Export delays', info['delays'][0:5], expect_delays)
+    frames = re.findall('class="frame"', svg_str)
+    res.add_case(len(frames) > 0, 'Export animation frames', len(frames), '> 0')
+    return res
+
+
+def record_export(**kwargs):
+    '''
+    @function: Record some frames of a vector and a tree, return the export info and the tags in the exported svg.
+    '''
+    viz = algviz.Visualizer(1, 0, headless=True, **kwargs)
+    vec = viz.createVector([5, 4, 3, 2, 1], name='vec')
+    top = algviz.parseBinaryTree([1, 2, 3, 4, 5])
+    tree = viz.createGraph(top, name='tree')
+    viz.display()
+    root = top
+    for i in range(4):
+        vec.swap(i, 4 - i)
+        vec.mark(algviz.color_red, i)
+        tree.markNode(algviz.color_green, root)
+        tree.markEdge(algviz.color_blue, top, top.left, hold=True)
+        root = root.left if root.left is not None else root
+        viz.display()
+        # Change the tree after it's displayed, the frames rendered in background should not see the changes.
+        top.right.val = i * 10
+        if i == 1:
+            top.right.left = algviz.BinaryTreeNode(6)
+        elif i == 2:
+            top.left.right = None
+        elif i == 3:
+            tree.removeMark(algviz.color_blue)
+    viz.display()
+    svg_str = viz.export()
+    viz.close()
+    info = get_export_info(svg_str)
+    info['layout'] = sorted(info['layout'].values())    # The display ids are different.
+    # The cloned nodes of a graph frame are not ordered, compare the tags regardless of the order.
+    return info, sorted(re.findall(r'<[^!][^>]*>', re.sub(r'V\d+_', 'V_', svg_str)))
+
+
+def record_frames(create, change, frames_num, display_first=False, delay=0.1):
+    '''
+    @function: Record the frames of some display objects in a headless visualizer.
+    @param: {create->callable} Create the display objects by the visualizer and return them.
+    @param: {change->callable} Change the display objects before each frame, called with (objects, frame index).
+    @param: {frames_num->int} The number of the changed frames.
+    @param: {display_first->bool} Display the objects once before they are changed.
+    @param: {delay->float} The animation delay time of the visualizer.
+    @return: {Visualizer} The visualizer recorded the frames, can be exported.
+    '''
+    viz = algviz.Visualizer(delay, 0, headless=True)
+    objects = create(viz)
+    if display_first:
+        viz.display()
+    for i in range(frames_num):
+        change(objects, i)
+        viz.display()
+    return viz
+
+
+def test_pipeline_export():
+    res = TestResult()
+    (expect_info, expect_tags) = record_export()
+    (actual_info, actual_tags) = record_export(pipeline=True)
+    res.add_case(actual_info == expect_info, 'Pipeline export info', actual_info, expect_info)
+    res.add_case(actual_tags == expect_tags, 'Pipeline export frames', len(actual_tags), len(expect_tags))
+    return res
+
+
+def test_parallel_render_export():
+    res = TestResult()
+    (expect_info, expect_tags) = record_export()
+    (actual_info, actual_tags) = record_export(render_workers=4)
+    res.add_case(actual_info == expect_info, 'Parallel render export info', actual_info, expect_info)
+    res.add_case(actual_tags == expect_tags, 'Parallel render export frames', len(actual_tags), len(expect_tags))
+    (actual_info, actual_tags) = record_export(render_workers=4, pipeline=True)
+    res.add_case(actual_tags == expect_tags, 'Parallel render pipeline frames', len(actual_tags), len(expect_tags))
+    viz = algviz.Visualizer(1, 0, headless=True, render_workers=4)
+    executor = viz._render_executor
+    viz.close()
+    try:
+        executor.submit(print)
+        res.add_case(False, 'Shutdown render executor')
+    except RuntimeError:
+        res.add_case(True, 'Shutdown render executor')
+    return res
+
+
+def test_pipeline_close():
+    res = TestResult()
+    viz = algviz.Visualizer(1, 0, headless=True, pipeline=True)
+    vec = viz.createVector([3, 2, 1], name='vec')
+    for i in range(3):
+        vec.swap(0, 2)
+        viz.display()
+    pipeline = viz._layouter._pipeline
+    viz.close()
+    res.add_case(not pipeline._worker.is_alive(), 'Close pipeline')
+    blocker = threading.Event()
+    pipeline = _FramePipeline(max_tasks=1)
+    pipeline.submit(blocker.wait)
+    pipeline.submit(blocker.wait)   # The queue is full.
+    pipeline.close(wait=False)
+    res.add_case(pipeline._worker.is_alive(), 'Close pipeline without waiting')
+    blocker.set()
+    pipeline._worker.join(10)
+    res.add_case(not pipeline._worker.is_alive(), 'Pipeline stops after the tasks')
+    try:
+        pipeline.submit(blocker.wait)
+        res.add_case(False, 'Submit into closed pipeline')
+    except algviz.AlgvizRuntimeError:
+        res.add_case(True, 'Submit into closed pipeline')
+    return res
+
+
+def test_frame_store_export():
+    res = TestResult()
+    (expect_info, expect_tags) = record_export()
+    (actual_info, actual_tags) = record_export(frame_memory=0)     # All the frames are spilled into file.
+    res.add_case(actual_info == expect_info, 'Spilled frames export info', actual_info, expect_info)
+    res.add_case(actual_tags == expect_tags, 'Spilled frames export', len(actual_tags), len(expect_tags))
+    return res
+
+
+def test_stream_export():
+    res = TestResult()
+
+    def create(viz):
+        algviz.setUpRandomSeed(1)
+        return (viz.createVector([5, 4, 3, 2, 1], name='vec'), viz.createTable(2, 2, [[1, 2], [3, 4]], name='tab'))
+
+    def change(objects, i):
+        (vec, tab) = objects
+        vec.swap(i, 4 - i)
+        tab[0][0] = i
+
+    def normalize(svg_str):
+        # The visualizer ids and display ids are different.
+        return re.sub(r"'\d+': \(", "'_': (", re.sub(r'V\d+_', 'V_', svg_str))
+
+    expect_svg = normalize(record_frames(create, change, 4, delay=1).export())
+    out = io.StringIO()
+    res.add_case(record_frames(create, change, 4, delay=1).export(out, stream=True) is None, 'Stream export returns None')
+    res.add_case(normalize(out.getvalue()) == expect_svg, 'Stream export into file object', len(out.getvalue()), len(expect_svg))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        svg_path = os.path.join(tmp_dir, 'stream.svg')
+        record_frames(create, change, 4, delay=1).export(svg_path, stream=True)
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            res.add_case(normalize(f.read()) == expect_svg, 'Stream export into path')
+    try:
+        record_frames(create, change, 4, delay=1).export(stream=True)
+        res.add_case(False, 'Stream export without path')
+    except algviz.AlgvizRuntimeError:
+        res.add_case(True, 'Stream export without path')
+    return res
+
+
+def get_frames_content(svg_str):
+    '''
+    @function: Get the content displayed in each frame of the exported svg, support the delta encoded svg.
+    @return: {dict((int, int):str)} Key is the (sequencer id, frame), value is the content of the frame.
+    '''
+    def frame_key(begin):
+        match = re.search(r'V\d+_(\d+)([SE])(\d+)\.', begin)
+        return (int(match.group(1)), match.group(2), int(match.group(3)))
+
+    def visible_clone(node, frame):
+        sets = [c for c in node.childNodes if c.nodeType == c.ELEMENT_NODE and c.tagName == 'set']
+        if len(sets) > 0:
+            (_, _, start) = frame_key(sets[0].getAttribute('begin'))
+            (_, _, end) = frame_key(sets[1].getAttribute('begin'))
+            if frame < start or frame > end:
+                return None
+        clone = node.cloneNode(False)
+        if clone.hasAttribute('visibility'):
+            clone.removeAttribute('visibility')
+        for child in node.childNodes:
+            if child.nodeType != child.ELEMENT_NODE:
+                clone.appendChild(child.cloneNode(True))
+            elif child.tagName in ('animate', 'animateMotion'):
+                if frame_key(child.getAttribute('begin'))[2] == frame:
+                    clone.appendChild(child.cloneNode(True))
+            elif child.tagName != 'set':
+                child_clone = visible_clone(child, frame)
+                if child_clone is not None:
+                    clone.appendChild(child_clone)
+        return clone
+
+    frames = dict()
+    dom = xmldom.parseString(svg_str)
+    for g in dom.getElementsByTagName('g'):
+        if g.getAttribute('class') == 'frame':
+            content = [c for c in g.childNodes if c.tagName != 'animate']
+            (seq, _, frame) = frame_key(g.getElementsByTagName('animate')[-1].getAttribute('begin'))
+            if len(content) > 0:
+                frames[(seq, frame)] = ''.join([c.toxml() for c in content])
+        elif g.getAttribute('class') == 'delta':
+            sets = [c for c in g.childNodes if c.tagName == 'set']
+            (seq, _, start) = frame_key(sets[0].getAttribute('begin'))
+            (_, _, end) = frame_key(sets[1].getAttribute('begin'))
+            for frame in range(start, end + 1):
+                clone = visible_clone(g, frame)
+                frames[(seq, frame)] = ''.join([c.toxml() for c in clone.childNodes if c.tagName != 'set'])
+    return frames
+
+
+def test_delta_export():
+    res = TestResult()
+    viz = algviz.Visualizer(1, 0, headless=True)
+    vec = viz.createVector(list(range(20)), name='vec')
+    root = algviz.parseBinaryTree([1, 2, 3, 4, 5])
+    tree = viz.createGraph(root, name='tree')
+    viz.display()
+    for i in range(6):
+        vec.swap(i, 19 - i)
+        vec[10] = i
+        if i == 3:
+            tab = viz.createTable(2, 2, [[1, 2], [3, 4]], name='tab')
+        if i > 3:
+            tab[0][0] = i
+            vec.mark(algviz.color_red, i)
+        tree.markNode(algviz.color_green, root)
+        root = root.left if root.left is not None else root
+        viz.display()
+    layouter = viz._layouter
+    full_svg = layouter.export(800, 0, None)
+    layouter._delta = True
+    delta_svg = layouter.export(800, 0, None)
+    res.add_case(get_export_info(delta_svg) == get_export_info(full_svg), 'Delta export info')
+    full_frames = get_frames_content(full_svg)
+    delta_frames = get_frames_content(delta_svg)
+    res.add_case(sorted(delta_frames.keys()) == sorted(full_frames.keys()), 'Delta export frames',
+                 len(delta_frames), len(full_frames))
+    diff_frames = [key for key in full_frames if full_frames[key] != delta_frames.get(key)]
+    res.add_case(len(diff_frames) == 0, 'Delta export frames content', diff_frames, [])
+    res.add_case(len(delta_svg) < len(full_svg), 'Delta export size', len(delta_svg), '< {}'.format(len(full_svg)))
+    return res
+
+
+def test_chunk_export():
+    res = TestResult()
+    viz = algviz.Visualizer(1, 0, headless=True)
+    vec = viz.createVector([5, 4, 3, 2, 1], name='vec')
+    for i in range(7):
+        vec.swap(i % 5, 4 - i % 5)
+        viz.display()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manifest = viz.exportChunks(tmp_dir, chunk_frames=3)
+        chunks = manifest['chunks']
+        res.add_case(len(chunks) == 3, 'Chunk export count', len(chunks), 3)
+        res.add_case(manifest['frames'] == 7, 'Chunk export frames', manifest['frames'], 7)
+        res.add_case([c['start_frame'] for c in chunks] == [0, 3, 6], 'Chunk export start frames')
+        res.add_case(manifest['duration'] == sum([c['duration'] for c in chunks]), 'Chunk export duration')
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            res.add_case(f.read().count('chunk_') == 3, 'Chunk export manifest file')
+        for i, chunk in enumerate(chunks):
+            with open(os.path.join(tmp_dir, chunk['file']), 'r', encoding='utf-8') as f:
+                info = get_export_info(f.read())
+            res.add_case(info['frames'] == chunk['frames'] and info['duration'] == chunk['duration'],
+                         'Chunk {} info'.format(i), info['frames'], chunk['frames'])
+            # Only the last chunk displays the logo, which adds one more delay.
+            expect_delays = chunk['frames'] + (1 if i == len(chunks) - 1 else 0)
+            res.add_case(len(info['delays']) == expect_delays, 'Chunk {} logo'.format(i), len(info['delays']), expect_delays)
+    try:
+        viz.exportChunks(tempfile.gettempdir(), chunk_frames=0)
+        res.add_case(False, 'Chunk export invalid chunk frames')
+    except algviz.AlgvizParamError:
+        res.add_case(True, 'Chunk export invalid chunk frames')
+    return res
+
+
+def test_minify_export():
+    res = TestResult()
+    viz = algviz.Visualizer(1, 0, headless=True)
+    vec = viz.createVector(list(range(10)), name='vec')
+    tab = viz.createTable(2, 2, [[1, 2], [3, 4]], name='tab')
+    for i in range(4):
+        vec.swap(i, 9 - i)
+        vec.mark(algviz.color_red, i)
+        tab[0][0] = i
+        viz.display()
+    layouter = viz._layouter
+    full_svg = layouter.export(800, 0, None)
+    layouter._minify = 1
+    minify_svg = layouter.export(800, 0, None)
+    res.add_case(get_export_info(minify_svg) == get_export_info(full_svg), 'Minify export info')
+    dom = xmldom.parseString(minify_svg)
+    frames_num = minify_svg.count('<g class="frame"')
+    res.add_case(frames_num == full_svg.count('<g class="frame"'), 'Minify export frames', frames_num)
+    ids = set([e.getAttribute('id') for e in dom.getElementsByTagName('*') if e.hasAttribute('id')])
+    refs = set(re.findall(r'(\w+)\.(?:begin|end)', ' '.join(re.findall(r'begin="([^"]+)"', minify_svg))))
+    res.add_case(refs.issubset(ids), 'Minify export references', refs - ids, set())
+    res.add_case(re.search(r'(x|y|width|height)="-?\d+\.\d\d+"', minify_svg) is None, 'Minify export precision')
+    res.add_case(len(minify_svg) < len(full_svg), 'Minify export size', len(minify_svg), '< {}'.format(len(full_svg)))
+    return res
+
+
+def test_packing_solver_fallback():
+    res = TestResult()
+
+    class BrokenSolver:
+        def solve_strip_packing(self, *args):
+            raise OSError('broken solver')
+
+    rects = [(30, 20), (50, 10), (20, 40)]
+    (old_solver, algviz_layouter._packing_solver) = (algviz_layouter._packing_solver, BrokenSolver())
+    out = io.StringIO()
+    try:
+        with warnings.catch_warnings(record=True) as caught, contextlib.redirect_stdout(out):
+            warnings.simplefilter('always')
+            placements = algviz_layouter.solve_strip_packing(100, rects)
+    finally:
+        algviz_layouter._packing_solver = old_solver
+    expect = solve_builtin_strip_packing(100, rects)
+    res.add_case(placements == expect, 'Fall back to built-in solver', placements, expect)
+    res.add_case(len(caught) == 1 and issubclass(caught[0].category, RuntimeWarning), 'Warn fallback',
+                 [str(w.message) for w in caught], 'one RuntimeWarning')
+    res.add_case(out.getvalue() == '', 'No print', out.getvalue(), '')
+    return res
@@ -108,6 +108,23 @@ def get_graph_elements(svg_str):
     return sorted(list(node_id2label.values())), sorted(res_edges)
 
 
+def get_node_positions(svg_str):
+    '''
+    @function: Parse the center position of graph nodes from it's display SVG string.
+    @param: {svg_str->str} The graph SVG display string.
+    @return: {dict(str:(float, float))} Key is the node label, value is the (x, y) of the node center.
+    '''
+    positions = dict()
+    svg = xmldom.parseString(svg_str)
+    for node in svg.getElementsByTagName('g'):
+        if node.getAttribute('class') != 'node':
+            continue
+        ellipse = node.getElementsByTagName('ellipse')[0]
+        label = node.getElementsByTagName('text')[0].firstChild.data
+        positions[label] = (float(ellipse.getAttribute('cx')), float(ellipse.getAttribute('cy')))
+    return positions
+
+
 def _hack_compress_svg_():
     pass
 